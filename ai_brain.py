@@ -3,8 +3,14 @@ AI Brain Module
 Integrates with ChatGPT (OpenAI) or Gemini (Google) to generate intelligent responses
 """
 import os
-from openai import OpenAI
-import google.generativeai as genai
+import time
+
+import metrics
+import tracing
+
+AI_REQUESTS = metrics.counter('ai_requests_total', 'AI provider calls by outcome', ('provider', 'outcome'))
+AI_SECONDS = metrics.histogram('ai_request_seconds', 'Time an AI provider took to answer', ('provider',))
+AI_CACHE = metrics.counter('ai_response_cache_total', 'Canned answer lookups, hit or miss', ('result',))
 
 
 class AIBrain:
@@ -30,12 +36,15 @@ class AIBrain:
             'thanks': "My pleasure! Anytime!",
         }
 
+        # Only the chosen provider's SDK is imported (each takes a while to load)
         if self.provider == "openai":
+            from openai import OpenAI
             self.client = OpenAI(api_key=api_key)
             self.model = "gpt-3.5-turbo"
             print(f"✓ AI Brain initialized with OpenAI (ChatGPT)")
 
         elif self.provider == "gemini":
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             # Use gemini-2.5-flash which is fast and available
             self.model = genai.GenerativeModel('gemini-2.5-flash')
@@ -65,22 +74,31 @@ Rules for responses:
         Returns:
             str: AI generated response
         """
-        # Check cache first for instant response
-        user_lower = user_input.lower().strip()
-        for key, response in self.response_cache.items():
-            if key in user_lower:
-                print("⚡ (cached response)")
-                return response
-
-        # If not in cache, use AI
-        try:
-            if self.provider == "openai":
-                return self._get_openai_response(user_input)
-            elif self.provider == "gemini":
-                return self._get_gemini_response(user_input)
-        except Exception as e:
-            print(f"❌ Error getting AI response: {e}")
-            return self._get_fallback_response(user_input)
+        with tracing.span('ai', provider=self.provider) as span:
+            # Check cache first for instant response
+            user_lower = user_input.lower().strip()
+            for key, response in self.response_cache.items():
+                if key in user_lower:
+                    print("⚡ (cached response)")
+                    AI_CACHE.inc(result='hit')
+                    span['cached'] = True
+                    return response
+            AI_CACHE.inc(result='miss')
+
+            # If not in cache, use AI
+            started = time.perf_counter()
+            try:
+                if self.provider == "openai":
+                    return self._get_openai_response(user_input)
+                elif self.provider == "gemini":
+                    return self._get_gemini_response(user_input)
+            except Exception as e:
+                print(f"❌ Error getting AI response: {e}")
+                AI_REQUESTS.inc(provider=self.provider, outcome='error')
+                span['fallback'] = type(e).__name__
+                return self._get_fallback_response(user_input)
+            finally:
+                AI_SECONDS.observe(time.perf_counter() - started, provider=self.provider)
 
     def _get_openai_response(self, user_input):
         """Get response from OpenAI ChatGPT"""
@@ -104,6 +122,7 @@ Rules for responses:
         )
 
         assistant_response = response.choices[0].message.content
+        AI_REQUESTS.inc(provider='openai', outcome='ok')
 
         # Save to conversation history
         self.conversation_history.append({
@@ -159,9 +178,11 @@ Rules for responses:
             # Check if response was blocked
             if response.candidates[0].finish_reason == 2:
                 print("⚠️  Response blocked by safety filters, using fallback")
+                AI_REQUESTS.inc(provider='gemini', outcome='blocked')
                 return self._get_fallback_response(user_input)
 
             assistant_response = response.text.strip()
+            AI_REQUESTS.inc(provider='gemini', outcome='ok')
 
             # Save to conversation history
             self.conversation_history.append({
@@ -173,6 +194,7 @@ Rules for responses:
 
         except Exception as e:
             print(f"⚠️  Gemini error: {e}")
+            AI_REQUESTS.inc(provider='gemini', outcome='error')
             # Return fallback response
             return self._get_fallback_response(user_input)
 
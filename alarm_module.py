@@ -1,28 +1,66 @@
 """
 Alarm Module
-Manages alarms and reminders
+Manages alarms and reminders, one-shot or recurring
+Alarms live in an AlarmRegistry (by id and by due time); the checker thread
+sleeps exactly until the next one is due and is woken early whenever alarms
+change. A recurring alarm is scheduled once, at its next occurrence only.
 """
 import datetime
+import re
 import threading
 import time
-import json
-import os
-from pathlib import Path
 from alarm_sound import AlarmSound
+from alarm_store import AlarmStore
+from alarm_schedule import Recurrence, parse_time
+from alarm_registry import AlarmRegistry
+from event_hub import EventHub
+
+
+# Missed alarm policies (alarm time passed while the assistant was off or busy)
+MISSED_FIRE = "fire"    # ring every missed alarm, however late
+MISSED_SKIP = "skip"    # drop missed alarms silently
+MISSED_GRACE = "grace"  # ring if missed by less than the grace period, else drop
+
+# Alarms ringing later than this count as missed
+LATE_TOLERANCE = 2.0
+
+# Longest single sleep - re-check the wall clock in case it jumped (suspend, NTP)
+MAX_SLEEP = 60.0
 
 
 class AlarmModule:
-    def __init__(self, alarm_callback=None):
+    def __init__(self, alarm_callback=None, missed_policy=MISSED_GRACE, missed_grace=15 * 60,
+                 store=None, events=None):
         """
         Initialize Alarm module
 
         Args:
             alarm_callback: Function to call when alarm goes off
+            missed_policy: 'fire', 'skip' or 'grace' - what to do with missed alarms
+            missed_grace: Seconds a missed alarm may still ring under the 'grace' policy
+            store: AlarmStore to persist alarms in (default: alarms.jsonl journal)
+            events: EventHub to publish alarm events on (default: one of its own)
         """
-        self.alarms = []
+        if missed_policy not in (MISSED_FIRE, MISSED_SKIP, MISSED_GRACE):
+            raise ValueError(f"Unknown missed alarm policy: {missed_policy}")
+
         self.alarm_callback = alarm_callback
-        self.alarm_file = Path("alarms.json")
+        self.store = store or AlarmStore()
         self.running = True
+        self.missed_policy = missed_policy
+        self.missed_grace = missed_grace
+        self.registry = AlarmRegistry()
+        self.last_fired = None  # copy of the alarm that rang last (for "snooze")
+
+        # Alarm events ('alarm_rang', 'alarm_set', 'alarm_cancelled', 'alarm_snoozed')
+        # for whoever subscribes; each subscriber has its own bounded queue, so a
+        # slow one can't hold up the checker thread
+        self.events = events or EventHub()
+
+        # Serializes registry changes with their journal writes so the journal
+        # order always matches the registry. Always taken before the registry's
+        # own lock, never the other way round; reads never need it.
+        self._write_lock = threading.Lock()
 
         # Initialize alarm sound
         try:
@@ -40,54 +78,122 @@ class AlarmModule:
 
         print("✓ Alarm module initialized")
 
-    def add_alarm(self, alarm_time, label="Alarm"):
+    def create_alarm(self, alarm_time=None, label="Alarm", repeat=None, kind="alarm"):
+        """
+        Schedule a new alarm and return it
+
+        Args:
+            alarm_time: datetime object or time string (HH:MM format);
+                        may be None when `repeat` defines the times
+            label: Description of the alarm
+            repeat: Optional Recurrence (or its dict form) to repeat the alarm
+            kind: 'alarm' or 'reminder'
+
+        Returns:
+            dict or None: The new alarm (with its 'id'), None if no time is left
+        """
+        now = datetime.datetime.now()
+        if isinstance(repeat, dict):
+            repeat = Recurrence.from_dict(repeat)
+
+        # Parse time if it's a string
+        if repeat is not None:
+            # First occurrence comes from the rule itself
+            alarm_datetime = repeat.next_after(now)
+            if alarm_datetime is None:
+                return None
+        elif isinstance(alarm_time, str):
+            time_parts = alarm_time.split(':')
+            hour = int(time_parts[0])
+            minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+
+            alarm_datetime = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+            # If time has passed today, set for tomorrow
+            if alarm_datetime <= now:
+                alarm_datetime += datetime.timedelta(days=1)
+        else:
+            alarm_datetime = alarm_time
+
+        # Create alarm entry
+        alarm = {
+            'id': AlarmStore.new_id(),
+            'time': alarm_datetime.isoformat(),
+            'label': label,
+            'kind': kind,
+            'repeat': repeat.to_dict() if repeat else None,
+            'active': True
+        }
+
+        with self._write_lock:
+            self.registry.add(alarm, alarm_datetime.timestamp())
+            self.store.add(alarm)
+
+        print(f"⏰ {kind.capitalize()} set {self.describe_when(alarm)} - {label}")
+        self.events.publish('alarm_set', alarm=dict(alarm))
+        return alarm
+
+    def add_alarm(self, alarm_time=None, label="Alarm", repeat=None, kind="alarm"):
         """
         Add a new alarm
 
         Args:
-            alarm_time: datetime object or time string (HH:MM format)
+            alarm_time: datetime object or time string (HH:MM format);
+                        may be None when `repeat` defines the times
             label: Description of the alarm
+            repeat: Optional Recurrence (or its dict form) to repeat the alarm
+            kind: 'alarm' or 'reminder'
 
         Returns:
             str: Confirmation message
         """
         try:
-            # Parse time if it's a string
-            if isinstance(alarm_time, str):
-                now = datetime.datetime.now()
-                time_parts = alarm_time.split(':')
-                hour = int(time_parts[0])
-                minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-
-                alarm_datetime = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
-                # If time has passed today, set for tomorrow
-                if alarm_datetime <= now:
-                    alarm_datetime += datetime.timedelta(days=1)
-            else:
-                alarm_datetime = alarm_time
-
-            # Create alarm entry
-            alarm = {
-                'time': alarm_datetime.isoformat(),
-                'label': label,
-                'active': True
-            }
+            alarm = self.create_alarm(alarm_time, label, repeat=repeat, kind=kind)
+            if alarm is None:
+                return "Those dates have already passed"
 
-            self.alarms.append(alarm)
-            self.save_alarms()
-
-            time_str = alarm_datetime.strftime("%I:%M %p")
-            print(f"⏰ Alarm set for {time_str} - {label}")
-            return f"Alarm set for {time_str}"
+            when = self.describe_when(alarm)
+            if kind == "reminder":
+                return f"Okay, I'll remind you to {label} {when}"
+            return f"Alarm set {when}"
 
         except Exception as e:
             print(f"❌ Error setting alarm: {e}")
-            return "Sorry, couldn't set the alarm"
+            return f"Sorry, couldn't set the {kind}"
+
+    @staticmethod
+    def describe_when(alarm):
+        """Spoken form of when an alarm rings, e.g. 'for 07:00 AM' or 'every day at 07:00 AM'"""
+        if alarm.get('repeat'):
+            return Recurrence.from_dict(alarm['repeat']).describe()
+        return "for " + datetime.datetime.fromisoformat(alarm['time']).strftime("%I:%M %p")
+
+    def add_reminder(self, label, alarm_time=None, repeat=None):
+        """
+        Add a labeled reminder ("remind me to ...")
+
+        Args:
+            label: What to remind about
+            alarm_time: datetime or 'HH:MM' string (None if `repeat` is given)
+            repeat: Optional Recurrence for repeating reminders
+
+        Returns:
+            str: Confirmation message
+        """
+        return self.add_alarm(alarm_time, label, repeat=repeat, kind="reminder")
+
+    def list_alarms(self):
+        """
+        Get scheduled alarms for display or JSON
+
+        Returns:
+            list: Alarm dicts (copies), soonest first
+        """
+        return self.registry.snapshot()
 
     def get_alarms(self):
         """Get list of active alarms"""
-        active_alarms = [a for a in self.alarms if a['active']]
+        active_alarms = [a for a in self.registry.snapshot() if a['active']]
 
         if not active_alarms:
             return "You have no active alarms"
@@ -96,83 +202,237 @@ class AlarmModule:
         for alarm in active_alarms:
             alarm_time = datetime.datetime.fromisoformat(alarm['time'])
             time_str = alarm_time.strftime("%I:%M %p on %A")
-            alarm_list.append(f"{alarm['label']} at {time_str}")
+            if alarm.get('kind') == "reminder":
+                entry = f"reminder to {alarm['label']} at {time_str}"
+            else:
+                entry = f"{alarm['label']} at {time_str}"
+            if alarm.get('repeat'):
+                entry += f" ({Recurrence.from_dict(alarm['repeat']).describe()})"
+            alarm_list.append(entry)
 
         return "Your alarms: " + ", ".join(alarm_list)
 
+    def cancel_alarm(self, alarm_id):
+        """
+        Cancel one alarm by id
+
+        Returns:
+            bool: True if the alarm existed
+        """
+        with self._write_lock:
+            alarm = self.registry.cancel(alarm_id)
+            if alarm is None:
+                return False
+            self.store.remove(alarm_id)
+        print(f"🔕 Cancelled {alarm.get('kind', 'alarm')} '{alarm['label']}'")
+        self.events.publish('alarm_cancelled', alarm=dict(alarm))
+        return True
+
+    def cancel_described(self, text):
+        """
+        Cancel the alarm a spoken command refers to
+
+        "cancel all alarms" cancels every one. Otherwise it's the alarm whose
+        label or time is mentioned ("cancel the reminder to call mom",
+        "delete my 7 am alarm"), or else the next one due.
+
+        Args:
+            text: Command text
+
+        Returns:
+            str: What was cancelled, to say back
+        """
+        text = text.lower()
+        if re.search(r'\ball (?:of )?(?:my |the )?(?:alarms|reminders)\b', text):
+            return self.cancel_all_alarms()
+
+        candidates = [a for a in self.registry.snapshot() if a['active']]  # soonest first
+        wants_reminder, wants_alarm = "reminder" in text, "alarm" in text
+        if wants_reminder != wants_alarm:
+            kind = "reminder" if wants_reminder else "alarm"
+            candidates = [a for a in candidates if a.get('kind', 'alarm') == kind]
+        if not candidates:
+            return "You have no active alarms"
+
+        at = parse_time(text)
+        named = [a for a in candidates
+                 if a['label'].lower() not in ("alarm", "reminder") and a['label'].lower() in text]
+        if named:
+            alarm = named[0]
+        elif at:
+            timed = [a for a in candidates if a['time'][11:16] == at]
+            if not timed:
+                return f"You have no alarm at {datetime.datetime.strptime(at, '%H:%M').strftime('%I:%M %p')}"
+            alarm = timed[0]
+        else:
+            alarm = candidates[0]
+
+        if not self.cancel_alarm(alarm['id']):
+            return "That alarm has already gone off"
+        time_str = datetime.datetime.fromisoformat(alarm['time']).strftime("%I:%M %p on %A")
+        if alarm.get('kind') == "reminder":
+            return f"Cancelled the reminder to {alarm['label']} at {time_str}"
+        if alarm['label'] != "Alarm":
+            return f"Cancelled {alarm['label']} at {time_str}"
+        return f"Cancelled your alarm for {time_str}"
+
     def cancel_all_alarms(self):
         """Cancel all alarms"""
-        self.alarms = []
-        self.save_alarms()
+        with self._write_lock:
+            self.registry.clear()
+            self.store.clear()
         print("🔕 All alarms cancelled")
+        self.events.publish('alarm_cancelled', alarm=None)
         return "All alarms cancelled"
 
-    def _check_alarms(self):
-        """Background thread to check for alarm triggers"""
-        while self.running:
-            try:
-                now = datetime.datetime.now()
+    def snooze_alarm(self, alarm_id=None, minutes=9):
+        """
+        Ring an alarm again in a few minutes
 
-                for alarm in self.alarms[:]:  # Copy list to avoid modification during iteration
-                    if not alarm['active']:
-                        continue
+        A pending one-shot alarm is simply moved. A repeating alarm keeps its
+        rule and gets an extra one-shot copy; an alarm that already rang is
+        brought back as a one-shot.
 
-                    alarm_time = datetime.datetime.fromisoformat(alarm['time'])
+        Args:
+            alarm_id: Alarm to snooze (None = the alarm that rang last)
+            minutes: How long to snooze
 
-                    # Check if alarm time has arrived (within 30 seconds window)
-                    time_diff = (alarm_time - now).total_seconds()
+        Returns:
+            dict or None: The snoozed alarm, None if there was nothing to snooze
+        """
+        due = (datetime.datetime.now() + datetime.timedelta(minutes=minutes)).replace(microsecond=0)
+        last_fired = self.last_fired
+        if alarm_id is None:
+            if last_fired is None:
+                return None
+            alarm_id = last_fired['id']
+
+        with self._write_lock:
+            current = self.registry.get(alarm_id)
+            if current is not None and not current.get('repeat'):
+                alarm = self.registry.reschedule(alarm_id, due.timestamp(), time=due.isoformat())
+            else:
+                source = current or (last_fired if last_fired and last_fired['id'] == alarm_id else None)
+                if source is None:
+                    return None
+                alarm = dict(source, time=due.isoformat(), repeat=None, active=True)
+                if current is not None:
+                    alarm['id'] = AlarmStore.new_id()
+                self.registry.add(alarm, due.timestamp())
+            self.store.add(alarm)
+
+        print(f"😴 Snoozed '{alarm['label']}' until {due.strftime('%I:%M %p')}")
+        self.events.publish('alarm_snoozed', alarm=dict(alarm))
+        return alarm
+
+    def subscribe(self):
+        """
+        Receive alarm events from now on
 
-                    if 0 <= time_diff <= 30:
-                        # Trigger alarm
-                        print(f"\n🔔 ALARM! {alarm['label']}")
+        Returns:
+            Subscription: get()/drain() its events; close() it (or use `with`) when done
+        """
+        return self.events.subscribe()
 
-                        # Play alarm ringtone in a separate thread (so it doesn't block)
-                        if self.alarm_sound:
-                            try:
-                                ringtone_thread = threading.Thread(
-                                    target=self.alarm_sound.play_alarm_ringtone,
-                                    args=(10,),  # Play for 10 seconds
-                                    daemon=True
-                                )
-                                ringtone_thread.start()
-                            except Exception as e:
-                                print(f"⚠️  Ringtone playback error: {e}")
+    def unsubscribe(self, subscription):
+        """Stop receiving alarm events"""
+        self.events.unsubscribe(subscription)
 
-                        # Call the callback (for voice notification)
-                        if self.alarm_callback:
-                            self.alarm_callback(alarm['label'])
+    def _should_ring_late(self, lateness):
+        """Apply the missed alarm policy to an alarm that is `lateness` seconds late"""
+        if self.missed_policy == MISSED_FIRE:
+            return True
+        if self.missed_policy == MISSED_SKIP:
+            return False
+        return lateness <= self.missed_grace
 
-                        # Mark as inactive and remove
-                        alarm['active'] = False
-                        self.alarms.remove(alarm)
-                        self.save_alarms()
+    def _check_alarms(self):
+        """Background thread that fires alarms as they come due"""
+        while self.running:
+            try:
+                claimed = self.registry.take_due(max_sleep=MAX_SLEEP)
+                if claimed is None:
+                    break
+                due, alarm, token = claimed
+
+                # Recurring: compute just the next occurrence and reschedule
+                next_time = None
+                if alarm.get('repeat'):
+                    after = max(datetime.datetime.now(), datetime.datetime.fromtimestamp(due))
+                    next_time = Recurrence.from_dict(alarm['repeat']).next_after(after)
+
+                with self._write_lock:
+                    if next_time:
+                        if not self.registry.complete(alarm['id'], token, next_time.timestamp(),
+                                                      time=next_time.isoformat()):
+                            continue  # cancelled or snoozed since it came due
+                        self.store.add(dict(alarm, time=next_time.isoformat()))
+                    else:
+                        if not self.registry.complete(alarm['id'], token):
+                            continue
+                        self.store.remove(alarm['id'])
+
+                lateness = time.time() - due
+                if lateness > LATE_TOLERANCE:
+                    if not self._should_ring_late(lateness):
+                        print(f"⏭️  Skipping missed alarm '{alarm['label']}' ({lateness / 60:.0f} min late)")
+                        continue
+                    print(f"⏰ Ringing missed alarm '{alarm['label']}' ({lateness / 60:.0f} min late)")
 
-                # Check every 10 seconds
-                time.sleep(10)
+                self.last_fired = alarm
+                self._trigger_alarm(alarm)
 
             except Exception as e:
                 print(f"⚠️  Alarm checker error: {e}")
-                time.sleep(10)
+                time.sleep(1)
+
+    def _trigger_alarm(self, alarm):
+        """Ring an alarm and notify the assistant"""
+        is_reminder = alarm.get('kind') == "reminder"
+        label = f"Reminder: {alarm['label']}" if is_reminder else alarm['label']
+        print(f"\n🔔 ALARM! {label}")
+        self.events.publish('alarm_rang', alarm=dict(alarm), label=label)
+
+        # Play alarm ringtone in a separate thread (so it doesn't block)
+        if self.alarm_sound:
+            try:
+                ringtone_thread = threading.Thread(
+                    target=self.alarm_sound.play_alarm_ringtone,
+                    args=(3 if is_reminder else 10,),  # Reminders just chime briefly
+                    daemon=True
+                )
+                ringtone_thread.start()
+            except Exception as e:
+                print(f"⚠️  Ringtone playback error: {e}")
+
+        # Call the callback (for voice notification)
+        if self.alarm_callback:
+            self.alarm_callback(label)
 
     def save_alarms(self):
-        """Save alarms to file"""
+        """Compact the alarm journal down to the current alarms"""
         try:
-            with open(self.alarm_file, 'w') as f:
-                json.dump(self.alarms, f, indent=2)
+            self.store.compact()
         except Exception as e:
             print(f"⚠️  Error saving alarms: {e}")
 
     def load_alarms(self):
-        """Load alarms from file"""
-        try:
-            if self.alarm_file.exists():
-                with open(self.alarm_file, 'r') as f:
-                    self.alarms = json.load(f)
-                print(f"📂 Loaded {len(self.alarms)} saved alarms")
-        except Exception as e:
-            print(f"⚠️  Error loading alarms: {e}")
-            self.alarms = []
+        """Load alarms from the journal"""
+        with self._write_lock:
+            try:
+                alarms = [a for a in self.store.load() if a.get('active', True)]
+                print(f"📂 Loaded {len(alarms)} saved alarms")
+            except Exception as e:
+                print(f"⚠️  Error loading alarms: {e}")
+                alarms = []
+
+            # Parse each time once; missed alarms come due immediately
+            self.registry.replace_all(
+                (alarm, datetime.datetime.fromisoformat(alarm['time']).timestamp()) for alarm in alarms
+            )
 
     def stop(self):
         """Stop the alarm checker thread"""
         self.running = False
+        self.registry.stop()
+        self.store.close()
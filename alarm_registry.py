@@ -0,0 +1,186 @@
+"""
+Alarm Registry Module
+Thread-safe set of scheduled alarms, indexed by id and by due time
+All state sits behind one condition variable; every operation holds it only
+for O(log n) work and never calls out, so web requests, the voice thread and
+the alarm checker can share it freely
+"""
+import heapq
+import itertools
+import threading
+import time
+
+
+class AlarmRegistry:
+    def __init__(self):
+        """Create an empty registry"""
+        self._condition = threading.Condition()
+        self._alarms = {}   # id -> alarm dict
+        self._due = {}      # id -> due timestamp
+        self._tokens = {}   # id -> token of the alarm's live heap entry
+        self._heap = []     # (due timestamp, token, id); entries with stale tokens are skipped
+        self._counter = itertools.count()
+        self._stopped = False
+
+    def __len__(self):
+        with self._condition:
+            return len(self._alarms)
+
+    def add(self, alarm, due):
+        """
+        Register an alarm
+
+        Args:
+            alarm: Alarm dict with an 'id'
+            due: Due time as a Unix timestamp
+        """
+        with self._condition:
+            self._alarms[alarm['id']] = dict(alarm)
+            self._push(alarm['id'], due)
+            self._condition.notify()
+
+    def replace_all(self, alarms_with_due):
+        """Swap in a whole new set of alarms, e.g. after loading from disk"""
+        with self._condition:
+            self._alarms, self._due, self._tokens, self._heap = {}, {}, {}, []
+            for alarm, due in alarms_with_due:
+                self._alarms[alarm['id']] = dict(alarm)
+                self._push(alarm['id'], due)
+            self._condition.notify()
+
+    def cancel(self, alarm_id):
+        """
+        Remove an alarm
+
+        Returns:
+            dict or None: The removed alarm
+        """
+        with self._condition:
+            alarm = self._alarms.pop(alarm_id, None)
+            if alarm is not None:
+                del self._due[alarm_id]
+                del self._tokens[alarm_id]  # its heap entry is now stale
+                self._compact_heap()
+                self._condition.notify()
+            return alarm
+
+    def clear(self):
+        """Remove every alarm"""
+        with self._condition:
+            self._alarms, self._due, self._tokens, self._heap = {}, {}, {}, []
+            self._condition.notify()
+
+    def reschedule(self, alarm_id, due, **changes):
+        """
+        Move an alarm to a new due time (snooze, next occurrence)
+
+        Args:
+            alarm_id: Alarm to move
+            due: New due time as a Unix timestamp
+            changes: Fields to update on the alarm (e.g. time=...)
+
+        Returns:
+            dict or None: Copy of the updated alarm, None if it doesn't exist
+        """
+        with self._condition:
+            alarm = self._alarms.get(alarm_id)
+            if alarm is None:
+                return None
+            alarm.update(changes)
+            self._push(alarm_id, due)
+            self._compact_heap()
+            self._condition.notify()
+            return dict(alarm)
+
+    def get(self, alarm_id):
+        """Copy of one alarm, or None"""
+        with self._condition:
+            alarm = self._alarms.get(alarm_id)
+            return dict(alarm) if alarm is not None else None
+
+    def snapshot(self):
+        """
+        Consistent copy of all alarms, soonest first
+
+        Returns:
+            list: Alarm dicts (copies - safe to use without the lock)
+        """
+        with self._condition:
+            ordered = sorted(self._alarms, key=self._due.__getitem__)
+            return [dict(self._alarms[alarm_id]) for alarm_id in ordered]
+
+    def take_due(self, max_sleep=None):
+        """
+        Sleep until the earliest alarm is due and claim it
+
+        The alarm stays registered; pass the returned token to complete() to
+        reschedule or remove it. If it is cancelled or snoozed in between,
+        complete() reports that and the caller should not ring it.
+
+        Args:
+            max_sleep: Longest single wait, to re-check the wall clock
+
+        Returns:
+            tuple: (due timestamp, alarm copy, token), or None once stopped
+        """
+        with self._condition:
+            while not self._stopped:
+                # Drop entries made stale by cancel/reschedule
+                while self._heap and self._tokens.get(self._heap[0][2]) != self._heap[0][1]:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._condition.wait()  # nothing scheduled - sleep until something changes
+                    continue
+
+                due, token, alarm_id = self._heap[0]
+                delay = due - time.time()
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    return due, dict(self._alarms[alarm_id]), token
+
+                self._condition.wait(delay if max_sleep is None else min(delay, max_sleep))
+        return None
+
+    def complete(self, alarm_id, token, next_due=None, **changes):
+        """
+        Finish a claimed alarm: reschedule it (recurring) or remove it
+
+        Args:
+            alarm_id: Alarm returned by take_due
+            token: Token returned by take_due
+            next_due: Next due timestamp, or None to remove the alarm
+            changes: Fields to update when rescheduling
+
+        Returns:
+            bool: False if the alarm was cancelled or moved after being claimed
+        """
+        with self._condition:
+            if self._tokens.get(alarm_id) != token:
+                return False
+            if next_due is None:
+                del self._alarms[alarm_id], self._due[alarm_id], self._tokens[alarm_id]
+            else:
+                self._alarms[alarm_id].update(changes)
+                self._push(alarm_id, next_due)
+            self._condition.notify()
+            return True
+
+    def stop(self):
+        """Wake and release any thread waiting in take_due"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _push(self, alarm_id, due):
+        """Schedule a heap entry for an alarm (caller holds the lock)"""
+        token = next(self._counter)
+        self._due[alarm_id] = due
+        self._tokens[alarm_id] = token
+        heapq.heappush(self._heap, (due, token, alarm_id))
+
+    def _compact_heap(self):
+        """Rebuild the heap once stale entries outnumber live ones (caller holds the lock)"""
+        if len(self._heap) > 2 * len(self._alarms) + 16:
+            self._heap = [(self._due[i], self._tokens[i], i) for i in self._alarms]
+            heapq.heapify(self._heap)
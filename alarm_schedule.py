@@ -0,0 +1,233 @@
+"""
+Alarm Schedule Module
+Recurrence rules for repeating alarms and reminders, plus parsing of spoken
+schedule requests ("every weekday at 7 am", "remind me to ... every 30 minutes")
+A rule is stored once; its next occurrence is computed only when needed
+"""
+import datetime
+import re
+
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTHS = {name: number for number, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"], start=1)}
+
+# "7:30", "7:30 pm", "7 pm", "7 p.m."
+TIME_PATTERN = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.?|p\.m\.?)?(?=\W|$)')
+INTERVAL_PATTERN = re.compile(r'\bevery\s+(\d+)\s*(minutes?|mins?|hours?|hrs?)\b')
+ISO_DATE_PATTERN = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+MONTH_DATE_PATTERN = re.compile(r'\b(' + '|'.join(MONTHS) + r')\s+(\d{1,2})(?:st|nd|rd|th)?\b')
+
+
+class Recurrence:
+    ONCE = "once"
+    DAILY = "daily"
+    WEEKDAYS = "weekdays"
+    INTERVAL = "interval"
+    DATES = "dates"
+
+    def __init__(self, kind, at=None, minutes=None, dates=None, anchor=None):
+        """
+        Create a recurrence rule
+
+        Args:
+            kind: 'daily', 'weekdays', 'interval' or 'dates'
+            at: Time of day as 'HH:MM' (daily, weekdays, dates)
+            minutes: Interval length in minutes (interval)
+            dates: List of 'YYYY-MM-DD' strings (dates)
+            anchor: ISO datetime the interval counts from (interval)
+        """
+        if kind not in (self.DAILY, self.WEEKDAYS, self.INTERVAL, self.DATES):
+            raise ValueError(f"Unknown recurrence: {kind}")
+        if kind == self.INTERVAL and (not minutes or minutes <= 0):
+            raise ValueError("Interval recurrence needs a positive number of minutes")
+        if kind != self.INTERVAL and not at:
+            raise ValueError(f"'{kind}' recurrence needs a time of day")
+
+        self.kind = kind
+        self.at = at
+        self.minutes = minutes
+        self.dates = sorted(dates or [])
+        self.anchor = anchor
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a rule saved with to_dict"""
+        return cls(data['kind'], at=data.get('at'), minutes=data.get('minutes'),
+                   dates=data.get('dates'), anchor=data.get('anchor'))
+
+    def to_dict(self):
+        """Serializable form, stored with the alarm"""
+        data = {'kind': self.kind}
+        if self.at:
+            data['at'] = self.at
+        if self.minutes:
+            data['minutes'] = self.minutes
+        if self.dates:
+            data['dates'] = self.dates
+        if self.anchor:
+            data['anchor'] = self.anchor
+        return data
+
+    def next_after(self, moment):
+        """
+        First occurrence strictly after a moment
+
+        Args:
+            moment: datetime to search from
+
+        Returns:
+            datetime or None: Next occurrence, None once a date list is used up
+        """
+        if self.kind == self.INTERVAL:
+            anchor = datetime.datetime.fromisoformat(self.anchor) if self.anchor else moment
+            step = datetime.timedelta(minutes=self.minutes)
+            if moment < anchor:
+                return anchor
+            periods = int((moment - anchor) / step) + 1
+            return anchor + periods * step
+
+        hour, minute = (int(part) for part in self.at.split(':'))
+
+        if self.kind == self.DATES:
+            for day in self.dates:
+                candidate = datetime.datetime.combine(datetime.date.fromisoformat(day),
+                                                      datetime.time(hour, minute))
+                if candidate > moment:
+                    return candidate
+            return None
+
+        candidate = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= moment:
+            candidate += datetime.timedelta(days=1)
+        if self.kind == self.WEEKDAYS:
+            while candidate.weekday() >= 5:
+                candidate += datetime.timedelta(days=1)
+        return candidate
+
+    def describe(self):
+        """Short spoken description, e.g. 'every weekday at 07:00 AM'"""
+        if self.kind == self.INTERVAL:
+            if self.minutes % 60 == 0:
+                hours = self.minutes // 60
+                return "every hour" if hours == 1 else f"every {hours} hours"
+            return f"every {self.minutes} minutes"
+
+        at = datetime.datetime.strptime(self.at, "%H:%M").strftime("%I:%M %p")
+        if self.kind == self.DAILY:
+            return f"every day at {at}"
+        if self.kind == self.WEEKDAYS:
+            return f"every weekday at {at}"
+        days = ", ".join(datetime.date.fromisoformat(d).strftime("%B %d") for d in self.dates)
+        return f"on {days} at {at}"
+
+
+def parse_time(text):
+    """
+    Find a time of day in spoken text
+
+    Args:
+        text: Lowercase command text
+
+    Returns:
+        str or None: 'HH:MM' in 24-hour time
+    """
+    for match in TIME_PATTERN.finditer(text):
+        hour, minute, period = match.group(1), match.group(2), match.group(3)
+        if minute is None and period is None:
+            continue  # a bare number ("every 30 minutes") isn't a time
+        hour, minute = int(hour), int(minute or 0)
+        if period:
+            if hour < 1 or hour > 12:
+                continue
+            if period.startswith('p') and hour != 12:
+                hour += 12
+            elif period.startswith('a') and hour == 12:
+                hour = 0
+        if hour > 23 or minute > 59:
+            continue
+        return f"{hour:02d}:{minute:02d}"
+    return None
+
+
+def parse_dates(text, today=None):
+    """Find specific calendar dates ('2026-12-25', 'december 25') in spoken text"""
+    today = today or datetime.date.today()
+    dates = []
+    # Dates that don't exist ('february 30', '2026-13-01') are skipped
+    for year, month, day in ISO_DATE_PATTERN.findall(text):
+        try:
+            dates.append(datetime.date(int(year), int(month), int(day)))
+        except ValueError:
+            continue
+    for month_name, day in MONTH_DATE_PATTERN.findall(text):
+        try:
+            date = datetime.date(today.year, MONTHS[month_name], int(day))
+            if date < today:
+                date = date.replace(year=today.year + 1)
+        except ValueError:
+            continue
+        dates.append(date)
+    return [d.isoformat() for d in dates]
+
+
+def parse_schedule(text, now=None):
+    """
+    Work out when a spoken alarm or reminder should go off
+
+    Args:
+        text: Command text, e.g. "remind me to stretch every 45 minutes"
+        now: Current time (defaults to datetime.now())
+
+    Returns:
+        tuple: (time 'HH:MM' or None, Recurrence or None); (None, None) if
+               nothing usable was said, including dates that don't exist
+    """
+    now = now or datetime.datetime.now()
+    text = text.lower()
+    at = parse_time(text)
+
+    interval = INTERVAL_PATTERN.search(text)
+    if interval:
+        amount = int(interval.group(1))
+        minutes = amount * 60 if interval.group(2).startswith('h') else amount
+        if minutes <= 0:
+            return at, None
+        anchor = now + datetime.timedelta(minutes=minutes)
+        if at:
+            # "every 2 hours starting at 9 am"
+            hour, minute = (int(part) for part in at.split(':'))
+            anchor = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return at, Recurrence(Recurrence.INTERVAL, minutes=minutes,
+                              anchor=anchor.replace(microsecond=0).isoformat())
+
+    if not at:
+        return None, None
+
+    if "weekday" in text:
+        return at, Recurrence(Recurrence.WEEKDAYS, at=at)
+    if "every day" in text or "daily" in text or "every morning" in text or "every night" in text:
+        return at, Recurrence(Recurrence.DAILY, at=at)
+
+    dates = parse_dates(text, now.date())
+    if dates:
+        return at, Recurrence(Recurrence.DATES, at=at, dates=dates)
+    if ISO_DATE_PATTERN.search(text) or MONTH_DATE_PATTERN.search(text):
+        return None, None  # only impossible dates - don't quietly ring today instead
+    return at, None
+
+
+def parse_reminder_label(text):
+    """
+    Pull the thing to be reminded about out of a command
+
+    "remind me to call mom at 5 pm every day" -> "call mom"
+    """
+    match = re.search(r'\bremind me\s+(?:to\s+|about\s+|that\s+)?(.*)', text, flags=re.IGNORECASE)
+    label = match.group(1) if match else ""
+    # Drop the scheduling part of the sentence
+    label = re.split(r'\b(?:at \d|every\b|daily\b|on weekdays\b|on (?:\d{4}-|'
+                     + '|'.join(MONTHS) + r'))', label, maxsplit=1, flags=re.IGNORECASE)[0]
+    label = TIME_PATTERN.sub(lambda m: m.group(0) if not (m.group(2) or m.group(3)) else '', label)
+    return ' '.join(label.split()).strip(' .,!') or None
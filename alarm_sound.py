@@ -1,28 +1,120 @@
 """
 Alarm Sound Module
-Generates and plays alarm ringtone using simple system beep
+Generates and plays the alarm ringtone
+The beep pattern is synthesized once as a PCM buffer and looped on the audio
+output's alarm channel, so ringing costs no subprocesses and stopping takes
+effect within one mixer buffer. Falls back to system beep commands when no
+mixer is available.
 """
 import subprocess
 import time
 import threading
 
+import numpy as np
+import pygame
+
+from audio_output import get_audio_output
+
+
+# Ringtone pattern: beep-beep-pause-beep-beep-long pause, as (tone?, seconds)
+BEEP_PATTERN = [
+    (True, 0.3), (False, 0.4), (True, 0.3), (False, 0.4),
+    (False, 0.3),
+    (True, 0.3), (False, 0.4), (True, 0.3), (False, 0.4),
+    (False, 0.8),
+]
+
+# Fade in/out of each beep, avoids clicks at the edges
+FADE_SECONDS = 0.005
+
+
+def synthesize_pattern(pattern, sample_rate, frequency=800, volume=0.6):
+    """
+    Render a beep pattern as 16-bit mono PCM
+
+    Args:
+        pattern: List of (tone?, seconds) segments
+        sample_rate: Output sample rate in Hz
+        frequency: Beep pitch in Hz
+        volume: Peak amplitude (0.0 to 1.0)
+
+    Returns:
+        numpy.ndarray: int16 samples
+    """
+    segments = []
+    fade = int(FADE_SECONDS * sample_rate)
+    for is_tone, seconds in pattern:
+        count = int(seconds * sample_rate)
+        if not is_tone:
+            segments.append(np.zeros(count, dtype=np.float32))
+            continue
+        t = np.arange(count, dtype=np.float32) / sample_rate
+        tone = np.sin(2 * np.pi * frequency * t)
+        envelope = np.ones(count, dtype=np.float32)
+        envelope[:fade] = np.linspace(0.0, 1.0, fade)
+        envelope[-fade:] = np.linspace(1.0, 0.0, fade)
+        segments.append(tone * envelope)
+
+    samples = np.concatenate(segments) * volume
+    return (samples * 32767).astype(np.int16)
+
 
 class AlarmSound:
-    def __init__(self):
-        """Initialize alarm sound player"""
+    def __init__(self, frequency=800, volume=0.6, output=None):
+        """
+        Initialize alarm sound player
+
+        Args:
+            frequency: Beep pitch in Hz
+            volume: Ringtone volume (0.0 to 1.0)
+            output: AudioOutput to ring through (default: the shared one)
+        """
         self.is_playing = False
         self.enabled = True
-        print("✓ Alarm sound module initialized (using system beep)")
+        self.frequency = frequency
+        self.volume = volume
+        self.output = output or get_audio_output()
+
+        self._stop_event = threading.Event()
+        self._ringtone = None
+        self._beep = None
+
+        try:
+            self._render_sounds()
+            print("✓ Alarm sound module initialized (synthesized ringtone)")
+        except Exception as e:
+            self._ringtone = None
+            print(f"✓ Alarm sound module initialized (using system beep; mixer unavailable: {e})")
+
+    def _render_sounds(self):
+        """Render the ringtone and single beep once, in the mixer's format"""
+        if not self.output.available:
+            raise RuntimeError("no audio output")
+
+        # Use whatever format the mixer was opened with
+        mixer_rate, size, channels = self.output.mixer_format
+        if size != -16:
+            raise RuntimeError(f"unsupported mixer sample format: {size}")
+
+        self._ringtone = self._make_sound(BEEP_PATTERN, mixer_rate, channels)
+        self._beep = self._make_sound([(True, 0.3)], mixer_rate, channels)
+
+    def _make_sound(self, pattern, sample_rate, channels):
+        """Synthesize a pattern into a pygame Sound matching the mixer format"""
+        samples = synthesize_pattern(pattern, sample_rate, self.frequency, self.volume)
+        if channels > 1:
+            samples = np.repeat(samples[:, np.newaxis], channels, axis=1)
+        return pygame.mixer.Sound(buffer=np.ascontiguousarray(samples).tobytes())
 
     def play_single_beep(self):
         """
-        Play a single system beep using paplay (PulseAudio)
+        Play a single system beep (fallback when the mixer is unavailable)
         """
         try:
             # Try using paplay with speaker-test to generate a tone
             # speaker-test generates test tones, we pipe it to paplay
             subprocess.run(
-                ['timeout', '0.3', 'speaker-test', '-t', 'sine', '-f', '800', '-l', '1'],
+                ['timeout', '0.3', 'speaker-test', '-t', 'sine', '-f', str(self.frequency), '-l', '1'],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
                 timeout=1
@@ -30,7 +122,7 @@ class AlarmSound:
         except Exception:
             # Fallback: try system beep command
             try:
-                subprocess.run(['beep', '-f', '800', '-l', '300'],
+                subprocess.run(['beep', '-f', str(self.frequency), '-l', '300'],
                              stdout=subprocess.DEVNULL,
                              stderr=subprocess.DEVNULL,
                              timeout=1)
@@ -48,6 +140,8 @@ class AlarmSound:
         """
         Play alarm ringtone for specified duration
 
+        Blocks until the duration is up or stop() is called.
+
         Args:
             duration_seconds: How long to play the alarm (default 10 seconds)
         """
@@ -56,32 +150,15 @@ class AlarmSound:
             return
 
         print("🔔 Playing alarm ringtone...")
+        self._stop_event.clear()
         self.is_playing = True
 
         try:
-            # Play pattern: beep-beep-pause-beep-beep-pause
-            start_time = time.time()
-
-            while (time.time() - start_time) < duration_seconds and self.is_playing:
-                # Play two beeps
-                self.play_single_beep()
-                time.sleep(0.4)  # Wait for beep to finish
-
-                self.play_single_beep()
-                time.sleep(0.4)
-
-                # Short pause
-                time.sleep(0.3)
-
-                # Play two more beeps
-                self.play_single_beep()
-                time.sleep(0.4)
-
-                self.play_single_beep()
-                time.sleep(0.4)
-
-                # Longer pause before repeating
-                time.sleep(0.8)
+            if self._ringtone is not None:
+                # One looped buffer on the alarm channel; music and speech are ducked meanwhile
+                self.output.play_alarm(self._ringtone, duration_seconds, self._stop_event)
+            else:
+                self._play_beep_pattern(duration_seconds)
 
         except Exception as e:
             print(f"⚠️  Error playing alarm sound: {e}")
@@ -91,14 +168,32 @@ class AlarmSound:
             self.is_playing = False
             print("⏹️  Alarm ringtone stopped")
 
+    def _play_beep_pattern(self, duration_seconds):
+        """Ring with system beeps, following the same pattern as the synthesized ringtone"""
+        start_time = time.time()
+        while (time.time() - start_time) < duration_seconds and not self._stop_event.is_set():
+            for is_tone, seconds in BEEP_PATTERN:
+                if self._stop_event.is_set():
+                    return
+                if is_tone:
+                    self.play_single_beep()
+                else:
+                    self._stop_event.wait(seconds)
+
     def stop(self):
-        """Stop the alarm ringtone"""
+        """Stop the alarm ringtone (audible within one mixer buffer)"""
         self.is_playing = False
+        self._stop_event.set()
+        if self._ringtone is not None:
+            self.output.stop_alarm()
 
     def play_quick_beep(self):
         """Play a quick single beep (for testing or short alerts)"""
         try:
-            self.play_single_beep()
-            time.sleep(0.4)
+            if self._beep is not None:
+                self.output.play_chime(self._beep)
+            else:
+                self.play_single_beep()
+                time.sleep(0.4)
         except Exception as e:
             print(f"⚠️  Error playing beep: {e}")
@@ -0,0 +1,168 @@
+"""
+Alarm Store Module
+Durable storage for alarms as an append-only journal
+Each change is one JSON line, so adding or removing an alarm costs a single
+small write and a crash can at worst lose the line being written
+"""
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+
+
+class AlarmStore:
+    def __init__(self, journal_file="alarms.jsonl", legacy_file="alarms.json",
+                 compact_ratio=2.0, min_compact_records=64, fsync=True):
+        """
+        Initialize the alarm journal
+
+        Args:
+            journal_file: JSON-lines journal holding alarm changes
+            legacy_file: Old whole-list alarms.json, imported once if no journal exists
+            compact_ratio: Rewrite the journal when it holds this many records per live alarm
+            min_compact_records: Never compact journals shorter than this
+            fsync: Flush every change to disk before returning
+        """
+        self.journal_file = Path(journal_file)
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._alarms = {}   # id -> alarm, in insertion order
+        self._records = 0   # lines currently in the journal
+        self._journal = None
+
+    @staticmethod
+    def new_id():
+        """Generate a short unique alarm id"""
+        return uuid.uuid4().hex[:8]
+
+    def load(self):
+        """
+        Replay the journal into memory
+
+        Returns:
+            list: Stored alarms in the order they were added
+        """
+        with self._lock:
+            self._alarms = {}
+            self._records = 0
+
+            if not self.journal_file.exists():
+                self._import_legacy()
+            else:
+                self._replay()
+
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            return list(self._alarms.values())
+
+    def add(self, alarm):
+        """Store a new alarm (or replace one with the same id)"""
+        with self._lock:
+            self._alarms[alarm['id']] = alarm
+            self._append({'op': 'put', 'alarm': alarm})
+
+    def remove(self, alarm_id):
+        """Remove one alarm by id"""
+        with self._lock:
+            if self._alarms.pop(alarm_id, None) is not None:
+                self._append({'op': 'del', 'id': alarm_id})
+
+    def clear(self):
+        """Remove every alarm"""
+        with self._lock:
+            self._alarms = {}
+            self._append({'op': 'clear'})
+
+    def compact(self):
+        """Rewrite the journal as one record per live alarm (atomic)"""
+        with self._lock:
+            self._compact()
+
+    def close(self):
+        """Close the journal file"""
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def _append(self, record):
+        """Write one journal line (caller holds _lock)"""
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(record) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._records += 1
+
+        if self._records >= max(self.min_compact_records, self.compact_ratio * len(self._alarms)):
+            self._compact()
+
+    def _compact(self):
+        """Snapshot live alarms to a temp file and swap it in (caller holds _lock)"""
+        temp_file = self.journal_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            for alarm in self._alarms.values():
+                f.write(json.dumps({'op': 'put', 'alarm': alarm}) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        if self._journal:
+            self._journal.close()
+        os.replace(temp_file, self.journal_file)
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._records = len(self._alarms)
+
+    def _replay(self):
+        """Apply every journal record in order (caller holds _lock)"""
+        good_length = 0
+        with open(self.journal_file, 'rb') as f:
+            for raw_line in f:
+                try:
+                    record = json.loads(raw_line)
+                except ValueError:
+                    if not raw_line.endswith(b"\n"):
+                        break  # torn final write from a crash - drop it below
+                    print("⚠️  Skipping corrupt alarm journal record")
+                    good_length += len(raw_line)
+                    continue
+
+                good_length += len(raw_line)
+                self._records += 1
+                op = record.get('op')
+                if op == 'put':
+                    self._alarms[record['alarm']['id']] = record['alarm']
+                elif op == 'del':
+                    self._alarms.pop(record['id'], None)
+                elif op == 'clear':
+                    self._alarms = {}
+
+        # Cut off a partially written last line so new records start cleanly
+        if good_length < self.journal_file.stat().st_size:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(good_length)
+
+    def _import_legacy(self):
+        """Import alarms.json from before the journal existed (caller holds _lock)"""
+        if not self.legacy_file or not self.legacy_file.exists():
+            return
+        try:
+            with open(self.legacy_file, 'r') as f:
+                alarms = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Error reading {self.legacy_file}: {e}")
+            return
+
+        for alarm in alarms:
+            if alarm.get('active', True):
+                alarm.setdefault('id', self.new_id())
+                self._alarms[alarm['id']] = alarm
+        self._compact()
+        if alarms:
+            print(f"📦 Imported {len(self._alarms)} alarms from {self.legacy_file}")
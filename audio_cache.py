@@ -0,0 +1,256 @@
+"""
+Audio Cache Module
+Keeps the audio of recently played (or pinned) songs on disk
+Songs in the cache start instantly and play without a network connection.
+Downloads run with yt-dlp on a background worker; the least recently played
+unpinned songs are deleted once the cache grows past its size limit.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yt_dlp
+
+
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+
+
+class AudioCache:
+    def __init__(self, cache_dir="audio_cache", max_bytes=500 * 1024 * 1024):
+        """
+        Initialize the audio cache
+
+        Args:
+            cache_dir: Directory for the audio files and their index
+            max_bytes: Most disk space the unpinned songs may use together
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # video id -> {'file', 'title', 'size', 'pinned', 'cached_at'}; oldest play first
+        self._pending = {}             # video id -> pin, for songs being downloaded
+        self._stats = {'hits': 0, 'misses': 0, 'downloads': 0, 'download_failures': 0, 'evictions': 0}
+
+        self._ydl = yt_dlp.YoutubeDL({
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'format': 'bestaudio/best',
+            'outtmpl': str(self.cache_dir / '%(id)s.%(ext)s'),
+            'socket_timeout': 10,
+            'retries': 2,
+        })
+        self._downloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-cache")
+
+        self.load()
+
+    def lookup(self, video_id):
+        """
+        Local file for a video, if it's cached (counts as a play for the LRU)
+
+        Returns:
+            str or None: Path of the audio file
+        """
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is not None and not (self.cache_dir / entry['file']).exists():
+                del self._entries[video_id]  # deleted behind our back
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(video_id)
+            self._stats['hits'] += 1
+            path = str(self.cache_dir / entry['file'])
+        self.save()
+        return path
+
+    def contains(self, video_id):
+        """Whether a video is cached (doesn't count as a play)"""
+        with self._lock:
+            return video_id in self._entries
+
+    def request(self, video_id, title, pin=False):
+        """
+        Make sure a video ends up in the cache, downloading it in the background
+
+        Args:
+            video_id: YouTube video id
+            title: Song title (for listings)
+            pin: Keep it regardless of the size limit
+
+        Returns:
+            bool: True if a download was started
+        """
+        newly_pinned = start = False
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is not None:
+                newly_pinned = pin and not entry['pinned']
+                entry['pinned'] = entry['pinned'] or pin
+            elif video_id in self._pending:
+                self._pending[video_id] = self._pending[video_id] or pin  # pinned once it lands
+            else:
+                self._pending[video_id] = pin
+                start = True
+        if newly_pinned:
+            self.save()
+        if start:
+            self._downloader.submit(self._download, video_id, title)
+        return start
+
+    def pin(self, video_id, title):
+        """
+        Keep a song on disk for good (downloads it if needed)
+
+        Returns:
+            bool: True if a download was started
+        """
+        return self.request(video_id, title, pin=True)
+
+    def unpin(self, video_id):
+        """
+        Let a pinned song be evicted like any other
+
+        Returns:
+            bool: True if the song was pinned
+        """
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None or not entry['pinned']:
+                return False
+            entry['pinned'] = False
+            removed = self._evict()
+        self._delete_files(removed)
+        self.save()
+        return True
+
+    def entries(self):
+        """Cached songs, most recently played first"""
+        with self._lock:
+            return [dict(entry, id=video_id) for video_id, entry in reversed(self._entries.items())]
+
+    def stats(self):
+        """Hit/miss counters and disk usage, e.g. for /api/music/cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['songs'] = len(self._entries)
+            stats['pinned'] = sum(1 for e in self._entries.values() if e['pinned'])
+            stats['bytes'] = sum(e['size'] for e in self._entries.values())
+            stats['max_bytes'] = self.max_bytes
+            stats['downloading'] = len(self._pending)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+    def clear(self, keep_pinned=True):
+        """Delete cached songs (pinned ones too unless keep_pinned)"""
+        with self._lock:
+            removed = [(video_id, entry) for video_id, entry in self._entries.items()
+                       if not (keep_pinned and entry['pinned'])]
+            for video_id, _ in removed:
+                del self._entries[video_id]
+        self._delete_files(removed)
+        self.save()
+
+    def _download(self, video_id, title):
+        """Worker: fetch one song's audio, add it to the index, evict to fit"""
+        try:
+            print(f"💾 Caching audio: {title}")
+            info = self._ydl.extract_info(WATCH_URL.format(video_id), download=True)
+            downloads = (info or {}).get('requested_downloads') or []
+            path = Path(downloads[0]['filepath']) if downloads else Path(self._ydl.prepare_filename(info))
+            if not path.exists():
+                raise FileNotFoundError(path)
+            size = path.stat().st_size
+
+            with self._lock:
+                self._entries[video_id] = {
+                    'file': path.name,
+                    'title': title,
+                    'size': size,
+                    'pinned': self._pending.get(video_id, False),
+                    'cached_at': time.time(),
+                }
+                self._entries.move_to_end(video_id)
+                self._stats['downloads'] += 1
+                removed = self._evict()
+            self._delete_files(removed)
+            self.save()
+            print(f"✓ Cached audio: {title} ({size / 1e6:.1f} MB)")
+        except Exception as e:
+            with self._lock:
+                self._stats['download_failures'] += 1
+            print(f"⚠️  Couldn't cache audio for {title}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(video_id, None)
+
+    def _evict(self):
+        """
+        Drop least recently played unpinned songs until the rest fit (caller holds _lock)
+
+        Returns:
+            list: (video id, entry) pairs whose files should be deleted
+        """
+        removed = []
+        used = sum(e['size'] for e in self._entries.values() if not e['pinned'])
+        for video_id in list(self._entries):
+            if used <= self.max_bytes:
+                break
+            entry = self._entries[video_id]
+            if entry['pinned']:
+                continue
+            del self._entries[video_id]
+            used -= entry['size']
+            removed.append((video_id, entry))
+            self._stats['evictions'] += 1
+        return removed
+
+    def _delete_files(self, removed):
+        """Delete the files of removed entries (outside the lock)"""
+        for video_id, entry in removed:
+            try:
+                (self.cache_dir / entry['file']).unlink(missing_ok=True)
+            except OSError as e:
+                print(f"⚠️  Couldn't delete cached audio {entry['file']}: {e}")
+
+    def load(self):
+        """Load the index, dropping songs whose files are gone"""
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Error loading audio cache index: {e}")
+            return
+
+        with self._lock:
+            self._entries = OrderedDict(
+                (video_id, entry) for video_id, entry in data.get('songs', [])
+                if (self.cache_dir / entry.get('file', '')).is_file()
+            )
+            removed = self._evict()  # the limit may have shrunk since last time
+        self._delete_files(removed)
+        print(f"📂 Audio cache: {len(self._entries)} songs on disk")
+
+    def save(self):
+        """Write the index to disk (atomic)"""
+        with self._lock:
+            # A list keeps the LRU order through the round trip
+            data = {'songs': list(self._entries.items())}
+            try:
+                temp_file = self.index_file.with_suffix('.tmp')
+                with open(temp_file, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_file, self.index_file)
+            except Exception as e:
+                print(f"⚠️  Error saving audio cache index: {e}")
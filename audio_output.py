@@ -0,0 +1,250 @@
+"""
+Audio Output Module
+One place that owns the sound device and decides who is heard
+Speech, alarms and music play on named channels, each with its own gain.
+While a channel (or the microphone) is active, every lower-priority channel
+is ducked: speech > alarm > listening > music. Speech outranks the alarm so
+an alarm's spoken announcement is heard over its own ringtone.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import pygame
+
+
+SPEECH = "speech"
+ALARM = "alarm"
+MUSIC = "music"
+LISTENING = "listening"  # not a channel - the microphone is capturing a command
+
+CHANNELS = (SPEECH, ALARM, MUSIC)
+
+# Higher number wins; anything lower is ducked while it is active
+PRIORITY = {SPEECH: 3, ALARM: 2, LISTENING: 1, MUSIC: 0}
+
+
+class AudioOutput:
+    def __init__(self, sample_rate=44100, buffer_size=512, duck_gain=0.2, gains=None):
+        """
+        Open the mixer and set up the channels
+
+        Args:
+            sample_rate: Mixer rate in Hz
+            buffer_size: Mixer buffer in samples (latency of stop and volume changes)
+            duck_gain: Gain multiplier for ducked channels
+            gains: Optional {channel: gain} to start with (default 1.0 each)
+        """
+        self.duck_gain = duck_gain
+        self._gains = {name: 1.0 for name in CHANNELS}
+        self._gains.update(gains or {})
+
+        self._lock = threading.RLock()
+        self._active = {}        # channel/LISTENING -> number of holders
+        self._music_sinks = []   # external players with set_gain(gain)
+        self._alarm_channel = None
+
+        # Music players (mpv over IPC) can be slow to answer, so their gain
+        # changes go out on a thread of their own, latest value first
+        self._sink_gain = None
+        self._sink_ready = threading.Condition()
+        self._sink_thread = None
+        self.available = False
+
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(frequency=sample_rate, size=-16, channels=2, buffer=buffer_size)
+
+            # Channel 0 belongs to alarms so nothing else can take it
+            pygame.mixer.set_reserved(1)
+            self._alarm_channel = pygame.mixer.Channel(0)
+            self.available = True
+            print("✓ Audio output initialized (speech, alarm, music channels)")
+        except Exception as e:
+            print(f"⚠️  Audio output unavailable: {e}")
+
+    @property
+    def mixer_format(self):
+        """(sample rate, sample size, channels) of the open mixer, or None"""
+        return pygame.mixer.get_init() if self.available else None
+
+    def set_gain(self, channel, gain):
+        """Set a channel's base gain (0.0 to 1.0)"""
+        with self._lock:
+            self._gains[channel] = max(0.0, min(1.0, gain))
+        self._apply_gains()
+
+    def get_gain(self, channel):
+        """Base gain of a channel"""
+        return self._gains[channel]
+
+    def effective_gain(self, channel):
+        """Gain a channel plays at right now, after ducking"""
+        with self._lock:
+            ducked = any(PRIORITY[name] > PRIORITY[channel] for name in self._active)
+            return self._gains[channel] * (self.duck_gain if ducked else 1.0)
+
+    def is_active(self, channel):
+        """Whether something is playing on a channel (or the mic is listening)"""
+        with self._lock:
+            return channel in self._active
+
+    @contextmanager
+    def activity(self, channel):
+        """Mark a channel active for the duration of a block (ducks lower channels)"""
+        with self._lock:
+            self._active[channel] = self._active.get(channel, 0) + 1
+        self._apply_gains()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[channel] -= 1
+                if not self._active[channel]:
+                    del self._active[channel]
+            self._apply_gains()
+
+    def listening(self):
+        """Duck music while the microphone captures a command"""
+        return self.activity(LISTENING)
+
+    # Speech ---------------------------------------------------------------
+
+    def play_speech(self, path, stop_event=None):
+        """
+        Play a speech file and wait for it to finish
+
+        Args:
+            path: Audio file (mp3/wav/ogg) to play
+            stop_event: Optional threading.Event that cuts playback short
+        """
+        if not self.available:
+            raise RuntimeError("audio output is unavailable")
+
+        with self.activity(SPEECH):
+            with self._lock:
+                pygame.mixer.music.load(path)
+                pygame.mixer.music.set_volume(self.effective_gain(SPEECH))
+                pygame.mixer.music.play()
+
+            stop_event = stop_event or threading.Event()
+            while pygame.mixer.music.get_busy():
+                if stop_event.wait(0.05):
+                    pygame.mixer.music.stop()
+                    break
+
+            # Release the file so it can be deleted
+            with self._lock:
+                pygame.mixer.music.unload()
+
+    def stop_speech(self):
+        """Cut off speech that is playing"""
+        if self.available:
+            pygame.mixer.music.stop()
+
+    # Alarm ----------------------------------------------------------------
+
+    def play_alarm(self, sound, duration, stop_event):
+        """
+        Loop a sound on the alarm channel, blocking until done
+
+        Args:
+            sound: pygame Sound to loop
+            duration: Seconds to ring for
+            stop_event: threading.Event that stops ringing early
+        """
+        if not self.available:
+            raise RuntimeError("audio output is unavailable")
+
+        with self.activity(ALARM):
+            with self._lock:
+                self._alarm_channel.set_volume(self.effective_gain(ALARM))
+                # The mixer cuts the loop off at maxtime by itself
+                self._alarm_channel.play(sound, loops=-1, maxtime=int(duration * 1000))
+            stop_event.wait(duration)
+            self._alarm_channel.stop()
+
+    def play_chime(self, sound):
+        """Play a short sound once on the alarm channel and wait for it"""
+        with self.activity(ALARM):
+            self._alarm_channel.set_volume(self.effective_gain(ALARM))
+            self._alarm_channel.play(sound)
+            while self._alarm_channel.get_busy():
+                time.sleep(0.02)
+
+    def stop_alarm(self):
+        """Silence the alarm channel (within one mixer buffer)"""
+        if self._alarm_channel is not None:
+            self._alarm_channel.stop()
+
+    # Music ----------------------------------------------------------------
+
+    def attach_music(self, sink):
+        """
+        Route an external music player through the music channel
+
+        Args:
+            sink: Object with set_gain(gain); called whenever the music gain changes
+        """
+        with self._lock:
+            if sink not in self._music_sinks:
+                self._music_sinks.append(sink)
+            if self._sink_thread is None:
+                self._sink_thread = threading.Thread(target=self._deliver_music_gains, daemon=True,
+                                                     name="music-gain")
+                self._sink_thread.start()
+        self._apply_gains()
+
+    def detach_music(self, sink):
+        """Stop sending gain changes to a music player"""
+        with self._lock:
+            if sink in self._music_sinks:
+                self._music_sinks.remove(sink)
+
+    def _apply_gains(self):
+        """
+        Push current effective gains to every channel
+
+        The mixer is set under the lock; music players only get the new gain
+        handed to their delivery thread, so a slow player never holds up
+        speech or an alarm.
+        """
+        with self._lock:
+            if self.available:
+                pygame.mixer.music.set_volume(self.effective_gain(SPEECH))
+                self._alarm_channel.set_volume(self.effective_gain(ALARM))
+            music_gain = self.effective_gain(MUSIC)
+            has_sinks = bool(self._music_sinks)
+
+        if has_sinks:
+            with self._sink_ready:
+                self._sink_gain = music_gain
+                self._sink_ready.notify()
+
+    def _deliver_music_gains(self):
+        """Background thread: send the latest music gain to the attached players"""
+        while True:
+            with self._sink_ready:
+                while self._sink_gain is None:
+                    self._sink_ready.wait()
+                gain, self._sink_gain = self._sink_gain, None
+            with self._lock:
+                sinks = list(self._music_sinks)
+            for sink in sinks:
+                try:
+                    sink.set_gain(gain)
+                except Exception as e:
+                    print(f"⚠️  Music volume change failed: {e}")
+
+
+_shared_output = None
+_shared_lock = threading.Lock()
+
+
+def get_audio_output():
+    """The process-wide AudioOutput, created on first use"""
+    global _shared_output
+    with _shared_lock:
+        if _shared_output is None:
+            _shared_output = AudioOutput()
+        return _shared_output
@@ -0,0 +1,240 @@
+"""
+Audio Replay Module
+Feeds recorded WAV files into the voice pipeline instead of a live microphone
+Used by voice_benchmark.py to measure latency without speaking into a mic
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import speech_recognition as sr
+
+
+class ReplayTimeline:
+    def __init__(self, paths, speed=1.0, gap=1.5, sample_rate=16000, chunk_size=1024, memory=60.0):
+        """
+        Concatenate WAV files into one timeline that plays like a live room
+
+        Every microphone opened on the timeline hears the same audio at the same
+        moment, exactly like two sr.Microphone instances on one device.
+
+        Args:
+            paths: WAV files (or a directory of them) in playback order
+            speed: Playback speed multiplier (2.0 = twice real-time)
+            gap: Seconds of silence before and between files
+            sample_rate: Rate all files are converted to
+            chunk_size: Frames returned per read (same as sr.Microphone)
+            memory: Seconds of audio behind the newest read whose origin files_in() can still tell
+        """
+        if isinstance(paths, (str, Path)) and Path(paths).is_dir():
+            paths = sorted(Path(paths).glob("*.wav"))
+        self.paths = [Path(p) for p in paths]
+        if not self.paths:
+            raise ValueError("No WAV files to replay")
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+
+        self.speed = speed
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.chunk_size = chunk_size
+
+        # Build the PCM timeline and remember which bytes belong to which file
+        recognizer = sr.Recognizer()
+        silence = b"\x00" * (int(gap * sample_rate) * self.sample_width)
+        pcm = bytearray(silence)
+        self.segments = []  # (start_byte, end_byte, file_index)
+        for index, path in enumerate(self.paths):
+            with sr.AudioFile(str(path)) as source:
+                audio = recognizer.record(source)
+            data = audio.get_raw_data(convert_rate=sample_rate, convert_width=self.sample_width)
+            self.segments.append((len(pcm), len(pcm) + len(data), index))
+            pcm.extend(data)
+            pcm.extend(silence)
+        self.pcm = bytes(pcm)
+
+        self._clock_start = None
+        self._clock_lock = threading.Lock()
+        # chunk bytes -> (file index or None for silence, byte offset), oldest read first;
+        # chunks older than `memory` are dropped so a long replay doesn't keep them all
+        self._chunk_owner = OrderedDict()
+        self._owner_lock = threading.Lock()
+        self._memory_bytes = int(memory * sample_rate) * self.sample_width
+
+    @property
+    def duration(self):
+        """Length of the timeline in seconds of audio"""
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+    def microphone(self):
+        """Create a new microphone that listens to this timeline"""
+        return ReplayMicrophone(self)
+
+    def start_clock(self):
+        """Start playback (first microphone opened starts it automatically)"""
+        with self._clock_lock:
+            if self._clock_start is None:
+                self._clock_start = time.monotonic()
+
+    def position(self):
+        """Byte offset currently 'being spoken' in the room"""
+        if self._clock_start is None:
+            return 0
+        elapsed = (time.monotonic() - self._clock_start) * self.speed
+        frames = int(elapsed * self.sample_rate)
+        return min(frames * self.sample_width, len(self.pcm))
+
+    def is_finished(self):
+        """Check if the whole timeline has been played"""
+        return self.position() >= len(self.pcm)
+
+    def wait_until(self, offset):
+        """Block until the room has reached a byte offset"""
+        if self._clock_start is None:
+            self.start_clock()
+        elapsed = (time.monotonic() - self._clock_start) * self.speed
+        frames_ahead = offset / self.sample_width - elapsed * self.sample_rate
+        if frames_ahead > 0:
+            time.sleep(frames_ahead / self.sample_rate / self.speed)
+
+    def file_at(self, start, end):
+        """Index of the file that makes up most of a byte range (None for silence)"""
+        best, best_overlap = None, 0
+        for seg_start, seg_end, index in self.segments:
+            overlap = min(end, seg_end) - max(start, seg_start)
+            if overlap > best_overlap:
+                best, best_overlap = index, overlap
+        return best
+
+    def remember_chunk(self, chunk, start):
+        """Record which file a chunk handed to a recognizer came from"""
+        owner = self.file_at(start, start + len(chunk))
+        with self._owner_lock:
+            self._chunk_owner[chunk] = (owner, start)
+            self._chunk_owner.move_to_end(chunk)
+            while True:
+                oldest = next(iter(self._chunk_owner.values()))
+                if oldest[1] >= start - self._memory_bytes:
+                    break
+                self._chunk_owner.popitem(last=False)
+
+    def files_in(self, frame_data):
+        """
+        Work out which file a recognizer's AudioData was captured from
+
+        Returns:
+            int or None: Index of the file most chunks belong to
+        """
+        chunk_bytes = self.chunk_size * self.sample_width
+        votes = {}
+        for i in range(0, len(frame_data), chunk_bytes):
+            with self._owner_lock:
+                index, _ = self._chunk_owner.get(frame_data[i:i + chunk_bytes], (None, None))
+            if index is not None:
+                votes[index] = votes.get(index, 0) + 1
+        if not votes:
+            return None
+        return max(votes, key=votes.get)
+
+
+class _ReplayStream:
+    """Minimal PyAudio-like stream reading from a ReplayTimeline"""
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.offset = timeline.position()
+
+    def read(self, size):
+        timeline = self.timeline
+        start = self.offset
+        end = start + size * timeline.sample_width
+
+        # Live semantics: audio can't be read before it has been "spoken"
+        timeline.wait_until(end)
+        self.offset = end
+        if start >= len(timeline.pcm):
+            # The recording is over but a room never stops: keep delivering silence
+            return b"\x00" * (end - start)
+
+        chunk = timeline.pcm[start:end]
+        timeline.remember_chunk(chunk, start)
+        return chunk
+
+    def close(self):
+        pass
+
+
+class ReplayMicrophone(sr.AudioSource):
+    def __init__(self, timeline):
+        """
+        Drop-in replacement for sr.Microphone backed by a ReplayTimeline
+
+        Args:
+            timeline: Shared ReplayTimeline
+        """
+        self.timeline = timeline
+        self.SAMPLE_RATE = timeline.sample_rate
+        self.SAMPLE_WIDTH = timeline.sample_width
+        self.CHUNK = timeline.chunk_size
+        self.stream = None
+
+    def __enter__(self):
+        self.timeline.start_clock()
+        self.stream = _ReplayStream(self.timeline)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+
+class StubRecognizer:
+    def __init__(self, timeline, transcripts=None, latency=0.0):
+        """
+        Local recognizer that answers with each WAV file's known transcript
+
+        Transcripts come from `transcripts` (one per file) or from a sidecar
+        .txt file next to each WAV (hello.wav -> hello.txt).
+
+        Args:
+            timeline: ReplayTimeline the audio is captured from
+            transcripts: Optional list of transcripts in file order
+            latency: Seconds to sleep per request, to simulate a network service
+        """
+        self.timeline = timeline
+        self.latency = latency
+        if transcripts is None:
+            transcripts = [_read_sidecar(path) for path in timeline.paths]
+        self.transcripts = list(transcripts)
+
+        self.calls = []  # (started, finished, thread name, file index, text)
+        self._lock = threading.Lock()
+
+    def recognize(self, audio):
+        """
+        Same contract as Recognizer.recognize_google
+
+        Raises:
+            sr.UnknownValueError: Audio isn't (mostly) from a transcribed file
+        """
+        started = time.time()
+        if self.latency:
+            time.sleep(self.latency)
+
+        index = self.timeline.files_in(audio.get_raw_data())
+        text = self.transcripts[index] if index is not None else None
+
+        with self._lock:
+            self.calls.append((started, time.time(), threading.current_thread().name, index, text))
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def _read_sidecar(path):
+    """Read the transcript stored next to a WAV file"""
+    transcript_file = Path(path).with_suffix(".txt")
+    if os.path.exists(transcript_file):
+        return transcript_file.read_text(encoding="utf-8").strip()
+    return None
@@ -0,0 +1,307 @@
+"""
+Components Module
+Lazy construction of the assistant's parts, and a startup time report
+- ComponentRegistry builds each component on first use, or at startup on a
+  thread pool, following the components' dependencies so independent
+  ones come up at the same time.
+- ImportTimer times every module import, like `python -X importtime`.
+"""
+import importlib.abc
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class ComponentRegistry:
+    def __init__(self, epoch=None):
+        """
+        Registry of named components, each built once by its factory
+
+        Args:
+            epoch: time.perf_counter() value the startup timeline counts from (default: now)
+        """
+        self._factories = {}   # name -> factory()
+        self._depends = {}     # name -> names it needs first
+        self._instances = {}   # name -> built component
+        self._warm = []        # names to build at startup rather than on first use
+        self._locks = {}       # name -> lock held while it's being built
+        self._lock = threading.Lock()
+        self.epoch = epoch if epoch is not None else time.perf_counter()
+        self.timeline = {}     # name -> {'start', 'end', 'thread'}, seconds since epoch
+
+    def register(self, name, factory, warm=True, depends_on=()):
+        """
+        Add a component
+
+        Args:
+            name: Component name (e.g. 'tts')
+            factory: Function that builds it; called once
+            warm: Build it at startup (see start) instead of waiting for first use
+            depends_on: Components the factory uses, so they're built before it
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._depends[name] = tuple(depends_on)
+            self._locks[name] = threading.Lock()
+            if warm:
+                self._warm.append(name)
+
+    def provide(self, name, instance):
+        """Use a ready-made component (e.g. a test double) instead of building one"""
+        with self._lock:
+            self._instances[name] = instance
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        The component, built now if it hasn't been yet
+
+        Threads asking for a component that's still being built wait for it.
+
+        Raises:
+            KeyError: If no such component is registered
+        """
+        if name in self._instances:
+            return self._instances[name]
+
+        with self._locks[name]:
+            if name in self._instances:
+                instance = self._instances[name]
+            else:
+                started = time.perf_counter() - self.epoch
+                instance = self._factories[name]()
+                self.timeline[name] = {
+                    'start': started,
+                    'end': time.perf_counter() - self.epoch,
+                    'thread': threading.current_thread().name,
+                }
+                self._instances[name] = instance
+        return instance
+
+    def loaded(self, name):
+        """Whether a component exists yet (without building it)"""
+        return name in self._instances
+
+    def start(self, names=None, workers=4):
+        """
+        Build components concurrently, each as soon as what it depends on is ready
+
+        Args:
+            names: Components to build (default: the warm ones); what they depend on comes too
+            workers: Most components built at once
+
+        Returns:
+            dict: name -> Future of the component (its exception if the factory failed)
+        """
+        # The requested components plus everything they depend on
+        selected = []
+        todo = list(names if names is not None else self._warm)
+        while todo:
+            name = todo.pop(0)
+            if name not in selected:
+                selected.append(name)
+                todo.extend(self._depends.get(name, ()))
+
+        futures = {name: Future() for name in selected}
+        waiting = {name: {d for d in self._depends.get(name, ()) if d in futures} for name in selected}
+        lock = threading.Lock()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="component")
+        remaining = [len(selected)]
+
+        def build(name):
+            failed = next((futures[d].exception() for d in self._depends.get(name, ())
+                           if d in futures and futures[d].exception()), None)
+            if failed is not None:
+                futures[name].set_exception(failed)
+            else:
+                try:
+                    futures[name].set_result(self.get(name))
+                except Exception as e:
+                    print(f"⚠️  Couldn't start {name}: {e}")
+                    futures[name].set_exception(e)
+
+            with lock:
+                ready = []
+                for other, deps in waiting.items():
+                    if name in deps:
+                        deps.discard(name)
+                        if not deps:
+                            ready.append(other)
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            for other in ready:
+                pool.submit(build, other)
+            if finished:
+                pool.shutdown(wait=False)
+
+        if not selected:
+            pool.shutdown(wait=False)
+        for name in [n for n in selected if not waiting[n]]:
+            pool.submit(build, name)
+        return futures
+
+    def critical_path(self):
+        """
+        The chain of components that decided when startup finished
+
+        Starts from the last component to finish and walks back through the
+        dependency that finished last, so speeding up anything else doesn't help.
+
+        Returns:
+            list: Component names, first built first
+        """
+        timeline = dict(self.timeline)
+        if not timeline:
+            return []
+        name = max(timeline, key=lambda n: timeline[n]['end'])
+        path = [name]
+        while True:
+            deps = [d for d in self._depends.get(name, ()) if d in timeline]
+            if not deps:
+                return path[::-1]
+            name = max(deps, key=lambda d: timeline[d]['end'])
+            path.append(name)
+
+
+class Component:
+    """Attribute that fetches a component from its owner's registry: tts = Component('tts')"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, owner, owner_type=None):
+        if owner is None:
+            return self
+        return owner.components.get(self.name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        """Times module imports: each module's own time and time including what it imported"""
+        self.records = []  # (module name, own seconds, cumulative seconds, depth)
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per thread: 'finding' flag and the stack of imports in progress
+
+    def install(self):
+        """Start timing imports (put this before the imports to be measured)"""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        """Stop timing imports"""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        """Find the module with the other finders, then wrap its loader in a timer"""
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    def _timed_exec(self, loader, module, name):
+        """Run one module's body, recording its own and cumulative time"""
+        stack = self._local.__dict__.setdefault('stack', [])  # child time per import in progress
+        depth = len(stack)
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.records.append((name, elapsed - children, elapsed, depth))
+
+    def report(self, limit=15, min_seconds=0.005):
+        """
+        The slowest top-level imports, -X importtime style
+
+        Args:
+            limit: Most lines to show
+            min_seconds: Leave out imports faster than this
+
+        Returns:
+            str: One line per import, slowest first
+        """
+        with self._lock:
+            top = [r for r in self.records if r[3] == 0 and r[2] >= min_seconds]
+        top.sort(key=lambda r: r[2], reverse=True)
+        lines = [f"{'self [ms]':>10} | {'cumulative':>10} | imported package"]
+        for name, own, cumulative, depth in top[:limit]:
+            lines.append(f"{own * 1000:>10.1f} | {cumulative * 1000:>10.1f} | {name}")
+        return "\n".join(lines)
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Loader wrapper that reports how long the module body took to run"""
+
+    def __init__(self, loader, name, timer):
+        self._loader = loader
+        self._name = name
+        self._timer = timer
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Keep the real loader visible to anything that inspects it
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._timer._timed_exec(self._loader, module, self._name)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+def startup_report(registry, import_timer=None, ready_after=None, width=40):
+    """
+    Printable summary of where startup time went
+
+    Args:
+        registry: ComponentRegistry whose startup timeline to draw
+        import_timer: Optional ImportTimer with module import times
+        ready_after: Seconds from launch until the app was ready (listening/serving)
+        width: Characters for the longest timeline bar
+    """
+    lines = ["⏱️  Startup report"]
+    if ready_after is not None:
+        lines.append(f"   Ready after {ready_after:.2f}s")
+
+    timeline = sorted(registry.timeline.items(), key=lambda item: item[1]['start'])
+    if timeline:
+        total = max(entry['end'] for _, entry in timeline) or 1.0
+        critical = set(registry.critical_path())
+        lines.append(f"   {'component':<20} {'start':>6} {'took':>6}  timeline (* = critical path)")
+        for name, entry in timeline:
+            offset = int(entry['start'] / total * width)
+            length = max(1, int((entry['end'] - entry['start']) / total * width))
+            marker = '*' if name in critical else ' '
+            lines.append(f"  {marker}{name:<20} {entry['start']:>5.2f}s {entry['end'] - entry['start']:>5.2f}s  "
+                         f"{' ' * offset}{'█' * length}")
+        lines.append(f"   Critical path: {' -> '.join(registry.critical_path())}")
+
+    if import_timer is not None:
+        lines.append("   Slowest imports:")
+        lines.extend("   " + line for line in import_timer.report().splitlines())
+    return "\n".join(lines)
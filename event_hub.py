@@ -0,0 +1,113 @@
+"""
+Event Hub Module
+Fans out server-side events (alarm rang, track changed, ...) to connected clients
+Each client gets its own bounded queue, so a slow or stalled browser only
+loses its own oldest events and never holds up the alarm checker or the
+music player that publish them.
+"""
+import itertools
+import queue
+import threading
+import time
+
+
+class Subscription:
+    def __init__(self, hub, maxsize):
+        """One client's queue of events (use EventHub.subscribe)"""
+        self.hub = hub
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        """Queue an event, dropping the oldest one if the client has fallen behind"""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """
+        Next event
+
+        Returns:
+            dict or None: The event, or None if nothing arrived within the timeout
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Every event waiting right now, oldest first"""
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        """Stop receiving events"""
+        self.hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventHub:
+    def __init__(self, queue_size=100):
+        """
+        Create an event hub
+
+        Args:
+            queue_size: Most undelivered events kept per client
+        """
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self):
+        """
+        Start receiving events
+
+        Returns:
+            Subscription: Use as a context manager, or close() it when done
+        """
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, **data):
+        """
+        Send an event to every subscriber (never blocks)
+
+        Args:
+            event_type: e.g. 'alarm', 'track'
+            **data: Event fields (JSON-serializable)
+        """
+        event = {'id': next(self._ids), 'event': event_type, 'time': time.time(), 'data': data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
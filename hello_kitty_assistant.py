@@ -3,21 +3,54 @@ Hello Kitty Voice Assistant
 Main application that ties all modules together
 """
 import os
+import sys
+import threading
 import time
+from concurrent.futures import wait
+
 from dotenv import load_dotenv
-from wake_word_detector import WakeWordDetector
-from speech_recognition_module import SpeechRecognizer
-from ai_brain import AIBrain
-from text_to_speech import TextToSpeech
-from youtube_player import YouTubePlayer
-from weather_time_module import WeatherTimeModule
-from alarm_module import AlarmModule
-from urdu_support import UrduSupport
+from components import Component, ComponentRegistry, ImportTimer, startup_report
+
+load_dotenv()
+
+# `--startup-report` (or STARTUP_REPORT=true) times every import from here on
+# and prints where startup time went, like `python -X importtime`
+STARTUP_REPORT = '--startup-report' in sys.argv or os.getenv("STARTUP_REPORT", "false").lower() == "true"
+import_timer = ImportTimer().install() if STARTUP_REPORT else None
+launched_at = time.perf_counter()
+
+import re
+import metrics
+import tracing
+from alarm_schedule import parse_schedule, parse_reminder_label
+from resilience import interaction_budget
+
+COMMANDS_ROUTED = metrics.counter('commands_routed_total', 'Messages by where they went (command, music, ai)',
+                                  ('source', 'route'))
 
 
 class HelloKittyAssistant:
-    def __init__(self):
-        """Initialize the Hello Kitty Assistant"""
+    # Each of these comes from self.components (waiting for it if it's still starting)
+    mic_calibration = Component('mic_calibration')
+    wake_detector = Component('wake_detector')
+    speech_recognizer = Component('speech_recognizer')
+    ai_brain = Component('ai_brain')
+    tts = Component('tts')
+    youtube_player = Component('youtube_player')
+    weather_time = Component('weather_time')
+    alarm_module = Component('alarm_module')
+    urdu_support = Component('urdu_support')
+
+    def __init__(self, overrides=None):
+        """
+        Initialize the Hello Kitty Assistant
+
+        Args:
+            overrides: Optional dict of ready-made components by attribute name
+                       (e.g. {'tts': ..., 'ai_brain': ...}), used by voice_benchmark.py
+        """
+        overrides = overrides or {}
+
         print("=" * 60)
         print("🎀 HELLO KITTY VOICE ASSISTANT 🎀")
         print("=" * 60)
@@ -30,53 +63,127 @@ class HelloKittyAssistant:
         self.wake_word = os.getenv("WAKE_WORD", "hello kitty")
         self.assistant_name = os.getenv("ASSISTANT_NAME", "Hello Kitty")
 
-        # Get API key based on provider
-        if self.ai_provider == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY not found in .env file")
-        elif self.ai_provider == "gemini":
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                raise ValueError("GEMINI_API_KEY not found in .env file")
-        else:
-            raise ValueError(f"Unknown AI provider: {self.ai_provider}")
+        # Get API key based on provider (not needed when a brain is supplied)
+        api_key = None
+        if 'ai_brain' not in overrides:
+            if self.ai_provider == "openai":
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise ValueError("OPENAI_API_KEY not found in .env file")
+            elif self.ai_provider == "gemini":
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY not found in .env file")
+            else:
+                raise ValueError(f"Unknown AI provider: {self.ai_provider}")
+
+        # Components are built concurrently in the background (see below);
+        # using one waits for it to be ready
+        print("\n🔧 Starting components...")
+        self.components = ComponentRegistry(epoch=launched_at)
+
+        # One ambient noise calibration shared by both recognizers (saved per device)
+        mic_index = os.getenv("MIC_DEVICE_INDEX")
+        mic_index = int(mic_index) if mic_index else None
+        calibration_max_age = float(os.getenv("MIC_CALIBRATION_MAX_AGE_HOURS", "6")) * 3600
+
+        def make_mic_calibration():
+            from mic_calibration import MicCalibration, device_key_for
+            return MicCalibration(device_key_for(mic_index), max_age=calibration_max_age)
 
-        # Initialize components
-        print("\n🔧 Initializing components...")
-        self.wake_detector = WakeWordDetector([self.wake_word])
-        self.speech_recognizer = SpeechRecognizer()
-        self.ai_brain = AIBrain(provider=self.ai_provider, api_key=api_key)
+        def make_wake_detector():
+            from wake_word_detector import WakeWordDetector
+            return WakeWordDetector([self.wake_word], calibration=self.mic_calibration, device_index=mic_index)
+
+        def make_speech_recognizer():
+            from speech_recognition_module import SpeechRecognizer
+            return SpeechRecognizer(calibration=self.mic_calibration, device_index=mic_index)
+
+        def make_ai_brain():
+            from ai_brain import AIBrain
+            return AIBrain(provider=self.ai_provider, api_key=api_key)
 
         # Text-to-speech settings
-        voice_rate = int(os.getenv("VOICE_RATE", "180"))
-        voice_volume = float(os.getenv("VOICE_VOLUME", "1.0"))
-        use_google = os.getenv("USE_GOOGLE_TTS", "true").lower() == "true"
-        self.tts = TextToSpeech(rate=voice_rate, volume=voice_volume, use_google_tts=use_google)
+        def make_tts():
+            from text_to_speech import TextToSpeech
+            voice_rate = int(os.getenv("VOICE_RATE", "180"))
+            voice_volume = float(os.getenv("VOICE_VOLUME", "1.0"))
+            use_google = os.getenv("USE_GOOGLE_TTS", "true").lower() == "true"
+            return TextToSpeech(rate=voice_rate, volume=voice_volume, use_google_tts=use_google)
 
         # YouTube music player
-        self.youtube_player = YouTubePlayer()
+        def make_youtube_player():
+            from youtube_player import YouTubePlayer
+            audio_cache = None
+            audio_cache_mb = float(os.getenv("AUDIO_CACHE_MB", "0"))
+            if audio_cache_mb > 0:
+                from audio_cache import AudioCache
+                audio_cache = AudioCache(os.getenv("AUDIO_CACHE_DIR", "audio_cache"),
+                                         max_bytes=int(audio_cache_mb * 1024 * 1024))
+            return YouTubePlayer(audio_cache=audio_cache)
 
         # Weather and Time module
-        city = os.getenv("CITY", "Karachi")
-        timezone = os.getenv("TIMEZONE", "Asia/Karachi")
-        self.weather_time = WeatherTimeModule(city=city, timezone=timezone)
+        def make_weather_time():
+            from weather_time_module import WeatherTimeModule
+            return WeatherTimeModule(
+                city=os.getenv("CITY", "Karachi"),
+                timezone=os.getenv("TIMEZONE", "Asia/Karachi"),
+                cache_ttl=float(os.getenv("WEATHER_CACHE_TTL_MINUTES", "10")) * 60,
+                max_concurrent_fetches=int(os.getenv("WEATHER_MAX_CONCURRENT_FETCHES", "4")),
+                base_url=os.getenv("WEATHER_BASE_URL", "http://wttr.in"),
+            )
 
         # Alarm module with callback
-        self.alarm_module = AlarmModule(alarm_callback=self.on_alarm_triggered)
+        def make_alarm_module():
+            from alarm_module import AlarmModule
+            missed_policy = os.getenv("ALARM_MISSED_POLICY", "grace").lower()
+            missed_grace = float(os.getenv("ALARM_MISSED_GRACE_MINUTES", "15")) * 60
+            return AlarmModule(alarm_callback=self.on_alarm_triggered,
+                               missed_policy=missed_policy, missed_grace=missed_grace)
 
         # Urdu language support
-        self.urdu_support = UrduSupport()
+        def make_urdu_support():
+            from urdu_support import UrduSupport
+            return UrduSupport()
+
+        # Everything marked warm starts building at once on a thread pool, each
+        # component as soon as what it depends on is ready. Music and Urdu
+        # support wait until a command needs them.
+        for name, factory, warm, depends_on in (
+                ('mic_calibration', make_mic_calibration, True, ()),
+                ('wake_detector', make_wake_detector, True, ('mic_calibration',)),
+                ('speech_recognizer', make_speech_recognizer, True, ('mic_calibration',)),
+                ('alarm_module', make_alarm_module, True, ()),
+                ('tts', make_tts, True, ()),
+                ('ai_brain', make_ai_brain, True, ()),
+                ('weather_time', make_weather_time, True, ()),
+                ('youtube_player', make_youtube_player, False, ()),
+                ('urdu_support', make_urdu_support, False, ())):
+            self.components.register(name, factory, warm=warm, depends_on=depends_on)
+        for name, instance in overrides.items():
+            self.components.provide(name, instance)
+        self._startup = self.components.start(workers=int(os.getenv("STARTUP_WORKERS", "6")))
 
         self.is_active = False
         self.running = True
 
-        print("\n✅ All components initialized successfully!")
+        # Longest a command may spend on external lookups (weather, YouTube) before answering
+        self.interaction_budget = float(os.getenv("INTERACTION_BUDGET_SECONDS", "8"))
+
+        # METRICS_FILE: where to keep writing the metrics (Prometheus text format),
+        # e.g. into the node exporter's textfile collector directory
+        self.metrics_file = os.getenv("METRICS_FILE")
+        self.metrics_interval = float(os.getenv("METRICS_INTERVAL_SECONDS", "15"))
+
+        print("\n✅ Components are starting up!")
 
     def on_alarm_triggered(self, label):
         """Called when an alarm goes off"""
         print(f"🔔 Alarm triggered: {label}")
-        self.tts.speak(f"Alarm! {label}")
+        if label.startswith("Reminder:"):
+            self.tts.speak(label)
+        else:
+            self.tts.speak(f"Alarm! {label}")
 
     def on_wake_word_detected(self):
         """Called when wake word is detected"""
@@ -84,40 +191,47 @@ class HelloKittyAssistant:
             return  # Already processing a request
 
         self.is_active = True
-
-        # Acknowledge wake word
-        self.tts.speak("Yes? How can I help you?")
-
-        # Listen for user's question - longer time for music commands
-        user_input = self.speech_recognizer.listen(timeout=10, phrase_time_limit=20)
-
-        if user_input:
-            # Check for Urdu and translate if needed
-            if self.urdu_support.detect_urdu(user_input):
-                print(f"🇵🇰 Urdu detected: '{user_input}'")
-                user_input = self.urdu_support.translate_to_english(user_input)
-            # Check for exit commands
-            if self._is_exit_command(user_input):
-                self.tts.speak("Goodbye! Have a wonderful day!")
-                self.running = False
-                self.is_active = False
-                return
-
-            # Check for special commands
-            if self._handle_special_commands(user_input):
-                self.is_active = False
-                return
-
-            # Get AI response
-            print("\n🤖 Thinking...")
-            response = self.ai_brain.get_response(user_input)
-
-            # Speak the response
-            self.tts.speak(response)
-        else:
-            self.tts.speak("I didn't catch that. Please say the wake word again.")
-
-        self.is_active = False
+        try:
+            # Acknowledge wake word
+            with tracing.span('acknowledge'):
+                self.tts.speak("Yes? How can I help you?")
+
+            # Listen for user's question - longer time for music commands
+            user_input = self.speech_recognizer.listen(timeout=10, phrase_time_limit=20)
+
+            if user_input:
+                # Check for Urdu and translate if needed
+                with tracing.span('urdu') as span:
+                    if self.urdu_support.detect_urdu(user_input):
+                        print(f"🇵🇰 Urdu detected: '{user_input}'")
+                        span['translated'] = True
+                        user_input = self.urdu_support.translate_to_english(user_input)
+                # Check for exit commands
+                if self._is_exit_command(user_input):
+                    self.tts.speak("Goodbye! Have a wonderful day!")
+                    self.running = False
+                    return
+
+                # Check for special commands (a handled command is answered inside this span)
+                with interaction_budget(self.interaction_budget), tracing.span('command') as span:
+                    handled = self._handle_special_commands(user_input)
+                    span['handled'] = handled
+                tracing.annotate(route='command' if handled else 'ai')
+                if handled:
+                    COMMANDS_ROUTED.inc(source='voice', route='command')
+                    return
+
+                # Get AI response
+                COMMANDS_ROUTED.inc(source='voice', route='ai')
+                print("\n🤖 Thinking...")
+                response = self.ai_brain.get_response(user_input)
+
+                # Speak the response
+                self.tts.speak(response)
+            else:
+                self.tts.speak("I didn't catch that. Please say the wake word again.")
+        finally:
+            self.is_active = False
 
     def _is_exit_command(self, text):
         """Check if user wants to exit"""
@@ -126,7 +240,7 @@ class HelloKittyAssistant:
         if "stop music" in text_lower or "stop the music" in text_lower:
             return False
         # Don't exit if music is playing and they say "stop" (they mean stop music)
-        if self.youtube_player.is_playing_music() and "stop" in text_lower:
+        if self._music_playing() and "stop" in text_lower:
             return False
         exit_phrases = ["goodbye", "bye", "exit", "quit", "shutdown"]
         return any(phrase in text_lower for phrase in exit_phrases)
@@ -135,6 +249,54 @@ class HelloKittyAssistant:
         """Handle special assistant commands"""
         text_lower = text.lower()
 
+        # Reminder commands ("yaad dilao" arrives here as "remind me")
+        if "remind me" in text_lower:
+            label = parse_reminder_label(text)
+            alarm_time, repeat = parse_schedule(text_lower)
+            if not label:
+                self.tts.speak("What should I remind you about?")
+            elif not alarm_time and not repeat:
+                self.tts.speak("When should I remind you? Say something like at 5 pm, or every 30 minutes.")
+            else:
+                self.tts.speak(self.alarm_module.add_reminder(label, alarm_time, repeat=repeat))
+            return True
+
+        # "cancel my 7 am alarm", "cancel all alarms"
+        if re.search(r'\b(?:cancel|delete|remove)\b.*\b(?:alarm|reminder)s?\b', text_lower):
+            message = self.alarm_module.cancel_described(text_lower)
+            self.tts.speak(message)
+            return True
+
+        # Play queue commands
+        if "skip" in text_lower or "next song" in text_lower:
+            success, message = self.youtube_player.skip()
+            self.tts.speak(message)
+            return True
+
+        if "queue" in text_lower:
+            if "clear" in text_lower or "empty" in text_lower:
+                success, message = self.youtube_player.clear_queue()
+                self.tts.speak(message)
+            elif "what" in text_lower or "show" in text_lower or "list" in text_lower:
+                self.tts.speak(self.youtube_player.describe_queue())
+            else:
+                # "add shape of you to the queue", "queue shape of you"
+                song_query = re.sub(r'\b(?:add|queue|to (?:the |my )?queue|play|the song|please)\b', '',
+                                    text, flags=re.IGNORECASE)
+                song_query = ' '.join(song_query.split())
+                if len(song_query) > 1:
+                    success, message = self.youtube_player.enqueue(song_query)
+                    self.tts.speak(message)
+                else:
+                    self.tts.speak("Which song should I add to the queue?")
+            return True
+
+        # Keep the current song on disk for offline listening
+        if "save this song" in text_lower or "keep this song" in text_lower:
+            success, message = self.youtube_player.pin()
+            self.tts.speak(message)
+            return True
+
         # Music commands - improved parsing
         if "play" in text_lower:
             # Better song extraction - preserve original case for song names
@@ -173,9 +335,13 @@ class HelloKittyAssistant:
 
         # Check for stop/pause music commands
         # If music is playing, just "stop" is enough (easier to hear over music)
-        if self.youtube_player.is_playing_music():
+        if self._music_playing():
             print(f"🎵 Music is currently playing. Checking for stop command in: '{text}'")
-            if "stop" in text_lower or "pause" in text_lower:
+            if "pause" in text_lower:
+                success, message = self.youtube_player.pause()
+                self.tts.speak("Music paused. Say resume music to continue." if success else message)
+                return True
+            if "stop" in text_lower:
                 print("✅ Stop command detected! Stopping music...")
                 success, message = self.youtube_player.stop()
                 if success:
@@ -186,6 +352,12 @@ class HelloKittyAssistant:
             else:
                 print(f"   No stop command found in '{text}'")
 
+        if "resume" in text_lower or "continue music" in text_lower or "unpause" in text_lower:
+            success, message = self.youtube_player.resume()
+            if not success:
+                self.tts.speak(message)
+            return True
+
         # If no music playing, require full phrase
         if "stop music" in text_lower or "stop the music" in text_lower or "pause music" in text_lower:
             success, message = self.youtube_player.stop()
@@ -221,33 +393,27 @@ class HelloKittyAssistant:
 
         # Alarm commands
         if "set alarm" in text_lower or "alarm lagao" in text_lower or ("set" in text_lower and "alarm" in text_lower):
-            # Extract time from command (simple parsing)
-            import re
-            time_pattern = r'(\d{1,2}):(\d{2})|(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)'
-            time_match = re.search(time_pattern, text_lower)
-
-            if time_match:
-                if time_match.group(1):  # HH:MM format
-                    alarm_time = f"{time_match.group(1)}:{time_match.group(2)}"
-                else:  # Hour with AM/PM
-                    hour = time_match.group(3)
-                    period = time_match.group(4)
-                    alarm_time = f"{hour}:00"
-                    if 'pm' in period or 'p.m' in period:
-                        alarm_time = f"{int(hour) + 12}:00"
-
-                message = self.alarm_module.add_alarm(alarm_time, "Alarm")
+            # Extract time and repetition ("every weekday at 7 am")
+            alarm_time, repeat = parse_schedule(text_lower)
+
+            if alarm_time or repeat:
+                message = self.alarm_module.add_alarm(alarm_time, "Alarm", repeat=repeat)
                 self.tts.speak(message)
             else:
                 self.tts.speak("What time should I set the alarm for?")
             return True
 
-        if "cancel alarm" in text_lower or "delete alarm" in text_lower:
-            message = self.alarm_module.cancel_all_alarms()
-            self.tts.speak(message)
+        if "snooze" in text_lower:
+            match = re.search(r'(\d+)\s*min', text_lower)
+            minutes = int(match.group(1)) if match else 9
+            if self.alarm_module.snooze_alarm(minutes=minutes):
+                self.tts.speak(f"Okay, I'll ring again in {minutes} minutes")
+            else:
+                self.tts.speak("There's no alarm to snooze")
             return True
 
-        if ("show" in text_lower or "list" in text_lower or "my" in text_lower) and "alarm" in text_lower:
+        if ("show" in text_lower or "list" in text_lower or "my" in text_lower) and \
+                ("alarm" in text_lower or "reminder" in text_lower):
             message = self.alarm_module.get_alarms()
             self.tts.speak(message)
             return True
@@ -276,9 +442,13 @@ class HelloKittyAssistant:
 
         return False
 
+    def _music_playing(self):
+        """Whether music is playing (without starting the player just to ask)"""
+        return self.components.loaded('youtube_player') and self.youtube_player.is_playing_music()
+
     def emergency_stop_music(self):
         """Emergency stop music without wake word (called from wake word detector)"""
-        if self.youtube_player.is_playing_music():
+        if self._music_playing():
             print("🚨 Emergency music stop triggered!")
             success, message = self.youtube_player.stop()
             return success
@@ -295,8 +465,17 @@ class HelloKittyAssistant:
             print("=" * 60 + "\n")
 
             # Start wake word detection with emergency stop callback
+            # (waits for the detector; other components keep starting meanwhile)
             self.wake_detector.start(self.on_wake_word_detected, self.emergency_stop_music)
 
+            if STARTUP_REPORT:
+                ready_after = time.perf_counter() - launched_at
+                threading.Thread(target=self._print_startup_report, args=(ready_after,),
+                                 daemon=True).start()
+
+            if self.metrics_file:
+                threading.Thread(target=self._write_metrics_periodically, daemon=True).start()
+
             # Keep the main thread alive
             while self.running:
                 time.sleep(0.1)
@@ -306,10 +485,40 @@ class HelloKittyAssistant:
         finally:
             self.shutdown()
 
+    def _print_startup_report(self, ready_after):
+        """Print the startup report once the background components are up"""
+        wait(self._startup.values())
+        print("\n" + startup_report(self.components, import_timer, ready_after=ready_after) + "\n")
+
+    def _write_metrics_periodically(self):
+        """Keep METRICS_FILE up to date while the assistant runs"""
+        while self.running:
+            self.dump_metrics()
+            time.sleep(self.metrics_interval)
+
+    def dump_metrics(self, path=None):
+        """
+        Write the metrics (Prometheus text format) to a file
+
+        Args:
+            path: File to write (default: METRICS_FILE)
+        """
+        path = path or self.metrics_file
+        if not path:
+            return
+        try:
+            metrics.REGISTRY.write(path)
+        except OSError as e:
+            print(f"⚠️  Couldn't write metrics to {path}: {e}")
+
     def shutdown(self):
         """Clean shutdown"""
         print("\n🔴 Shutting down Hello Kitty Assistant...")
-        self.wake_detector.stop()
+        if self.components.loaded('wake_detector'):
+            self.wake_detector.stop()
+        if self.components.loaded('youtube_player'):
+            self.youtube_player.shutdown()
+        self.dump_metrics()
         print("👋 Goodbye!")
 
 
@@ -0,0 +1,289 @@
+"""
+Metrics Module
+In-process counters, gauges and histograms, rendered in the Prometheus text format
+Modules declare their metrics once at import time (the same name always
+gets the same metric back) and update them as they work; the web app serves
+them at /metrics and the voice assistant can write them to a file.
+Everything is kept in memory and updating a metric only takes a lock, so
+instrumenting a hot path costs next to nothing.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds: from a cache hit (a few ms) up to a slow YouTube lookup or a long reply
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        """
+        Args:
+            name: Metric name (e.g. 'ai_request_seconds')
+            help: One line describing it
+            labels: Label names every update must give values for
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}  # label values (in self.labels order) -> value
+
+    def _key(self, labels):
+        """Label values in declaration order"""
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _series(self):
+        """(suffix, label pairs, value) for every sample, for render()"""
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labels:
+            items = [((), self._empty())]
+        for key, value in items:
+            yield '', list(zip(self.labels, key)), value
+
+    def _empty(self):
+        return 0.0
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Add to the count (never negative)"""
+        if amount < 0:
+            raise ValueError("Counters can only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._functions = {}  # label values -> function read at render time
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function, **labels):
+        """Read the value from function() whenever the metrics are rendered (e.g. a queue length)"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+            self._values[key] = 0.0
+
+    def value(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            function = self._functions.get(key)
+            value = self._values.get(key, 0.0)
+        return float(function()) if function else value
+
+    def _series(self):
+        with self._lock:
+            functions = dict(self._functions)
+        for suffix, pairs, value in super()._series():
+            function = functions.get(tuple(v for _, v in pairs))
+            if function:
+                try:
+                    value = float(function())
+                except Exception:
+                    value = math.nan
+            yield suffix, pairs, value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Upper bounds of the buckets, in increasing order (+Inf is added)
+        """
+        if 'le' in labels:
+            raise ValueError("'le' is reserved for histogram buckets")
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value, **labels):
+        """Record one measurement (e.g. a duration in seconds)"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._empty()
+            counts, _, _ = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block takes: `with AI_SECONDS.time(provider='openai'):`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _empty(self):
+        return [[0] * len(self.buckets), 0.0, 0]  # per-bucket counts, sum, count
+
+    def _series(self):
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        if not items and not self.labels:
+            items = [((), self._empty())]
+        for key, (counts, total, count) in items:
+            pairs = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '_bucket', pairs + [('le', _format(bound))], cumulative
+            yield '_bucket', pairs + [('le', '+Inf')], count
+            yield '_sum', pairs, total
+            yield '_count', pairs, count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """A set of metrics rendered together"""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labels=()):
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def _get_or_create(self, cls, name, help, labels, **kwargs):
+        """
+        The metric with this name, created on first use
+
+        Raises:
+            ValueError: If the name is taken by a different kind of metric or label set
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+            elif type(metric) is not cls or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} already exists as a {metric.kind} with labels {metric.labels}")
+            return metric
+
+    def get(self, name):
+        """The metric with this name, or None"""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self):
+        """
+        Every metric in the Prometheus text exposition format (version 0.0.4)
+
+        Returns:
+            str: The text to serve at /metrics
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, pairs, value in metric._series():
+                if pairs:
+                    label_text = ','.join(f'{k}="{_escape_label(v)}"' for k, v in pairs)
+                    lines.append(f"{metric.name}{suffix}{{{label_text}}} {_format(value)}")
+                else:
+                    lines.append(f"{metric.name}{suffix} {_format(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Write the rendered metrics to a file (atomically)
+
+        Suits Prometheus' node exporter textfile collector: point it at a
+        directory and write e.g. hello_kitty.prom into it.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def _format(value):
+    """A sample value as Prometheus writes it"""
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# The process-wide registry every module reports to
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, help, labels=()):
+    """Counter in the process-wide registry (the same one every time for a name)"""
+    return REGISTRY.counter(name, help, labels)
+
+
+def gauge(name, help, labels=()):
+    """Gauge in the process-wide registry"""
+    return REGISTRY.gauge(name, help, labels)
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS):
+    """Histogram in the process-wide registry"""
+    return REGISTRY.histogram(name, help, labels, buckets=buckets)
+
+
+def render():
+    """The process-wide metrics in the Prometheus text format"""
+    return REGISTRY.render()
@@ -0,0 +1,200 @@
+"""
+Microphone Calibration Module
+Measures ambient noise once and shares the result between recognizers
+Results are saved per device so restarts can skip calibration
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+# numpy sample types for the PCM widths PyAudio can hand us
+_SAMPLE_TYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+class MicCalibration:
+    def __init__(self, device_key="default", cache_file="mic_calibration.json",
+                 max_age=6 * 3600, save_interval=60):
+        """
+        Initialize shared calibration for one input device
+
+        Args:
+            device_key: Name identifying the microphone (results are stored per device)
+            cache_file: JSON file holding calibrations for all devices (None = don't persist)
+            max_age: Seconds a measurement stays fresh before it is re-measured
+            save_interval: Minimum seconds between saves of drifted thresholds
+        """
+        self.device_key = device_key
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.max_age = max_age
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+        # Measured values (None until calibrated or loaded)
+        self.energy_threshold = None
+        self.noise_mean = None
+        self.noise_std = None
+        self.noise_peak = None
+        self.measured_at = 0.0
+
+        self.load()
+
+    def is_fresh(self):
+        """Check if a measurement exists and is young enough to reuse"""
+        with self._lock:
+            return (self.energy_threshold is not None and
+                    time.time() - self.measured_at < self.max_age)
+
+    def apply(self, recognizer):
+        """
+        Copy the measured energy threshold onto a recognizer
+
+        Args:
+            recognizer: speech_recognition.Recognizer to update
+
+        Returns:
+            bool: True if a measurement was available
+        """
+        with self._lock:
+            if self.energy_threshold is None:
+                return False
+            recognizer.energy_threshold = self.energy_threshold
+            return True
+
+    def calibrate(self, source, recognizer, duration=1.0):
+        """
+        Measure ambient noise from an already opened audio source
+
+        Args:
+            source: Entered speech_recognition AudioSource (shares its stream)
+            recognizer: Recognizer whose threshold should be updated
+            duration: Seconds of audio to sample
+        """
+        print("🎙️  Measuring ambient noise...")
+        seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
+        sample_type = _SAMPLE_TYPES.get(source.SAMPLE_WIDTH)
+
+        if sample_type is None:
+            # Unusual sample width - let speech_recognition handle it
+            recognizer.adjust_for_ambient_noise(source, duration=duration)
+            energies = [recognizer.energy_threshold / recognizer.dynamic_energy_ratio]
+        else:
+            energies = []
+            elapsed = 0.0
+            while elapsed < duration:
+                buffer = source.stream.read(source.CHUNK)
+                if not buffer:
+                    break  # end of stream
+                samples = np.frombuffer(buffer, dtype=sample_type).astype(np.float64)
+                energies.append(float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0)
+                elapsed += seconds_per_buffer
+
+        if not energies:
+            print("⚠️  No audio available for calibration")
+            return
+
+        energies = np.array(energies)
+        with self._lock:
+            self.noise_mean = float(energies.mean())
+            self.noise_std = float(energies.std())
+            self.noise_peak = float(energies.max())
+            # Same steady state speech_recognition's dynamic adjustment converges to
+            self.energy_threshold = max(self.noise_mean * recognizer.dynamic_energy_ratio, 1.0)
+            self.measured_at = time.time()
+            recognizer.energy_threshold = self.energy_threshold
+
+        print(f"✓ Microphone calibrated (threshold {self.energy_threshold:.0f})")
+        self.save()
+
+    def observe(self, recognizer):
+        """
+        Record how the recognizer's dynamic threshold has drifted while listening
+
+        speech_recognition keeps adapting the threshold from the live stream, so
+        this keeps the shared value current without opening the mic again.
+
+        Args:
+            recognizer: Recognizer that just finished listening
+        """
+        if not recognizer.dynamic_energy_threshold:
+            return
+        with self._lock:
+            if self.energy_threshold is None:
+                return
+            self.energy_threshold = recognizer.energy_threshold
+            due = time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def load(self):
+        """Load this device's calibration from the cache file"""
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                entry = json.load(f).get(self.device_key)
+            if entry:
+                with self._lock:
+                    self.energy_threshold = entry['energy_threshold']
+                    self.noise_mean = entry.get('noise_mean')
+                    self.noise_std = entry.get('noise_std')
+                    self.noise_peak = entry.get('noise_peak')
+                    self.measured_at = entry.get('measured_at', 0.0)
+        except Exception as e:
+            print(f"⚠️  Error loading microphone calibration: {e}")
+
+    def save(self):
+        """Save this device's calibration, keeping entries for other devices"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            if self.energy_threshold is None:
+                return
+            entry = {
+                'energy_threshold': self.energy_threshold,
+                'noise_mean': self.noise_mean,
+                'noise_std': self.noise_std,
+                'noise_peak': self.noise_peak,
+                'measured_at': self.measured_at,
+            }
+            self._last_save = time.time()
+
+            try:
+                data = {}
+                if self.cache_file.exists():
+                    with open(self.cache_file, 'r') as f:
+                        data = json.load(f)
+                data[self.device_key] = entry
+
+                # Write to a temp file and swap it in so a crash can't leave half a file
+                temp_file = self.cache_file.with_suffix('.tmp')
+                with open(temp_file, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(temp_file, self.cache_file)
+            except Exception as e:
+                print(f"⚠️  Error saving microphone calibration: {e}")
+
+
+def device_key_for(device_index=None):
+    """
+    Build a stable calibration key for a microphone
+
+    Args:
+        device_index: PyAudio device index (None = system default)
+
+    Returns:
+        str: Device name, or "default"
+    """
+    if device_index is None:
+        return "default"
+    try:
+        import speech_recognition as sr
+        return sr.Microphone.list_microphone_names()[device_index]
+    except Exception:
+        return f"device-{device_index}"
@@ -0,0 +1,168 @@
+"""
+mpv IPC Module
+Controls a running mpv over its JSON IPC socket (--input-ipc-server)
+Commands and property reads are answered in milliseconds, without signals
+or restarting the player. See https://mpv.io/manual/master/#json-ipc
+"""
+import itertools
+import json
+import socket
+import threading
+import time
+
+
+class MpvError(Exception):
+    """mpv refused a command, or the connection to it failed"""
+
+
+class MpvTimeout(MpvError):
+    """mpv didn't answer a command in time (it's hung or gone)"""
+
+
+class MpvIPC:
+    def __init__(self, socket_path, on_event=None):
+        """
+        Create a client for one mpv instance
+
+        Args:
+            socket_path: Path given to mpv's --input-ipc-server
+            on_event: Optional function(event dict) for mpv events (end-file, pause, ...)
+        """
+        self.socket_path = socket_path
+        self.on_event = on_event
+
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._pending = {}  # request id -> [Event, reply]
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._reader = None
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def connect(self, timeout=3.0):
+        """
+        Connect to mpv, waiting for it to create the socket
+
+        Raises:
+            MpvError: If mpv doesn't accept a connection within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise MpvError(f"mpv IPC socket not available: {e}")
+                time.sleep(0.02)
+
+        self._sock = sock
+        self._reader = threading.Thread(target=self._read_loop, args=(sock,), daemon=True)
+        self._reader.start()
+
+    def command(self, *args, timeout=1.0):
+        """
+        Run an mpv command, e.g. command('loadfile', url, 'replace')
+
+        Returns:
+            The command's 'data' (None for most commands)
+
+        Raises:
+            MpvError: If mpv reports an error or doesn't answer in time
+        """
+        if self._sock is None:
+            raise MpvError("not connected to mpv")
+
+        request_id = next(self._request_ids)
+        waiter = [threading.Event(), None]
+        with self._pending_lock:
+            self._pending[request_id] = waiter
+
+        message = json.dumps({'command': list(args), 'request_id': request_id}) + "\n"
+        try:
+            with self._send_lock:
+                self._sock.sendall(message.encode('utf-8'))
+            if not waiter[0].wait(timeout):
+                raise MpvTimeout(f"mpv didn't answer {args[0]} within {timeout}s")
+        except OSError as e:
+            self.close()
+            raise MpvError(f"mpv connection lost: {e}")
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+
+        reply = waiter[1]
+        if reply is None:
+            raise MpvError("mpv connection closed")
+        if reply.get('error') != 'success':
+            raise MpvError(f"{args[0]}: {reply.get('error')}")
+        return reply.get('data')
+
+    def get_property(self, name, default=None):
+        """Read a property (e.g. 'time-pos'); default if it's unavailable right now"""
+        try:
+            return self.command('get_property', name)
+        except MpvError as e:
+            if 'property unavailable' in str(e):
+                return default
+            raise
+
+    def set_property(self, name, value):
+        """Set a property (e.g. 'volume', 'pause')"""
+        self.command('set_property', name, value)
+
+    def close(self):
+        """Drop the connection (mpv keeps running)"""
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._fail_pending()
+
+    def _read_loop(self, sock):
+        """Background thread: route replies to waiting commands and events to on_event"""
+        buffer = b""
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if line.strip():
+                        self._dispatch(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        if self._sock is sock:
+            self._sock = None
+        self._fail_pending()
+
+    def _dispatch(self, message):
+        """Hand one message from mpv to whoever is waiting for it"""
+        if 'event' in message:
+            if self.on_event:
+                try:
+                    self.on_event(message)
+                except Exception as e:
+                    print(f"⚠️  mpv event handler error: {e}")
+            return
+
+        with self._pending_lock:
+            waiter = self._pending.get(message.get('request_id'))
+        if waiter is not None:
+            waiter[1] = message
+            waiter[0].set()
+
+    def _fail_pending(self):
+        """Wake every waiting command after the connection is gone (their reply stays None)"""
+        with self._pending_lock:
+            for waiter in self._pending.values():
+                waiter[0].set()
@@ -0,0 +1,197 @@
+"""
+Music Jobs Module
+Runs "play ..." and "queue ..." searches in the background so request threads return at once
+Each job has an id, a state and a list of progress events
+(searching -> found -> playing or added, or failed) that callers can poll or follow.
+"""
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from resilience import interaction_budget
+
+
+# Job states; the last three are final
+QUEUED = "queued"
+SEARCHING = "searching"
+FOUND = "found"
+PLAYING = "playing"
+ADDED = "added"  # put on the play queue behind the current song
+FAILED = "failed"
+FINAL_STATES = (PLAYING, ADDED, FAILED)
+
+# What a job does with the song it finds
+PLAY = "play"
+ENQUEUE = "enqueue"
+
+
+class TooManyJobs(Exception):
+    """Every search slot and queue place is taken"""
+
+
+class MusicJob:
+    def __init__(self, query, action=PLAY):
+        """
+        One background search-and-play (or search-and-queue) request
+
+        Args:
+            query: Song name or search query
+            action: PLAY it now or ENQUEUE it after the current song
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.query = query
+        self.action = action
+        self.state = QUEUED
+        self.title = None
+        self.message = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []  # [{'seq', 'state', 'message', 'title', 'time'}]
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.state in FINAL_STATES
+
+    def update(self, state, message=None, title=None):
+        """Move to a new state and record it as an event"""
+        with self._condition:
+            self.state = state
+            self.message = message
+            if title:
+                self.title = title
+            if state in FINAL_STATES:
+                self.finished_at = time.time()
+            self.events.append({
+                'seq': next(self._seq),
+                'state': state,
+                'message': message,
+                'title': self.title,
+                'time': time.time(),
+            })
+            self._condition.notify_all()
+
+    def follow(self, timeout=60.0):
+        """
+        Yield events as they happen (past ones first), until the job finishes
+
+        Args:
+            timeout: Longest to wait for the next event
+        """
+        index = 0
+        while True:
+            with self._condition:
+                if index >= len(self.events) and not self.done:
+                    self._condition.wait(timeout)
+                new_events = self.events[index:]
+                finished = self.done
+            if not new_events and not finished:
+                return  # nothing happened within the timeout
+            for event in new_events:
+                yield event
+            index += len(new_events)
+            if finished and index >= len(self.events):
+                return
+
+    def to_dict(self):
+        """JSON-friendly status"""
+        with self._condition:
+            return {
+                'id': self.id,
+                'query': self.query,
+                'action': self.action,
+                'state': self.state,
+                'title': self.title,
+                'message': self.message,
+                'done': self.done,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+                'events': list(self.events),
+            }
+
+
+class MusicJobs:
+    def __init__(self, player, workers=2, keep=100, budget=None, max_pending=8):
+        """
+        Background runner for music searches
+
+        Args:
+            player: YouTubePlayer to search and play with
+            workers: Searches that may run at once
+            keep: Finished jobs to remember for status requests
+            budget: Seconds each search may take (None = only the per-call caps)
+            max_pending: Most unfinished searches (running or waiting) at once
+        """
+        self.player = player
+        self.keep = keep
+        self.budget = budget
+        self.max_pending = max_pending
+        self._jobs = OrderedDict()  # id -> MusicJob, oldest first
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="music-job")
+
+    def submit(self, query, action=PLAY):
+        """
+        Start searching for a song in the background
+
+        Args:
+            query: Song name or search query
+            action: PLAY it now or ENQUEUE it after the current song
+
+        Returns:
+            MusicJob: The new job (already queued)
+
+        Raises:
+            TooManyJobs: If max_pending searches are already unfinished
+        """
+        job = MusicJob(query, action)
+        job.update(QUEUED, f"Looking for {query}...")
+        with self._lock:
+            if sum(1 for j in self._jobs.values() if not j.done) >= self.max_pending:
+                raise TooManyJobs(f"{self.max_pending} searches already running")
+            self._jobs[job.id] = job
+            self._forget_old()
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        """A job by id, or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        """Worker: search, report progress, play or queue"""
+        def progress(state, message, title=None):
+            job.update(state, message, title)
+
+        run = self.player.enqueue if job.action == ENQUEUE else self.player.search_and_play
+
+        # Traced on its own: the chat request that started it has already answered
+        try:
+            with tracing.trace('music job', job_id=job.id, action=job.action, query=job.query[:80]) as attrs:
+                if self.budget:
+                    with interaction_budget(self.budget):
+                        success, message = run(job.query, progress=progress)
+                else:
+                    success, message = run(job.query, progress=progress)
+                attrs['success'] = success
+        except Exception as e:
+            success, message = False, f"Error: {e}"
+        if not job.done:
+            if success:
+                job.update(PLAYING if job.action == PLAY else ADDED, message)
+            elif job.action == PLAY:
+                job.update(FAILED, f"Sorry, I couldn't play {job.query}: {message}")
+            else:
+                job.update(FAILED, f"Sorry, I couldn't queue {job.query}: {message}")
+
+    def _forget_old(self):
+        """Drop the oldest finished jobs beyond the limit (caller holds _lock)"""
+        excess = len(self._jobs) - self.keep
+        for job_id in [j.id for j in self._jobs.values() if j.done][:max(0, excess)]:
+            del self._jobs[job_id]
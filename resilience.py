@@ -0,0 +1,196 @@
+"""
+Resilience Module
+Keeps slow or failing external services from stalling the assistant
+- Interaction budget: each voice/chat interaction gets a deadline; calls made
+  while handling it take their timeouts from whatever time is left
+- Circuit breaker: after repeated failures a service is skipped for a while
+  instead of paying its full timeout on every request
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+
+class DeadlineExceeded(Exception):
+    """The interaction ran out of time"""
+
+
+class CircuitOpenError(Exception):
+    """A service is failing and is being skipped for now"""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        """
+        A point in time an interaction must be answered by
+
+        Args:
+            seconds: Time from now until the deadline
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left (negative once expired)"""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+_current_deadline = contextvars.ContextVar("interaction_deadline", default=None)
+
+
+@contextmanager
+def interaction_budget(seconds):
+    """
+    Give everything inside the block a shared deadline
+
+    Nested budgets can only shorten the deadline, never extend it.
+    """
+    deadline = Deadline(seconds)
+    outer = _current_deadline.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline():
+    """Deadline of the interaction being handled, or None"""
+    return _current_deadline.get()
+
+
+def call_timeout(cap):
+    """
+    Timeout for one external call
+
+    Args:
+        cap: The call's own timeout in seconds
+
+    Returns:
+        float: cap, shortened to the time left in the interaction
+
+    Raises:
+        DeadlineExceeded: If the interaction has no time left
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return cap
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("interaction budget used up")
+    return min(cap, remaining)
+
+
+_worker_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="deadline")
+
+
+def run_with_deadline(func, *args, cap=None, **kwargs):
+    """
+    Run a call that has no timeout of its own, giving up when time runs out
+
+    The call runs on a worker thread (with the caller's deadline visible to
+    it). If it overruns, the caller gets DeadlineExceeded straight away and
+    the call finishes in the background, its result discarded.
+
+    Args:
+        func: Function to call
+        cap: Longest to wait even without an interaction deadline (None = no cap)
+
+    Raises:
+        DeadlineExceeded: If the deadline passed before func returned
+    """
+    deadline = _current_deadline.get()
+    timeout = cap
+    if deadline is not None:
+        timeout = call_timeout(cap if cap is not None else float("inf"))
+
+    context = contextvars.copy_context()
+    future = _worker_pool.submit(context.run, func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        raise DeadlineExceeded(f"{getattr(func, '__name__', 'call')} took longer than {timeout:.1f}s")
+
+
+class CircuitBreaker:
+    CLOSED = "closed"        # normal - calls go through
+    OPEN = "open"            # failing - calls are refused
+    HALF_OPEN = "half_open"  # cooling off is over - one trial call goes through
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0):
+        """
+        Initialize a circuit breaker for one external service
+
+        Args:
+            name: Service name (for messages)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before allowing a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call through the breaker
+
+        Raises:
+            CircuitOpenError: If the service is being skipped
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record(success=False)
+            raise
+        self._record(success=True)
+        return result
+
+    def _before_call(self):
+        """Refuse the call while open; let a single trial through once cooled off"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                raise CircuitOpenError(f"{self.name} is unavailable, skipping it for now")
+            self._state = self.HALF_OPEN
+            self._trial_running = True
+
+    def _record(self, success):
+        """Update the state after a call"""
+        with self._lock:
+            self._trial_running = False
+            if success:
+                if self._state != self.CLOSED:
+                    print(f"✓ {self.name} is back")
+                self._state = self.CLOSED
+                self._failures = 0
+                return
+
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state == self.CLOSED:
+                    print(f"⚠️  {self.name} failed {self._failures} times in a row, skipping it for "
+                          f"{self.reset_timeout:.0f}s")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
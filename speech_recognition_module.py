@@ -3,13 +3,38 @@ Speech Recognition Module
 Converts user's speech to text
 Optimized for better accuracy and speed
 """
+import time
+
 import speech_recognition as sr
+import metrics
+import tracing
+from mic_calibration import MicCalibration, device_key_for
+from audio_output import get_audio_output
+
+# Also used by the wake word detector (stage='wake'), which imports them from here
+STT_SECONDS = metrics.histogram('stt_recognition_seconds', 'Time the recognition service took for one phrase',
+                                ('stage',))
+STT_RESULTS = metrics.counter('stt_results_total',
+                              'Recognition results (recognized, unintelligible, error, no_speech)',
+                              ('stage', 'result'))
 
 
 class SpeechRecognizer:
-    def __init__(self):
+    def __init__(self, calibration=None, device_index=None, microphone=None, recognize=None,
+                 output=None):
+        """
+        Args:
+            calibration: Shared MicCalibration (measured by the wake word detector)
+            device_index: PyAudio input device (None = system default)
+            microphone: Audio source to use instead of a real microphone (e.g. WAV replay)
+            recognize: Function AudioData -> text to use instead of Google recognition
+            output: AudioOutput whose music is ducked while listening (default: shared)
+        """
+        self.output = output or get_audio_output()
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = microphone or sr.Microphone(device_index=device_index)
+        self.recognize = recognize or self.recognizer.recognize_google
+        self.calibration = calibration or MicCalibration(device_key_for(device_index))
 
         # Optimize recognizer settings for better accuracy and speed
         self.recognizer.energy_threshold = 200  # Lower = more sensitive to speech (reduced for better detection)
@@ -18,11 +43,9 @@ class SpeechRecognizer:
         self.recognizer.phrase_threshold = 0.2  # Start listening sooner
         self.recognizer.non_speaking_duration = 0.8  # Detect end of speech (wait longer)
 
-        # Adjust for ambient noise - calibration
-        print("🎙️  Calibrating microphone for ambient noise...")
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1.5)
-        print("✓ Microphone calibrated!")
+        # Use the shared ambient noise calibration instead of measuring again
+        if self.calibration.apply(self.recognizer):
+            print("✓ Microphone using shared calibration")
 
     def listen(self, timeout=15, phrase_time_limit=15):
         """
@@ -37,8 +60,12 @@ class SpeechRecognizer:
         """
         print("\n🎤 Listening... (speak now)")
 
+        # Pick up the latest shared threshold (it drifts with the room)
+        self.calibration.apply(self.recognizer)
+
         try:
-            with self.microphone as source:
+            # Duck music so the command isn't drowned out
+            with tracing.span('listen'), self.output.listening(), self.microphone as source:
                 # Listen for user input
                 audio = self.recognizer.listen(
                     source,
@@ -50,7 +77,7 @@ class SpeechRecognizer:
 
             try:
                 # Recognize speech using Google Speech Recognition
-                text = self.recognizer.recognize_google(audio)
+                text = self._recognize(audio)
                 print(f"📝 You said: {text}")
                 return text
 
@@ -63,6 +90,7 @@ class SpeechRecognizer:
 
         except sr.WaitTimeoutError:
             print("⏱️  No speech detected. Timeout.")
+            STT_RESULTS.inc(stage='command', result='no_speech')
             return None
         except Exception as e:
             print(f"❌ Error during speech recognition: {e}")
@@ -71,15 +99,16 @@ class SpeechRecognizer:
     def listen_without_timeout(self):
         """Listen without timeout - waits indefinitely for speech"""
         print("\n🎤 Listening... (speak now)")
+        self.calibration.apply(self.recognizer)
 
         try:
-            with self.microphone as source:
+            with tracing.span('listen'), self.output.listening(), self.microphone as source:
                 audio = self.recognizer.listen(source)
 
             print("🔄 Processing your speech...")
 
             try:
-                text = self.recognizer.recognize_google(audio)
+                text = self._recognize(audio)
                 print(f"📝 You said: {text}")
                 return text
 
@@ -93,3 +122,21 @@ class SpeechRecognizer:
         except Exception as e:
             print(f"❌ Error during speech recognition: {e}")
             return None
+
+    def _recognize(self, audio):
+        """Run recognition on captured audio, recording its time and result"""
+        started = time.perf_counter()
+        try:
+            with tracing.span('stt'):
+                text = self.recognize(audio)
+        except sr.UnknownValueError:
+            STT_RESULTS.inc(stage='command', result='unintelligible')
+            raise
+        except Exception:
+            STT_RESULTS.inc(stage='command', result='error')
+            raise
+        finally:
+            STT_SECONDS.observe(time.perf_counter() - started, stage='command')
+        STT_RESULTS.inc(stage='command', result='recognized')
+        tracing.annotate(text=text[:80])
+        return text
@@ -0,0 +1,116 @@
+"""
+Stand-in Weather Server
+A local wttr.in look-alike for trying out timeouts and the circuit breaker
+It answers /<city>?format=j1 like wttr.in, optionally slowly or with errors.
+
+Usage:
+    python standin_server.py [--port 8765] [--delay 3] [--fail-rate 0.5]
+
+Then point the assistant at it:
+    WEATHER_BASE_URL=http://127.0.0.1:8765 python hello_kitty_assistant.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+
+class StandinServer:
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fail_rate=0.0):
+        """
+        Create a stand-in weather server
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 = any free port)
+            delay: Seconds to wait before answering each request
+            fail_rate: Fraction of requests answered with HTTP 503
+        """
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                if random.random() < server.fail_rate:
+                    self.send_error(503, "Stand-in failure")
+                    return
+
+                city = unquote(urlparse(self.path).path.strip('/')) or "Nowhere"
+                body = json.dumps(server.report(city)).encode('utf-8')
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out and hung up - that's the point
+
+            def log_message(self, format, *args):
+                pass  # keep the console quiet
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def report(city):
+        """A wttr.in j1-shaped report with fixed, plausible values"""
+        return {
+            'current_condition': [{
+                'temp_C': '25',
+                'FeelsLikeC': '27',
+                'humidity': '60',
+                'windspeedKmph': '12',
+                'weatherDesc': [{'value': 'Partly cloudy'}],
+            }],
+            'nearest_area': [{'areaName': [{'value': city}]}],
+        }
+
+    def start(self):
+        """Serve on a background thread; returns the base URL"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Shut the server down"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the wttr.in weather service")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of requests that get HTTP 503")
+    args = parser.parse_args()
+
+    server = StandinServer(args.host, args.port, delay=args.delay, fail_rate=args.fail_rate)
+    print(f"🌦️  Stand-in weather server on {server.base_url} "
+          f"(delay {args.delay}s, failing {args.fail_rate:.0%})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Tests for cancelling alarms by what was said
+"""
+import pytest
+
+from alarm_module import AlarmModule
+from alarm_store import AlarmStore
+
+
+@pytest.fixture
+def alarms(tmp_path):
+    module = AlarmModule(store=AlarmStore(tmp_path / "alarms.jsonl", legacy_file=tmp_path / "alarms.json",
+                                          fsync=False))
+    yield module
+    module.stop()
+
+
+def labels(module):
+    return sorted(a['label'] for a in module.list_alarms())
+
+
+def test_cancel_alarm_cancels_one(alarms):
+    alarms.add_alarm("07:00")
+    alarms.add_reminder("call mom", "18:00")
+    alarms.cancel_described("cancel the reminder to call mom")
+    assert labels(alarms) == ["Alarm"]
+
+
+def test_cancel_by_time(alarms):
+    alarms.add_alarm("07:00")
+    alarms.add_alarm("08:30")
+    assert "08:30" in alarms.cancel_described("delete my 8:30 am alarm")
+    assert [a['time'][11:16] for a in alarms.list_alarms()] == ["07:00"]
+    assert alarms.cancel_described("cancel my 9 pm alarm").startswith("You have no alarm at")
+
+
+def test_cancel_all_alarms(alarms):
+    alarms.add_alarm("07:00")
+    alarms.add_reminder("stretch", "10:00")
+    assert alarms.cancel_described("cancel all alarms") == "All alarms cancelled"
+    assert alarms.list_alarms() == []
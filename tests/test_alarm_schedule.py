@@ -0,0 +1,26 @@
+"""
+Tests for spoken alarm and reminder schedules
+"""
+import datetime
+
+from alarm_schedule import Recurrence, parse_dates, parse_schedule
+
+NOW = datetime.datetime(2026, 1, 10, 12, 0)
+
+
+def test_month_date():
+    at, repeat = parse_schedule("remind me to pay rent on february 3 at 5 pm", now=NOW)
+    assert at == "17:00"
+    assert repeat.kind == Recurrence.DATES
+    assert repeat.dates == ["2026-02-03"]
+
+
+def test_impossible_dates_are_skipped():
+    assert parse_dates("february 30 and 2026-13-01", today=NOW.date()) == []
+    assert parse_dates("february 30 and march 2", today=NOW.date()) == ["2026-03-02"]
+
+
+def test_impossible_date_is_rejected():
+    # Used to raise ValueError (a 500 from /api/chat)
+    assert parse_schedule("remind me to pay rent on february 30 at 5 pm", now=NOW) == (None, None)
+    assert parse_schedule("set alarm for 2026-02-30 at 7 am", now=NOW) == (None, None)
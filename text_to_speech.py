@@ -3,17 +3,22 @@ Text-to-Speech Module
 Converts text responses to spoken audio
 Uses Google TTS for high-quality, natural female voice
 """
-import pyttsx3
 import subprocess
 import os
 from gtts import gTTS
-import pygame
 import tempfile
-import time
+
+from audio_output import get_audio_output, SPEECH
+import metrics
+import tracing
+
+TTS_SYNTHESIS_SECONDS = metrics.histogram('tts_synthesis_seconds', 'Time to turn a reply into audio', ('engine',))
+TTS_PLAYBACK_SECONDS = metrics.histogram('tts_playback_seconds', 'Time spent speaking a reply', ('engine',))
+TTS_ERRORS = metrics.counter('tts_errors_total', 'Replies that could not be spoken', ('engine',))
 
 
 class TextToSpeech:
-    def __init__(self, rate=180, volume=1.0, use_google_tts=True):
+    def __init__(self, rate=180, volume=1.0, use_google_tts=True, output=None):
         """
         Initialize text-to-speech engine
 
@@ -21,26 +26,29 @@ class TextToSpeech:
             rate: Speech rate (only for pyttsx3, gTTS is naturally fast)
             volume: Volume level (0.0 to 1.0)
             use_google_tts: Use Google TTS for natural female voice (recommended)
+            output: AudioOutput to speak through (default: the shared one)
         """
         self.use_google_tts = use_google_tts
         self.rate = rate
         self.volume = volume
+        self.output = output or get_audio_output()
+        self.output.set_gain(SPEECH, volume)
 
         if use_google_tts:
-            # Initialize pygame mixer for audio playback
-            try:
-                pygame.mixer.init()
+            # Google TTS audio plays on the output's speech channel
+            if self.output.available:
                 self.engine = None
                 print("✓ Text-to-Speech initialized with Google TTS (natural female voice)")
-            except Exception as e:
-                print(f"⚠️  Pygame mixer failed: {e}, falling back to pyttsx3")
+            else:
+                print("⚠️  Audio output unavailable, falling back to pyttsx3")
                 self.use_google_tts = False
                 self._init_pyttsx3()
         else:
             self._init_pyttsx3()
 
     def _init_pyttsx3(self):
-        """Initialize pyttsx3 as fallback"""
+        """Initialize pyttsx3 as fallback (imported only when it's needed)"""
+        import pyttsx3
         self.engine = pyttsx3.init()
         voices = self.engine.getProperty('voices')
 
@@ -65,6 +73,11 @@ class TextToSpeech:
         """
         print(f"\n💬 Hello Kitty: {text}")
 
+        with tracing.span('tts', engine='gtts' if self.use_google_tts else 'pyttsx3', chars=len(text)):
+            self._speak(text)
+
+    def _speak(self, text):
+        """Synthesize and play (see speak)"""
         try:
             if self.use_google_tts:
                 # Use Google TTS - natural female voice
@@ -75,17 +88,13 @@ class TextToSpeech:
                 # Generate speech with Google TTS
                 # Using 'en' (English) with default settings gives a nice female voice
                 # For more feminine: can try 'en-gb', 'en-us', 'en-au'
-                tts = gTTS(text=text, lang='en', slow=False)
-                tts.save(temp_file)
-
-                # Play the audio
-                pygame.mixer.music.load(temp_file)
-                pygame.mixer.music.set_volume(self.volume)
-                pygame.mixer.music.play()
+                with TTS_SYNTHESIS_SECONDS.time(engine='gtts'), tracing.span('tts_synthesis'):
+                    tts = gTTS(text=text, lang='en', slow=False)
+                    tts.save(temp_file)
 
-                # Wait for playback to finish
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
+                # Play the audio (music is ducked until it finishes)
+                with TTS_PLAYBACK_SECONDS.time(engine='gtts'), tracing.span('tts_playback'):
+                    self.output.play_speech(temp_file)
 
                 # Clean up temporary file
                 try:
@@ -94,18 +103,22 @@ class TextToSpeech:
                     pass
 
             else:
-                # Use pyttsx3 fallback
-                self.engine.say(text)
-                self.engine.runAndWait()
+                # Use pyttsx3 fallback - it has its own audio path, but still duck music
+                # (pyttsx3 synthesizes while it speaks, so it's all playback time)
+                with self.output.activity(SPEECH), TTS_PLAYBACK_SECONDS.time(engine='pyttsx3'), \
+                        tracing.span('tts_playback'):
+                    self.engine.say(text)
+                    self.engine.runAndWait()
 
         except Exception as e:
             print(f"❌ Error in text-to-speech: {e}")
+            TTS_ERRORS.inc(engine='gtts' if self.use_google_tts else 'pyttsx3')
             # Try fallback
             if self.use_google_tts and self.engine is None:
                 print("Falling back to pyttsx3...")
                 self._init_pyttsx3()
                 self.use_google_tts = False
-                self.speak(text)
+                self._speak(text)
 
     def set_rate(self, rate):
         """Set speech rate (only affects pyttsx3)"""
@@ -116,6 +129,7 @@ class TextToSpeech:
     def set_volume(self, volume):
         """Set volume (0.0 to 1.0)"""
         self.volume = volume
+        self.output.set_gain(SPEECH, volume)
         if self.engine:
             self.engine.setProperty('volume', volume)
 
@@ -135,11 +149,3 @@ class TextToSpeech:
         """Set voice by ID (pyttsx3 only)"""
         if self.engine:
             self.engine.setProperty('voice', voice_id)
-
-    def __del__(self):
-        """Cleanup"""
-        if self.use_google_tts:
-            try:
-                pygame.mixer.quit()
-            except:
-                pass
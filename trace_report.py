@@ -0,0 +1,148 @@
+"""
+Trace Report
+Summarizes the interaction traces written by tracing.py: the slowest
+interactions with their stages, and latency percentiles per stage
+
+Usage:
+    python trace_report.py                        # traces.jsonl (and its rotated files)
+    python trace_report.py web_app/traces.jsonl --slowest 5
+    python trace_report.py --name voice --since 24
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import time
+
+
+def load_traces(path, name=None, since_hours=None):
+    """
+    Read traces from a file and its rotated predecessors (path.1, path.2, ...)
+
+    Args:
+        path: Trace file
+        name: Only traces whose name starts with this (e.g. 'voice', 'POST /api/chat')
+        since_hours: Only traces from the last this many hours
+
+    Returns:
+        list: Trace dicts, oldest first
+    """
+    rotated = [f for f in glob.glob(f"{glob.escape(path)}.*") if f.rsplit('.', 1)[1].isdigit()]
+    files = sorted(rotated, key=lambda f: int(f.rsplit('.', 1)[1]), reverse=True)  # oldest first
+    if os.path.exists(path):
+        files.append(path)
+
+    cutoff = time.time() - since_hours * 3600 if since_hours else None
+    traces = []
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    trace = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if name and not trace.get('name', '').startswith(name):
+                    continue
+                if cutoff and trace.get('time', 0) < cutoff:
+                    continue
+                traces.append(trace)
+    traces.sort(key=lambda t: t.get('time', 0))
+    return traces
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def stage_stats(traces):
+    """
+    Latency per stage over all traces
+
+    A stage that ran more than once in an interaction (e.g. 'tts' for the
+    acknowledgement and the answer) counts each run.
+
+    Returns:
+        dict: {stage: {'count', 'mean', 'p50', 'p90', 'p99', 'max'}} in milliseconds,
+              plus 'total' for whole interactions; slowest p90 first
+    """
+    durations = {'total': [t['duration_ms'] for t in traces]}
+    for trace in traces:
+        for span in trace.get('spans', []):
+            durations.setdefault(span['name'], []).append(span['duration_ms'])
+
+    stats = {}
+    for stage, values in durations.items():
+        if values:
+            stats[stage] = {
+                'count': len(values),
+                'mean': sum(values) / len(values),
+                'p50': _percentile(values, 50),
+                'p90': _percentile(values, 90),
+                'p99': _percentile(values, 99),
+                'max': max(values),
+            }
+    return dict(sorted(stats.items(), key=lambda item: (item[0] != 'total', -item[1]['p90'])))
+
+
+def print_report(traces, slowest=10):
+    """Print the slowest interactions and the per-stage percentiles"""
+    print("\n" + "=" * 78)
+    print(f"🔎 TRACE REPORT ({len(traces)} interactions)")
+    print("=" * 78)
+    if not traces:
+        return
+
+    print(f"\nSlowest {min(slowest, len(traces))}:")
+    for trace in sorted(traces, key=lambda t: t['duration_ms'], reverse=True)[:slowest]:
+        when = datetime.datetime.fromtimestamp(trace.get('time', 0)).strftime('%Y-%m-%d %H:%M:%S')
+        attrs = trace.get('attrs', {})
+        said = f" \"{attrs['text']}\"" if attrs.get('text') else ''
+        error = f" ❌ {trace['error']}" if trace.get('error') else ''
+        print(f"\n  {trace['duration_ms']:>8.0f}ms  {when}  {trace['name']}{said}{error}")
+        _print_spans(trace.get('spans', []))
+
+    print(f"\n{'stage':<22}{'count':>7}" + "".join(f"{k:>10}" for k in ('mean', 'p50', 'p90', 'p99', 'max')))
+    for stage, stats in stage_stats(traces).items():
+        print(f"{stage:<22}{stats['count']:>7}" +
+              "".join(f"{stats[k]:>8.0f}ms" for k in ('mean', 'p50', 'p90', 'p99', 'max')))
+
+
+def _print_spans(spans, parent=0, depth=1):
+    """One line per stage, indented under the stage it ran in"""
+    for span in spans:
+        if span.get('parent', 0) != parent:
+            continue
+        error = f" ❌ {span['error']}" if span.get('error') else ''
+        print(f"  {'  ' * depth}{span['name']:<{24 - 2 * depth}} {span['start_ms']:>+8.0f}ms "
+              f"{span['duration_ms']:>8.0f}ms{error}")
+        _print_spans(spans, span['id'], depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize interaction traces (slowest, per-stage percentiles)")
+    parser.add_argument("file", nargs="?", default=os.getenv("TRACE_FILE", "traces.jsonl"),
+                        help="Trace file (rotated files next to it are read too)")
+    parser.add_argument("--slowest", type=int, default=10, help="Slowest interactions to show")
+    parser.add_argument("--name", help="Only interactions whose name starts with this (e.g. voice, 'POST /api/chat')")
+    parser.add_argument("--since", type=float, help="Only the last this many hours")
+    parser.add_argument("--json", help="Also write the per-stage statistics to this file")
+    args = parser.parse_args()
+
+    traces = load_traces(args.file, name=args.name, since_hours=args.since)
+    if not traces and not os.path.exists(args.file):
+        parser.error(f"No traces found at {args.file}")
+
+    print_report(traces, slowest=args.slowest)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stage_stats(traces), f, indent=2)
+        print(f"\n💾 Statistics written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
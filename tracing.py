@@ -0,0 +1,278 @@
+"""
+Tracing Module
+Per-interaction traces: where the time went between the wake word (or a web
+request) and the reply
+An interaction is a trace; each stage inside it (recognition, translation,
+routing, the AI, speech) is a span, and spans nest. The trace in progress
+follows the code through a context variable, so a stage only needs
+`with tracing.span('ai'):` and code running outside any interaction costs
+nothing. Finished traces are written one per line to a rotating JSON-lines
+file; trace_report.py summarizes them.
+"""
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# (trace, id of the innermost open span) for the code running now
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+class Trace:
+    def __init__(self, tracer, name, attrs, started=None):
+        """One interaction being traced (use Tracer.start or tracing.trace)"""
+        now = time.perf_counter()
+        self.tracer = tracer
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = dict(attrs)
+        self.error = None
+        self.started = started if started is not None else now
+        self.started_at = time.time() - (now - self.started)
+        self.duration = None
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.duration is not None
+
+    def add_span(self, name, start, end, parent=0, error=None, span_id=None, **attrs):
+        """
+        Record a finished span
+
+        Args:
+            name: Stage name (e.g. 'stt')
+            start, end: time.perf_counter() values
+            parent: Id of the enclosing span (0 = the trace itself)
+            error: Exception type name if the stage failed
+            span_id: Id handed out by new_span_id() when the span began (default: a new one)
+
+        Returns:
+            int: The span's id
+        """
+        if span_id is None:
+            span_id = self.new_span_id()
+        span = {
+            'id': span_id,
+            'parent': parent,
+            'name': name,
+            'start_ms': round((start - self.started) * 1000, 1),
+            'duration_ms': round((end - start) * 1000, 1),
+        }
+        if attrs:
+            span['attrs'] = attrs
+        if error:
+            span['error'] = error
+        with self._lock:
+            if not self.finished:  # a stage that outlived its interaction is dropped
+                self.spans.append(span)
+        return span_id
+
+    def new_span_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s['start_ms'])
+        record = {
+            'trace_id': self.id,
+            'name': self.name,
+            'time': self.started_at,
+            'duration_ms': round((self.duration or 0.0) * 1000, 1),
+            'attrs': self.attrs,
+            'spans': spans,
+        }
+        if self.error:
+            record['error'] = self.error
+        return record
+
+
+class Tracer:
+    def __init__(self, path="traces.jsonl", max_bytes=5 * 1024 * 1024, backups=3, enabled=True):
+        """
+        Writes finished traces to a JSON-lines file
+
+        Args:
+            path: File to append traces to
+            max_bytes: Size at which the file is rotated (path.1, path.2, ...)
+            backups: Rotated files kept
+            enabled: False to skip tracing altogether
+        """
+        self.path = path
+        self.enabled = enabled
+        self._logger = None
+        if enabled:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                          encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger = logging.getLogger(f"tracing.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(handler)
+
+    def close(self):
+        """Close the trace file (traces finished afterwards aren't written)"""
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                self._logger.removeHandler(handler)
+                handler.close()
+            self.enabled = False
+
+    def start(self, name, **attrs):
+        """
+        Begin a new interaction and make it current
+
+        Replaces whatever trace was current, so a thread that's reused for
+        the next request never reports into the previous one's trace.
+
+        Returns:
+            Trace or None: Pass it to finish(); None if tracing is off
+        """
+        if not self.enabled:
+            return None
+        trace = Trace(self, name, attrs)
+        _current.set((trace, 0))
+        return trace
+
+    def finish(self, trace, error=None):
+        """End an interaction and write it out"""
+        if trace is None or trace.finished:
+            return
+        current = _current.get()
+        if current is not None and current[0] is trace:
+            _current.set(None)
+        trace.error = error
+        with trace._lock:
+            trace.duration = time.perf_counter() - trace.started
+        try:
+            self._logger.info(json.dumps(trace.to_dict(), default=str))
+        except Exception as e:
+            print(f"⚠️  Couldn't write trace: {e}")
+
+    @contextmanager
+    def trace(self, name, started=None, **attrs):
+        """
+        Trace the block as one interaction
+
+        Inside another interaction it's just a span of that one. Either way
+        it yields a dict the block can add attributes to.
+
+        Args:
+            started: time.perf_counter() when the interaction really began, if
+                     earlier than the block (e.g. when the wake word was said)
+        """
+        if _current.get() is not None or not self.enabled:
+            with span(name, **attrs) as current:
+                yield current
+            return
+
+        trace = Trace(self, name, attrs, started=started)
+        token = _current.set((trace, 0))
+        error = None
+        try:
+            yield trace.attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            self.finish(trace, error)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time the block as one stage of the current interaction
+
+    Does nothing outside an interaction. Yields a dict the block can add
+    attributes to (e.g. which provider answered).
+    """
+    current = _current.get()
+    if current is None:
+        yield {}
+        return
+
+    trace, parent = current
+    span_id = trace.new_span_id()
+    token = _current.set((trace, span_id))
+    attrs = dict(attrs)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        trace.add_span(name, start, time.perf_counter(), parent=parent, error=error, span_id=span_id, **attrs)
+
+
+def add_span(name, start, end, **attrs):
+    """Record a stage measured beforehand (perf_counter start/end) in the current interaction"""
+    current = _current.get()
+    if current is not None:
+        trace, parent = current
+        trace.add_span(name, start, end, parent=parent, **attrs)
+
+
+def annotate(**attrs):
+    """Add attributes to the current interaction (e.g. the recognized text)"""
+    current = _current.get()
+    if current is not None:
+        current[0].attrs.update(attrs)
+
+
+def current_trace():
+    """The interaction being traced, or None"""
+    current = _current.get()
+    return current[0] if current else None
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    The process-wide tracer, set up from the environment on first use (after .env is loaded)
+
+    TRACING (default true), TRACE_FILE, TRACE_FILE_MAX_MB, TRACE_FILE_BACKUPS
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                path=os.getenv("TRACE_FILE", "traces.jsonl"),
+                max_bytes=int(float(os.getenv("TRACE_FILE_MAX_MB", "5")) * 1024 * 1024),
+                backups=int(os.getenv("TRACE_FILE_BACKUPS", "3")),
+                enabled=os.getenv("TRACING", "true").lower() == "true",
+            )
+        return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Replace the process-wide tracer (e.g. to keep a benchmark's traces apart)
+
+    Returns:
+        Tracer or None: The one it replaced, to put back afterwards
+    """
+    global _tracer
+    with _tracer_lock:
+        previous, _tracer = _tracer, tracer
+        return previous
+
+
+def trace(name, started=None, **attrs):
+    """Trace the block as one interaction, with the process-wide tracer"""
+    return get_tracer().trace(name, started=started, **attrs)
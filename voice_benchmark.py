@@ -0,0 +1,257 @@
+"""
+Voice Pipeline Benchmark
+Replays recorded WAV files through the wake word detector, speech recognizer
+and assistant, then reports wake-to-response latency per stage
+
+Usage:
+    python voice_benchmark.py CORPUS [--speed 4] [--stt-latency 0.3] [--ai-latency 0.8]
+
+CORPUS is a directory of cases. Each case is a subdirectory of WAV files that
+are played in name order (e.g. 01_wake.wav, 02_command.wav), each with its
+transcript in a .txt file next to it. A directory that directly contains WAV
+files is treated as a single case.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import tracing
+from alarm_module import AlarmModule
+from alarm_store import AlarmStore
+from audio_replay import ReplayTimeline, StubRecognizer
+from mic_calibration import MicCalibration
+from wake_word_detector import WakeWordDetector
+from speech_recognition_module import SpeechRecognizer
+from hello_kitty_assistant import HelloKittyAssistant
+
+
+STAGES = [
+    'wake_recognition',     # wake phrase captured -> assistant callback
+    'acknowledgement',      # callback -> "Yes? How can I help you?" finished
+    'command_capture',      # acknowledgement -> command phrase captured
+    'command_recognition',  # command recognition request
+    'response',             # command text -> reply starts speaking (routing, AI, ...)
+    'wake_to_response',     # wake phrase captured -> reply starts speaking
+]
+
+
+class BenchmarkTTS:
+    def __init__(self, latency=0.0):
+        """Silent TextToSpeech stand-in that records what would be said"""
+        self.latency = latency
+        self.calls = []  # (started, finished, text)
+
+    def speak(self, text):
+        started = time.time()
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls.append((started, time.time(), text))
+
+    def set_rate(self, rate):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class BenchmarkBrain:
+    def __init__(self, latency=0.0):
+        """AIBrain stand-in with a fixed response time"""
+        self.latency = latency
+        self.conversation_history = []
+
+    def get_response(self, user_input):
+        if self.latency:
+            time.sleep(self.latency)
+        return f"You said {user_input}"
+
+    def reset_conversation(self):
+        self.conversation_history = []
+
+    def get_conversation_count(self):
+        return len(self.conversation_history)
+
+
+def find_cases(corpus):
+    """List the WAV files of each case in a corpus directory"""
+    corpus = Path(corpus)
+    if any(corpus.glob("*.wav")):
+        return {corpus.name: sorted(corpus.glob("*.wav"))}
+    return {case.name: sorted(case.glob("*.wav"))
+            for case in sorted(corpus.iterdir())
+            if case.is_dir() and any(case.glob("*.wav"))}
+
+
+def run_case(paths, speed=1.0, stt_latency=0.0, ai_latency=0.0, tts_latency=0.0):
+    """
+    Replay one case through the full voice pipeline
+
+    Alarms and traces go to a temporary directory, so a run leaves the real
+    alarms.jsonl and traces.jsonl alone.
+
+    Returns:
+        list: One dict of stage latencies (seconds) per interaction
+    """
+    with tempfile.TemporaryDirectory(prefix="voice-benchmark-") as workdir:
+        tracer = tracing.Tracer(path=os.path.join(workdir, "traces.jsonl"))
+        previous = tracing.set_tracer(tracer)
+        try:
+            return _replay(paths, workdir, speed, stt_latency, ai_latency, tts_latency)
+        finally:
+            tracing.set_tracer(previous)
+            tracer.close()
+
+
+def _replay(paths, workdir, speed, stt_latency, ai_latency, tts_latency):
+    """run_case() with its scratch directory in place"""
+    timeline = ReplayTimeline(paths, speed=speed)
+    stub = StubRecognizer(timeline, latency=stt_latency)
+    calibration = MicCalibration(cache_file=None)
+    tts = BenchmarkTTS(latency=tts_latency)
+
+    wake_word = os.getenv("WAKE_WORD", "hello kitty")
+    assistant = HelloKittyAssistant(overrides={
+        'mic_calibration': calibration,
+        'wake_detector': WakeWordDetector([wake_word], calibration=calibration,
+                                          microphone=timeline.microphone(), recognize=stub.recognize),
+        'speech_recognizer': SpeechRecognizer(calibration=calibration,
+                                              microphone=timeline.microphone(), recognize=stub.recognize),
+        'ai_brain': BenchmarkBrain(latency=ai_latency),
+        'tts': tts,
+        'alarm_module': AlarmModule(store=AlarmStore(os.path.join(workdir, "alarms.jsonl"),
+                                                     legacy_file=os.path.join(workdir, "alarms.json"),
+                                                     fsync=False)),
+    })
+
+    interactions = []  # (callback entered, callback returned)
+
+    def on_wake_word():
+        entered = time.time()
+        assistant.on_wake_word_detected()
+        interactions.append((entered, time.time()))
+
+    assistant.wake_detector.start(on_wake_word, assistant.emergency_stop_music)
+
+    # Let the recording play out, then give in-flight work time to finish
+    deadline = time.monotonic() + timeline.duration / speed + 60
+    while time.monotonic() < deadline and not timeline.is_finished():
+        time.sleep(0.05)
+    settle_until = time.monotonic() + 2 * stt_latency + 1.0
+    while time.monotonic() < deadline and (assistant.is_active or time.monotonic() < settle_until):
+        time.sleep(0.05)
+    assistant.wake_detector.stop()
+    assistant.alarm_module.stop()
+
+    return [_stage_latencies(entered, returned, stub.calls, tts.calls, wake_word)
+            for entered, returned in interactions]
+
+
+def _stage_latencies(entered, returned, recognitions, speeches, wake_word):
+    """Split one interaction into stages using the recorded stub calls"""
+    wake_calls = [c for c in recognitions
+                  if c[2].startswith("wake-recognition") and c[4]
+                  and wake_word in c[4].lower() and c[0] <= entered]
+    spoken = [s for s in speeches if entered <= s[0] <= returned]
+    if not wake_calls or not spoken:
+        return {}
+
+    wake = max(wake_calls, key=lambda c: c[0])
+    ack, reply = spoken[0], spoken[-1]
+    stages = {
+        'wake_recognition': entered - wake[0],
+        'acknowledgement': ack[1] - entered,
+        'wake_to_response': reply[0] - wake[0],
+    }
+
+    commands = [c for c in recognitions
+                if not c[2].startswith("wake-recognition") and ack[1] <= c[0] <= returned]
+    if commands:
+        command = commands[0]
+        stages['command_capture'] = command[0] - ack[1]
+        stages['command_recognition'] = command[1] - command[0]
+        stages['response'] = reply[0] - command[1]
+    return stages
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(results):
+    """
+    Aggregate stage latencies over all interactions
+
+    Args:
+        results: {case name: [stage dict, ...]}
+
+    Returns:
+        dict: {stage: {'count', 'mean', 'p50', 'p90', 'max'}}
+    """
+    summary = {}
+    for stage in STAGES:
+        values = [r[stage] for runs in results.values() for r in runs if stage in r]
+        if values:
+            summary[stage] = {
+                'count': len(values),
+                'mean': sum(values) / len(values),
+                'p50': _percentile(values, 50),
+                'p90': _percentile(values, 90),
+                'max': max(values),
+            }
+    return summary
+
+
+def print_report(results, summary):
+    """Print per-case and aggregate stage latencies"""
+    print("\n" + "=" * 72)
+    print("📊 VOICE PIPELINE BENCHMARK")
+    print("=" * 72)
+    for case, runs in results.items():
+        print(f"\n{case}: {len(runs)} interaction(s)")
+        for i, stages in enumerate(runs, 1):
+            parts = [f"{stage}={stages[stage] * 1000:.0f}ms" for stage in STAGES if stage in stages]
+            print(f"  #{i} " + (", ".join(parts) if parts else "(incomplete)"))
+
+    print(f"\n{'stage':<22}{'count':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'max':>10}")
+    for stage, stats in summary.items():
+        print(f"{stage:<22}{stats['count']:>7}" +
+              "".join(f"{stats[k] * 1000:>8.0f}ms" for k in ('mean', 'p50', 'p90', 'max')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voice pipeline with recorded audio")
+    parser.add_argument("corpus", help="Directory of cases (or a single case directory)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--stt-latency", type=float, default=0.0, help="Simulated recognition latency (s)")
+    parser.add_argument("--ai-latency", type=float, default=0.0, help="Simulated AI response latency (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="Simulated speech latency (s)")
+    parser.add_argument("--json", help="Also write raw results and summary to this file")
+    args = parser.parse_args()
+
+    cases = find_cases(args.corpus)
+    if not cases:
+        parser.error(f"No WAV files found in {args.corpus}")
+
+    results = {}
+    for name, paths in cases.items():
+        print(f"\n▶️  Replaying case '{name}' ({len(paths)} files at {args.speed}x)")
+        results[name] = run_case(paths, speed=args.speed, stt_latency=args.stt_latency,
+                                 ai_latency=args.ai_latency, tts_latency=args.tts_latency)
+
+    summary = summarize(results)
+    print_report(results, summary)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cases': results, 'summary': summary}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
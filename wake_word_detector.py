@@ -1,21 +1,56 @@
 """
 Wake Word Detection Module
 Listens for the wake word "Hello Kitty" to activate the assistant
+Capture and recognition run in parallel so the mic never waits on the network
 """
 import speech_recognition as sr
+import queue
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from mic_calibration import MicCalibration, device_key_for
+from speech_recognition_module import STT_SECONDS, STT_RESULTS  # reported under stage='wake'
+import metrics
+import tracing
+
+WAKE_DROPPED = metrics.counter('wake_segments_dropped_total', 'Captured phrases dropped from a recognition backlog')
+WAKE_DETECTIONS = metrics.counter('wake_words_detected_total', 'Times the wake word was heard')
 
 
 class WakeWordDetector:
-    def __init__(self, wake_words=["hello kitty", "hey kitty"]):
+    def __init__(self, wake_words=["hello kitty", "hey kitty"], calibration=None, device_index=None,
+                 recognition_workers=2, max_pending=4, max_segment_age=6.0,
+                 microphone=None, recognize=None):
+        """
+        Args:
+            wake_words: Phrases that activate the assistant
+            calibration: Shared MicCalibration (also used by SpeechRecognizer)
+            device_index: PyAudio input device (None = system default)
+            recognition_workers: Recognition requests allowed in flight at once
+            max_pending: Captured segments queued for recognition before the oldest is dropped
+            max_segment_age: Seconds after capture when a result is too old to act on
+            microphone: Audio source to use instead of a real microphone (e.g. WAV replay)
+            recognize: Function AudioData -> text to use instead of Google recognition
+        """
         self.wake_words = [w.lower() for w in wake_words]
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = microphone or sr.Microphone(device_index=device_index)
+        self.recognize = recognize or self.recognizer.recognize_google
+        self.calibration = calibration or MicCalibration(device_key_for(device_index))
         self.is_listening = False
         self.callback = None
         self.stop_music_callback = None  # Special callback for emergency stop
 
+        # Capture -> recognition pipeline
+        self.recognition_workers = recognition_workers
+        self.max_segment_age = max_segment_age
+        self._segments = queue.Queue(maxsize=max_pending)  # (started_at, captured_at, future) in capture order
+        self._capture_allowed = threading.Event()
+        self._capture_allowed.set()
+        self._mic_released = threading.Event()  # set while the capture loop doesn't hold the mic
+        self._mic_released.set()
+        self._resumed_at = 0.0  # segments that started before this were heard during an interaction
+
         # Optimize for better wake word detection
         self.recognizer.energy_threshold = 150  # Lower = more sensitive (improved from 300)
         self.recognizer.dynamic_energy_threshold = True
@@ -23,15 +58,20 @@ class WakeWordDetector:
         self.recognizer.phrase_threshold = 0.2  # Start listening sooner
         self.recognizer.non_speaking_duration = 0.5  # Quick detection
 
-        # Adjust for ambient noise - better calibration
-        print("🎙️  Calibrating wake word detector for ambient noise...")
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1.5)
-        print("✓ Wake word detector calibrated and ready!")
+        # Reuse the saved ambient noise calibration when it is still fresh.
+        # Otherwise the listener thread measures it from its own stream, so
+        # startup never blocks on the microphone.
+        if self.calibration.apply(self.recognizer) and self.calibration.is_fresh():
+            print("✓ Wake word detector using saved calibration")
+        else:
+            print("🎙️  Wake word detector will calibrate in the background")
 
     def listen_for_wake_word(self, callback):
         """
         Continuously listen for the wake word
+        Captured phrases are recognized by a worker pool while capture continues;
+        results are handled in capture order by a separate delivery thread.
+
         Args:
             callback: Function to call when wake word is detected
         """
@@ -41,46 +81,160 @@ class WakeWordDetector:
         print(f"\nListening for wake words: {', '.join(self.wake_words)}...")
         print("Say one of the wake words to activate the assistant!\n")
 
+        pool = ThreadPoolExecutor(max_workers=self.recognition_workers,
+                                  thread_name_prefix="wake-recognition")
+        delivery_thread = threading.Thread(target=self._deliver_results, daemon=True)
+        delivery_thread.start()
+
+        try:
+            self._capture_loop(pool)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _capture_loop(self, pool):
+        """Keep the mic open and hand every captured phrase to the recognition pool"""
         while self.is_listening:
+            # The mic belongs to the speech recognizer while an interaction runs
+            if not self._capture_allowed.wait(timeout=0.5):
+                continue
+
             try:
+                self._mic_released.clear()
                 with self.microphone as source:
-                    # Listen with a shorter timeout for better responsiveness
-                    print("👂 Listening for wake word...", end="\r")
-                    audio = self.recognizer.listen(source, timeout=None, phrase_time_limit=5)
+                    while self.is_listening and self._capture_allowed.is_set():
+                        # (Re)calibrate from the stream we already hold open
+                        if not self.calibration.is_fresh():
+                            self.calibration.calibrate(source, self.recognizer)
 
-                try:
-                    # Use Google's speech recognition
-                    text = self.recognizer.recognize_google(audio).lower()
-                    print(f"🔊 [Heard: '{text}']                    ")
-
-                    # EMERGENCY: Check for stop music command (works without wake word)
-                    if self.stop_music_callback and ("stop music" in text or "stop the music" in text or "stop" in text):
-                        print("🎵 Emergency stop music detected (no wake word needed)!")
-                        if self.stop_music_callback():
-                            print("✓ Music stopped successfully")
+                        started_at = time.time()
+                        try:
+                            # Short timeout so a pause request is noticed quickly
+                            print("👂 Listening for wake word...", end="\r")
+                            audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=5)
+                        except sr.WaitTimeoutError:
+                            # No speech detected, continue listening
                             continue
 
-                    # Check if any wake word is in the text
-                    if any(wake_word in text for wake_word in self.wake_words):
-                        print("✅ Wake word detected!")
-                        if self.callback:
-                            self.callback()
-                    else:
-                        print(f"   (Not a wake word, waiting...)")
-
-                except sr.UnknownValueError:
-                    # Speech was unintelligible
-                    print("❓ Could not understand (background noise?)   ")
-                except sr.RequestError as e:
-                    print(f"❌ Could not request results from speech recognition service; {e}")
-                    time.sleep(1)
-
-            except sr.WaitTimeoutError:
-                # No speech detected, continue listening
-                pass
+                        # Share the dynamically adjusted threshold with the speech recognizer
+                        self.calibration.observe(self.recognizer)
+
+                        future = pool.submit(self._recognize_segment, audio)
+                        self._enqueue_segment((started_at, time.time(), future))
+
             except Exception as e:
                 print(f"⚠️  Error in wake word detection: {e}")
                 time.sleep(1)
+            finally:
+                self._mic_released.set()
+
+    def _enqueue_segment(self, segment):
+        """Queue a captured segment, dropping the oldest one if recognition is backlogged"""
+        while True:
+            try:
+                self._segments.put_nowait(segment)
+                return
+            except queue.Full:
+                try:
+                    dropped = self._segments.get_nowait()
+                except queue.Empty:
+                    continue
+                dropped[2].cancel()
+                WAKE_DROPPED.inc()
+                print("⏭️  Recognition backlog - dropped an old segment")
+
+    def _recognize_segment(self, audio):
+        """Recognize one captured segment (runs on the worker pool)"""
+        started = time.perf_counter()
+        try:
+            # Google speech recognition unless a stub was injected
+            text = self.recognize(audio).lower()
+            STT_RESULTS.inc(stage='wake', result='recognized')
+            return text
+        except sr.UnknownValueError:
+            # Speech was unintelligible
+            print("❓ Could not understand (background noise?)   ")
+            STT_RESULTS.inc(stage='wake', result='unintelligible')
+        except sr.RequestError as e:
+            print(f"❌ Could not request results from speech recognition service; {e}")
+            STT_RESULTS.inc(stage='wake', result='error')
+        finally:
+            STT_SECONDS.observe(time.perf_counter() - started, stage='wake')
+        return None
+
+    def _deliver_results(self):
+        """Act on recognition results in the order their audio was captured"""
+        while self.is_listening:
+            try:
+                started_at, captured_at, future = self._segments.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Heard while an interaction was running - not meant for us
+            if started_at < self._resumed_at:
+                future.cancel()
+                continue
+
+            try:
+                text = future.result()
+            except CancelledError:
+                continue
+            except Exception as e:
+                print(f"⚠️  Error in wake word recognition: {e}")
+                continue
+
+            if not text:
+                continue
+            if time.time() - captured_at > self.max_segment_age:
+                print(f"⏭️  Ignoring stale result: '{text}'")
+                continue
+
+            # An interaction that fails must not take the delivery thread down with it
+            try:
+                self._handle_text(text, captured_at)
+            except Exception as e:
+                print(f"⚠️  Error handling wake word: {e}")
+
+    def _handle_text(self, text, captured_at=None):
+        """
+        Check recognized text for the emergency stop command or a wake word
+
+        Args:
+            text: Recognized text
+            captured_at: time.time() when its audio finished recording
+        """
+        print(f"🔊 [Heard: '{text}']                    ")
+
+        # EMERGENCY: Check for stop music command (works without wake word)
+        if self.stop_music_callback and ("stop music" in text or "stop the music" in text or "stop" in text):
+            print("🎵 Emergency stop music detected (no wake word needed)!")
+            if self.stop_music_callback():
+                print("✓ Music stopped successfully")
+                return
+
+        # Check if any wake word is in the text
+        if any(wake_word in text for wake_word in self.wake_words):
+            print("✅ Wake word detected!")
+            WAKE_DETECTIONS.inc()
+            if self.callback:
+                # Release the mic to the speech recognizer for the interaction,
+                # waiting for a capture in progress (up to its 5 s phrase limit)
+                # to end so the command isn't half-heard by both
+                self._capture_allowed.clear()
+                if not self._mic_released.wait(timeout=7):
+                    print("⚠️  Wake word capture didn't release the microphone in time")
+                try:
+                    # The whole interaction is one trace, from when the wake
+                    # word was said (its recognition is the first stage)
+                    now = time.perf_counter()
+                    said = now - (time.time() - captured_at) if captured_at is not None else now
+                    with tracing.trace('voice', started=said):
+                        tracing.add_span('wake_word', said, now)
+                        self.callback()
+                finally:
+                    self._resumed_at = time.time()
+                    self._capture_allowed.set()
+        else:
+            print(f"   (Not a wake word, waiting...)")
 
     def start(self, callback, stop_music_callback=None):
         """
@@ -98,4 +252,5 @@ class WakeWordDetector:
     def stop(self):
         """Stop listening for wake word"""
         self.is_listening = False
+        self._capture_allowed.set()
         print("Wake word detection stopped.")
@@ -1,23 +1,67 @@
 """
 Weather and Time Module
 Provides current time, date, and weather information
+Weather is cached per city: fresh entries are served directly, stale ones are
+served at once while a background refresh fetches new data
+All lookups share one keep-alive HTTP session and a global limit on
+concurrent requests, and go through a circuit breaker with timeouts taken
+from the current interaction budget
 """
 import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 import requests
+from requests.adapters import HTTPAdapter
 import pytz
+import metrics
+import tracing
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, call_timeout
+
+WEATHER_CACHE = metrics.counter('weather_cache_total', 'Weather lookups by cache state (fresh, stale, miss)',
+                                ('result',))
+WEATHER_FETCHES = metrics.counter('weather_fetches_total', 'Requests to the weather service by outcome',
+                                  ('outcome',))
+WEATHER_SECONDS = metrics.histogram('weather_fetch_seconds', 'Time one weather request took')
 
 
 class WeatherTimeModule:
-    def __init__(self, city="Karachi", timezone="Asia/Karachi"):
+    def __init__(self, city="Karachi", timezone="Asia/Karachi", cache_ttl=600, max_stale=3 * 3600,
+                 max_concurrent_fetches=4, base_url="http://wttr.in", request_timeout=5.0,
+                 breaker=None):
         """
         Initialize Weather and Time module
 
         Args:
             city: Default city for weather
             timezone: Timezone for accurate time
+            cache_ttl: Seconds a weather report counts as fresh
+            max_stale: Seconds a stale report may still be served while refreshing
+            max_concurrent_fetches: Most weather requests in flight at once (all callers)
+            base_url: Weather service (wttr.in or a compatible stand-in)
+            request_timeout: Longest a single request may take
+            breaker: CircuitBreaker for the weather service (default: 3 failures, 30 s)
         """
         self.city = city
         self.timezone = pytz.timezone(timezone)
+        self.cache_ttl = cache_ttl
+        self.max_stale = max_stale
+
+        self._lock = threading.Lock()
+        self._cache = {}      # city key -> (fetched at, current conditions)
+        self._inflight = {}   # city key -> Event set when its fetch finishes
+
+        # Keep-alive connections to wttr.in, one pool sized to the concurrency limit
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.base_url = base_url.rstrip('/')
+        self.request_timeout = request_timeout
+        self.breaker = breaker or CircuitBreaker("Weather service")
+        self._fetch_slots = threading.BoundedSemaphore(max_concurrent_fetches)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent_fetches)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         print(f"✓ Weather & Time module initialized (City: {city}, Timezone: {timezone})")
 
     def get_current_time(self):
@@ -49,24 +93,7 @@ class WeatherTimeModule:
             city = self.city
 
         try:
-            # Use wttr.in - free weather service, no API key required
-            url = f"http://wttr.in/{city}?format=%C+%t+%h+%w"
-            response = requests.get(url, timeout=5)
-
-            if response.status_code == 200:
-                weather_data = response.text.strip()
-                # Parse the response: Condition Temperature Humidity Wind
-                parts = weather_data.split()
-
-                if len(parts) >= 2:
-                    condition = parts[0]
-                    temperature = parts[1]
-
-                    return f"In {city}, it's {condition} with {temperature}"
-                else:
-                    return f"Current weather in {city}: {weather_data}"
-            else:
-                return f"Sorry, I couldn't get weather for {city}"
+            return self._summary(city, self._current_conditions(city))
 
         except Exception as e:
             print(f"⚠️  Weather error: {e}")
@@ -86,24 +113,148 @@ class WeatherTimeModule:
             city = self.city
 
         try:
-            # Use wttr.in with JSON format
-            url = f"http://wttr.in/{city}?format=j1"
-            response = requests.get(url, timeout=5)
-
-            if response.status_code == 200:
-                data = response.json()
-                current = data['current_condition'][0]
-
-                return {
-                    'temperature': current['temp_C'] + '°C',
-                    'feels_like': current['FeelsLikeC'] + '°C',
-                    'condition': current['weatherDesc'][0]['value'],
-                    'humidity': current['humidity'] + '%',
-                    'wind': current['windspeedKmph'] + ' km/h'
-                }
-            else:
-                return None
+            current = self._current_conditions(city)
+            return dict(current) if current else None
 
         except Exception as e:
             print(f"⚠️  Detailed weather error: {e}")
             return None
+
+    def get_weather_many(self, cities):
+        """
+        Get weather for several cities at once
+
+        Cities are fetched concurrently (within the global request limit);
+        cached ones are answered without a request.
+
+        Args:
+            cities: Iterable of city names
+
+        Returns:
+            list: One dict per distinct city: {'city', 'summary', 'details'}
+        """
+        unique = {}
+        for c in cities:
+            if c and c.strip():
+                unique.setdefault(c.strip().lower(), c.strip())
+        unique = list(unique.values())
+        if not unique:
+            return []
+
+        def lookup(city):
+            try:
+                current = self._current_conditions(city)
+            except Exception as e:
+                print(f"⚠️  Weather error for {city}: {e}")
+                current = None
+            return {'city': city, 'summary': self._summary(city, current),
+                    'details': dict(current) if current else None}
+
+        with ThreadPoolExecutor(max_workers=min(len(unique), self.max_concurrent_fetches)) as pool:
+            return list(pool.map(lookup, unique))
+
+    @staticmethod
+    def _summary(city, current):
+        """Spoken weather line from current conditions (None = lookup failed)"""
+        if current is None:
+            return f"Sorry, I couldn't get weather for {city}"
+        return f"In {city}, it's {current['condition']} with {current['temperature']}"
+
+    def _current_conditions(self, city):
+        """
+        Current conditions for a city, from the cache when possible
+
+        Fresh: returned as is. Stale (but not too old): returned as is while a
+        background refresh runs. Missing or too old: fetched now; concurrent
+        callers for the same city share that one request.
+        """
+        key = city.strip().lower()
+        with self._lock:
+            entry = self._cache.get(key)
+            age = time.time() - entry[0] if entry else None
+
+            if entry and age <= self.cache_ttl:
+                WEATHER_CACHE.inc(result='fresh')
+                return entry[1]
+
+            if entry and age <= self.max_stale:
+                WEATHER_CACHE.inc(result='stale')
+                if key not in self._inflight:
+                    self._inflight[key] = threading.Event()
+                    threading.Thread(target=self._refresh, args=(city, key), daemon=True).start()
+                return entry[1]
+
+            WEATHER_CACHE.inc(result='miss')
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            self._refresh(city, key)
+        elif not pending.wait(call_timeout(self.request_timeout)):
+            raise DeadlineExceeded(f"weather for {city} is taking too long")
+
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry[1] if entry and time.time() - entry[0] <= self.max_stale else None
+
+    def _refresh(self, city, key):
+        """Fetch a city's weather into the cache and release anyone waiting on it"""
+        try:
+            current = self._fetch_conditions(city)
+            if current is not None:
+                with self._lock:
+                    self._cache[key] = (time.time(), current)
+        except Exception as e:
+            print(f"⚠️  Weather refresh error for {city}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _fetch_conditions(self, city):
+        """One weather request (JSON format) for both the summary and the details"""
+        # The city may come from a request (/api/weather?cities=): keep it one path segment
+        url = f"{self.base_url}/{quote(city, safe='')}?format=j1"
+        if not self._fetch_slots.acquire(timeout=call_timeout(self.request_timeout)):
+            WEATHER_FETCHES.inc(outcome='timeout')
+            raise DeadlineExceeded("too many weather requests in flight")
+        started = time.perf_counter()
+        try:
+            with tracing.span('weather_fetch', city=city):
+                response = self.breaker.call(self._get, url, call_timeout(self.request_timeout))
+        except CircuitOpenError:
+            WEATHER_FETCHES.inc(outcome='skipped')
+            raise
+        except DeadlineExceeded:
+            WEATHER_FETCHES.inc(outcome='timeout')  # no time left to send it
+            raise
+        except Exception as e:
+            WEATHER_FETCHES.inc(outcome='timeout' if isinstance(e, requests.Timeout) else 'error')
+            WEATHER_SECONDS.observe(time.perf_counter() - started)
+            raise
+        finally:
+            self._fetch_slots.release()
+        WEATHER_SECONDS.observe(time.perf_counter() - started)
+        if response.status_code != 200:
+            WEATHER_FETCHES.inc(outcome='not_found')
+            return None
+        WEATHER_FETCHES.inc(outcome='ok')
+
+        current = response.json()['current_condition'][0]
+        return {
+            'temperature': current['temp_C'] + '°C',
+            'feels_like': current['FeelsLikeC'] + '°C',
+            'condition': current['weatherDesc'][0]['value'].strip(),
+            'humidity': current['humidity'] + '%',
+            'wind': current['windspeedKmph'] + ' km/h'
+        }
+
+    def _get(self, url, timeout):
+        """GET that counts server errors as failures (an unknown city is not one)"""
+        response = self.session.get(url, timeout=timeout)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
@@ -6,7 +6,9 @@ A web-based chat interface similar to ChatGPT/Gemini
 import os
 import sys
 import re
-from flask import Flask, render_template, request, jsonify, Response
+import time
+import math
+from flask import Flask, render_template, request, jsonify, Response, g
 from flask_cors import CORS
 from dotenv import load_dotenv
 import json
@@ -14,11 +16,21 @@ import json
 # Add parent directory to path to import existing modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_brain import AIBrain
-from weather_time_module import WeatherTimeModule
-from youtube_player import YouTubePlayer
-from alarm_module import AlarmModule
-from urdu_support import UrduSupport
+launched_at = time.perf_counter()
+
+from components import ComponentRegistry, startup_report
+from alarm_schedule import parse_schedule, parse_reminder_label
+from resilience import interaction_budget
+from music_jobs import MusicJob, MusicJobs, TooManyJobs, ENQUEUE
+from concurrency import limiter_from_env
+from event_hub import EventHub
+import metrics
+import tracing
+
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None  # no /ws endpoint; chat.js falls back to SSE
 
 # Load environment variables from parent directory
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
@@ -26,7 +38,7 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file_
 app = Flask(__name__)
 CORS(app)
 
-# Initialize AI Brain
+# AI provider settings
 ai_provider = os.getenv("AI_PROVIDER", "openai").lower()
 if ai_provider == "openai":
     api_key = os.getenv("OPENAI_API_KEY")
@@ -35,24 +47,130 @@ elif ai_provider == "gemini":
 else:
     raise ValueError(f"Unknown AI provider: {ai_provider}")
 
-ai_brain = AIBrain(provider=ai_provider, api_key=api_key)
-
-# Weather/Time module
 city = os.getenv("CITY", "Karachi")
 timezone = os.getenv("TIMEZONE", "Asia/Karachi")
-weather_time = WeatherTimeModule(city=city, timezone=timezone)
 
-# YouTube player for music
-youtube_player = YouTubePlayer()
+# Longest a command may spend on external lookups (weather, YouTube) before answering
+interaction_budget_seconds = float(os.getenv("INTERACTION_BUDGET_SECONDS", "8"))
+
+# Requests of each kind that may run at once (and wait for a slot) before
+# clients get 429/503; see concurrency.py
+chat_limit = limiter_from_env('chat', max_concurrent=8, max_queued=16)
+weather_limit = limiter_from_env('weather', max_concurrent=4, max_queued=8)
+music_limit = limiter_from_env('music', max_concurrent=4, max_queued=8)
+socket_limit = limiter_from_env('socket', max_concurrent=16, max_queued=0)
+events_limit = limiter_from_env('events', max_concurrent=16, max_queued=0)
+# Quick routes that can still block briefly (player and alarm locks, journal writes)
+control_limit = limiter_from_env('control', max_concurrent=8, max_queued=16)
+route_limits = (chat_limit, weather_limit, music_limit, socket_limit, events_limit, control_limit)
+
+# Server-side events (alarms, track changes) for connected browsers
+event_hub = EventHub(queue_size=int(os.getenv("EVENT_QUEUE_SIZE", "100")))
+
+# Served at /metrics, next to what the assistant's modules record
+COMMANDS_ROUTED = metrics.counter('commands_routed_total', 'Messages by where they went (command, music, ai)',
+                                  ('source', 'route'))
+metrics.gauge('event_subscribers', 'Browsers receiving server events').set_function(
+    lambda: event_hub.subscriber_count)
+
+
+def make_ai_brain():
+    from ai_brain import AIBrain
+    return AIBrain(provider=ai_provider, api_key=api_key)
+
+
+def make_weather_time():
+    from weather_time_module import WeatherTimeModule
+    return WeatherTimeModule(
+        city=city,
+        timezone=timezone,
+        cache_ttl=float(os.getenv("WEATHER_CACHE_TTL_MINUTES", "10")) * 60,
+        max_concurrent_fetches=int(os.getenv("WEATHER_MAX_CONCURRENT_FETCHES", "4")),
+        base_url=os.getenv("WEATHER_BASE_URL", "http://wttr.in"),
+    )
+
+
+# Played songs are kept on disk if AUDIO_CACHE_MB is set
+def make_audio_cache():
+    audio_cache_mb = float(os.getenv("AUDIO_CACHE_MB", "0"))
+    if audio_cache_mb <= 0:
+        return None
+    from audio_cache import AudioCache
+    return AudioCache(os.getenv("AUDIO_CACHE_DIR", "audio_cache"), max_bytes=int(audio_cache_mb * 1024 * 1024))
+
+
+def make_youtube_player():
+    from youtube_player import YouTubePlayer
+    player = YouTubePlayer(audio_cache=components.get('audio_cache'))
+    player.on_track_change = lambda entry: event_hub.publish('track', now_playing=entry)
+    return player
+
 
-# Alarm module
 def on_alarm_triggered(label):
     print(f"🔔 Alarm triggered: {label}")
 
-alarm_module = AlarmModule(alarm_callback=on_alarm_triggered)
 
-# Urdu language support
-urdu_support = UrduSupport()
+def make_alarm_module():
+    from alarm_module import AlarmModule
+    return AlarmModule(
+        alarm_callback=on_alarm_triggered,
+        events=event_hub,  # alarm events reach browsers through /ws and /api/events
+        missed_policy=os.getenv("ALARM_MISSED_POLICY", "grace").lower(),
+        missed_grace=float(os.getenv("ALARM_MISSED_GRACE_MINUTES", "15")) * 60,
+    )
+
+
+def make_urdu_support():
+    from urdu_support import UrduSupport
+    return UrduSupport()
+
+
+# "play ..." searches run in the background; the chat answers right away
+def make_music_jobs():
+    return MusicJobs(components.get('youtube_player'), budget=interaction_budget_seconds,
+                     max_pending=int(os.getenv("MUSIC_MAX_PENDING_SEARCHES", "8")))
+
+
+# Independent components start at the same time on a thread pool, each as
+# soon as what it depends on is ready; the app serves once all are up
+components = ComponentRegistry(epoch=launched_at)
+components.register('ai_brain', make_ai_brain)
+components.register('weather_time', make_weather_time)
+components.register('audio_cache', make_audio_cache)
+components.register('youtube_player', make_youtube_player, depends_on=('audio_cache',))
+components.register('alarm_module', make_alarm_module)
+components.register('urdu_support', make_urdu_support)
+components.register('music_jobs', make_music_jobs, depends_on=('youtube_player',))
+_startup = components.start(workers=int(os.getenv("STARTUP_WORKERS", "6")))
+
+ai_brain = _startup['ai_brain'].result()
+weather_time = _startup['weather_time'].result()
+audio_cache = _startup['audio_cache'].result()
+youtube_player = _startup['youtube_player'].result()
+alarm_module = _startup['alarm_module'].result()
+urdu_support = _startup['urdu_support'].result()
+music_jobs = _startup['music_jobs'].result()
+
+if os.getenv("STARTUP_REPORT", "false").lower() == "true":
+    print("\n" + startup_report(components, ready_after=time.perf_counter() - launched_at) + "\n")
+
+
+@app.before_request
+def start_trace():
+    """Trace each API request (WebSocket chat turns are traced one by one instead)"""
+    if request.path.startswith('/api/') and request.path != '/api/events':
+        rule = request.url_rule.rule if request.url_rule else request.path
+        g.trace = tracing.get_tracer().start(f"{request.method} {rule}")
+
+
+@app.after_request
+def finish_trace(response):
+    """Write the request's trace once the response is sent (streamed replies included)"""
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace.attrs['status'] = response.status_code
+        response.call_on_close(lambda: tracing.get_tracer().finish(trace))
+    return response
 
 
 @app.route('/')
@@ -62,6 +180,7 @@ def index():
 
 
 @app.route('/api/chat', methods=['POST'])
+@chat_limit
 def chat():
     """Handle chat messages"""
     data = request.get_json()
@@ -73,6 +192,14 @@ def chat():
     # Check for special commands
     response = handle_special_commands(user_message)
 
+    if isinstance(response, MusicJob):
+        # Poll /api/music/jobs/<job_id> to see how the search goes
+        return jsonify({
+            'response': response.message,
+            'job_id': response.id,
+            'status': 'success'
+        })
+
     if response is None:
         # Get AI response
         response = ai_brain.get_response(user_message)
@@ -84,6 +211,7 @@ def chat():
 
 
 @app.route('/api/chat/stream', methods=['POST'])
+@chat_limit
 def chat_stream():
     """Handle chat messages with streaming response (like ChatGPT)"""
     data = request.get_json()
@@ -92,32 +220,154 @@ def chat_stream():
     if not user_message:
         return jsonify({'error': 'No message provided'}), 400
 
+    chunks = chat_chunks(user_message)
+    return Response((f"data: {json.dumps(chunk)}\n\n" for chunk in chunks), mimetype='text/event-stream')
+
+
+def chat_chunks(user_message):
+    """
+    The reply to one chat message, piece by piece (for SSE and the WebSocket)
+
+    Yields:
+        dict: {'content', 'done'}, plus 'event' for music search progress or 'error'
+    """
     # Check for special commands first
     special_response = handle_special_commands(user_message)
 
+    if isinstance(special_response, MusicJob):
+        # Follow the music search, one line per step, until it plays, is queued or fails
+        job = special_response
+        for event in job.follow():
+            text = event['message'] if event['state'] != 'queued' else ''
+            if text and not text.endswith(('.', '!', '?')):
+                text += '.'
+            yield {'content': text and text + ' ', 'event': dict(event, job_id=job.id), 'done': False}
+        closing = "Say 'stop music' to stop." if job.state == 'playing' else ''
+        yield {'content': closing, 'done': True}
+        return
+
     if special_response:
         # For special commands, return immediately
-        def generate_special():
-            yield f"data: {json.dumps({'content': special_response, 'done': True})}\n\n"
-        return Response(generate_special(), mimetype='text/event-stream')
+        yield {'content': special_response, 'done': True}
+        return
 
     # Stream AI response
+    try:
+        response = ai_brain.get_response(user_message)
+        # Simulate streaming by sending word by word
+        words = response.split()
+        for i, word in enumerate(words):
+            chunk = word + (' ' if i < len(words) - 1 else '')
+            yield {'content': chunk, 'done': False}
+        yield {'content': '', 'done': True}
+    except Exception as e:
+        yield {'error': str(e), 'done': True}
+
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/ws')
+    def chat_socket(ws):
+        """
+        Persistent chat connection
+
+        Client -> server: {"type": "chat", "id": 1, "message": "..."} or {"type": "ping"}
+        Server -> client: {"type": "chat", "id": 1, ...same chunks as the SSE stream...},
+                          {"type": "event", "id": 7, "event": "alarm_rang", "time": ..., "data": {...}},
+                          {"type": "pong"}
+
+        Events: alarm_set, alarm_cancelled, alarm_snoozed ({"alarm": ...}, which
+        is null when every alarm was cancelled), alarm_rang ({"alarm", "label"})
+        and track ({"now_playing": entry or null when the music ends})
+        """
+        if socket_limit.acquire() is not None:
+            ws.send(json.dumps({'type': 'error', 'error': 'Too many open connections'}))
+            return
+        try:
+            with event_hub.subscribe() as events:
+                while True:
+                    _send_events(ws, events)
+                    raw = ws.receive(timeout=0.5)
+                    if raw is None:
+                        continue
+                    try:
+                        message = json.loads(raw)
+                    except ValueError:
+                        ws.send(json.dumps({'type': 'error', 'error': 'Messages must be JSON'}))
+                        continue
+
+                    if message.get('type') == 'ping':
+                        ws.send(json.dumps({'type': 'pong'}))
+                    elif message.get('type') == 'chat':
+                        _socket_chat_turn(ws, events, message.get('id'), (message.get('message') or '').strip())
+        finally:
+            socket_limit.release()
+
+
+def _socket_chat_turn(ws, events, turn_id, user_message):
+    """Answer one chat message over the WebSocket, passing on server events as they come"""
+    if not user_message:
+        ws.send(json.dumps({'type': 'chat', 'id': turn_id, 'error': 'No message provided', 'done': True}))
+        return
+    # Same limit as the HTTP chat routes
+    if chat_limit.acquire() is not None:
+        ws.send(json.dumps({'type': 'chat', 'id': turn_id, 'error': 'Server is busy, try again shortly',
+                            'done': True}))
+        return
+    try:
+        with tracing.trace('WS chat'):
+            for chunk in chat_chunks(user_message):
+                ws.send(json.dumps({'type': 'chat', 'id': turn_id, **chunk}))
+                _send_events(ws, events)
+    finally:
+        chat_limit.release()
+
+
+def _send_events(ws, events):
+    """Forward the server events waiting for this connection"""
+    for event in events.drain():
+        ws.send(json.dumps({'type': 'event', **event}))
+
+
+@app.route('/api/events', methods=['GET'])
+@events_limit
+def events_stream():
+    """
+    Server events as SSE (for browsers without the WebSocket)
+
+    Each event is sent as `event: <type>` with its JSON; a comment line
+    every 15 seconds keeps idle connections open.
+    """
+    subscription = event_hub.subscribe()
+
     def generate():
         try:
-            response = ai_brain.get_response(user_message)
-            # Simulate streaming by sending word by word
-            words = response.split()
-            for i, word in enumerate(words):
-                chunk = word + (' ' if i < len(words) - 1 else '')
-                yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
-            yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+            yield ": connected\n\n"
+            while True:
+                event = subscription.get(timeout=15)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.call_on_close(subscription.close)  # also if the stream never started
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 
-    return Response(generate(), mimetype='text/event-stream')
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Counters, gauges and latency histograms in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/api/reset', methods=['POST'])
+@control_limit
 def reset_conversation():
     """Reset conversation history"""
     ai_brain.reset_conversation()
@@ -134,15 +384,275 @@ def status():
     })
 
 
+@app.route('/api/limits', methods=['GET'])
+def limits():
+    """Per-route concurrency limits, current load and rejections"""
+    return jsonify({'limits': {limit.name: limit.stats() for limit in route_limits}, 'status': 'success'})
+
+
+@app.route('/api/weather', methods=['GET'])
+@weather_limit
+def weather():
+    """Weather for one or more cities: /api/weather?cities=Karachi,Lahore"""
+    cities = [c for c in request.args.get('cities', '').split(',') if c.strip()] or [city]
+    return jsonify({'weather': weather_time.get_weather_many(cities), 'status': 'success'})
+
+
+@app.route('/api/music/cache', methods=['GET'])
+def music_cache_stats():
+    """YouTube search/stream cache hit rates and sizes"""
+    return jsonify({'cache': youtube_player.cache_stats(), 'status': 'success'})
+
+
+@app.route('/api/music/saved', methods=['GET'])
+def music_saved():
+    """Songs kept on disk by the audio cache, most recently played first"""
+    songs = audio_cache.entries() if audio_cache else []
+    return jsonify({'songs': songs, 'enabled': audio_cache is not None, 'status': 'success'})
+
+
+@app.route('/api/music/saved', methods=['POST'])
+@music_limit
+def music_pin():
+    """Keep a song on disk for good: {query} (default: the current song)"""
+    query = ((request.get_json(silent=True) or {}).get('query') or '').strip()
+    success, message = youtube_player.pin(query or None)
+    return jsonify({'message': message, 'status': 'success' if success else 'error'}), 200 if success else 400
+
+
+@app.route('/api/music/saved/<video_id>', methods=['DELETE'])
+@control_limit
+def music_unpin(video_id):
+    """Let a kept song be evicted again"""
+    success, message = youtube_player.unpin(video_id)
+    return jsonify({'message': message, 'status': 'success' if success else 'error'}), 200 if success else 404
+
+
+@app.route('/api/music/queue', methods=['GET'])
+def music_queue():
+    """Current song and the songs queued after it"""
+    return jsonify({**youtube_player.get_queue(), 'status': 'success'})
+
+
+@app.route('/api/music/queue', methods=['POST'])
+@music_limit
+def music_enqueue():
+    """
+    Add a song to the queue: {query}
+
+    The search runs in the background; poll /api/music/jobs/<job_id> to see
+    when the song is added (or starts, if nothing was playing).
+    """
+    query = ((request.get_json(silent=True) or {}).get('query') or '').strip()
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    try:
+        job = music_jobs.submit(query, ENQUEUE)
+    except TooManyJobs as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'message': job.message, 'job_id': job.id, 'status': 'success'}), 202
+
+
+@app.route('/api/music/queue', methods=['DELETE'])
+@control_limit
+def music_clear_queue():
+    """Empty the queue (the current song keeps playing)"""
+    success, message = youtube_player.clear_queue()
+    return jsonify({'message': message, 'status': 'success'})
+
+
+@app.route('/api/music/jobs/<job_id>', methods=['GET'])
+def music_job_status(job_id):
+    """State and progress events of a background music search"""
+    job = music_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'No such job'}), 404
+    return jsonify({'job': job.to_dict(), 'status': 'success'})
+
+
+@app.route('/api/music/next', methods=['POST'])
+@music_limit
+def music_next():
+    """Skip to the next queued song"""
+    success, message = youtube_player.skip()
+    return jsonify({'message': message, **youtube_player.get_queue(),
+                    'status': 'success' if success else 'error'})
+
+
+@app.route('/api/music/status', methods=['GET'])
+@control_limit
+def music_status():
+    """What's playing and where playback is (position/duration need mpv)"""
+    return jsonify({
+        'playing': youtube_player.is_playing_music(),
+        'paused': youtube_player.paused,
+        'playback': youtube_player.position(),
+        **youtube_player.get_queue(),
+        'status': 'success'
+    })
+
+
+@app.route('/api/music/control', methods=['POST'])
+@music_limit
+def music_control():
+    """Control playback: {action: pause|resume|stop|next|seek|volume, value}"""
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    try:
+        if action == 'pause':
+            success, message = youtube_player.pause()
+        elif action == 'resume':
+            success, message = youtube_player.resume()
+        elif action == 'stop':
+            success, message = youtube_player.stop()
+        elif action == 'next':
+            success, message = youtube_player.next()
+        elif action == 'seek':
+            success, message = youtube_player.seek(float(data.get('value', 0)), relative=data.get('relative', True))
+        elif action == 'volume':
+            success, message = youtube_player.set_volume(max(0.0, min(1.0, float(data.get('value')))))
+        else:
+            return jsonify({'error': f'Unknown action: {action}'}), 400
+    except (TypeError, ValueError):
+        return jsonify({'error': 'value must be a number'}), 400
+
+    return jsonify({'message': message, 'status': 'success' if success else 'error'})
+
+
+@app.route('/api/alarms', methods=['GET'])
+@control_limit
+def list_alarms():
+    """List scheduled alarms and reminders, soonest first"""
+    return jsonify({'alarms': alarm_module.list_alarms(), 'status': 'success'})
+
+
+# Alarm times given to the API: 24-hour 'HH:MM'
+ALARM_TIME_PATTERN = re.compile(r'^([01]?\d|2[0-3]):[0-5]\d$')
+MAX_SNOOZE_MINUTES = 24 * 60
+
+
+@app.route('/api/alarms', methods=['POST'])
+@control_limit
+def create_alarm():
+    """Create an alarm or reminder from JSON: {time, label, repeat, kind}"""
+    data = request.get_json() or {}
+    kind = data.get('kind', 'alarm')
+    if kind not in ('alarm', 'reminder'):
+        return jsonify({'error': f'Unknown kind: {kind}'}), 400
+    if not data.get('time') and not data.get('repeat'):
+        return jsonify({'error': 'Provide a time (HH:MM) or a repeat rule'}), 400
+    if data.get('time') and not (isinstance(data['time'], str) and ALARM_TIME_PATTERN.match(data['time'])):
+        return jsonify({'error': 'time must be a string like "07:30" (24-hour HH:MM)'}), 400
+    if data.get('repeat') and not isinstance(data['repeat'], dict):
+        return jsonify({'error': 'repeat must be an object'}), 400
+
+    try:
+        alarm = alarm_module.create_alarm(data.get('time'), data.get('label') or kind.capitalize(),
+                                          repeat=data.get('repeat'), kind=kind)
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({'error': f'Invalid alarm: {e}'}), 400
+    if alarm is None:
+        return jsonify({'error': 'Those dates have already passed'}), 400
+    return jsonify({'alarm': alarm, 'status': 'success'}), 201
+
+
+@app.route('/api/alarms/<alarm_id>', methods=['DELETE'])
+@control_limit
+def delete_alarm(alarm_id):
+    """Cancel one alarm by id"""
+    if not alarm_module.cancel_alarm(alarm_id):
+        return jsonify({'error': 'No such alarm'}), 404
+    return jsonify({'status': 'success'})
+
+
+@app.route('/api/alarms/<alarm_id>/snooze', methods=['POST'])
+@control_limit
+def snooze_alarm(alarm_id):
+    """Ring an alarm again in a few minutes: {minutes}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        minutes = float(data.get('minutes', 9))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'minutes must be a number'}), 400
+    if not math.isfinite(minutes) or not 0 < minutes <= MAX_SNOOZE_MINUTES:
+        return jsonify({'error': f'minutes must be more than 0 and at most {MAX_SNOOZE_MINUTES}'}), 400
+
+    alarm = alarm_module.snooze_alarm(alarm_id, minutes=minutes)
+    if alarm is None:
+        return jsonify({'error': 'No such alarm'}), 404
+    return jsonify({'alarm': alarm, 'status': 'success'})
+
+
 def handle_special_commands(text):
-    """Handle special commands like weather, time, music, alarms, etc."""
+    """
+    Handle special commands like weather, time, music, alarms, etc.
+
+    Returns:
+        str, MusicJob or None: The reply, a started music search, or None for the AI
+    """
+    tracing.annotate(text=text[:80])
+    with interaction_budget(interaction_budget_seconds), tracing.span('command') as span:
+        response = _handle_special_commands(text)
+        span['handled'] = response is not None
+    route = 'music' if isinstance(response, MusicJob) else 'command' if response is not None else 'ai'
+    COMMANDS_ROUTED.inc(source='web', route=route)
+    tracing.annotate(route=route)
+    return response
+
+
+def _handle_special_commands(text):
+    """Route one command (runs inside the interaction budget)"""
     # Check for Urdu and translate if needed
-    if urdu_support.detect_urdu(text):
-        print(f"🇵🇰 Urdu detected: '{text}'")
-        text = urdu_support.translate_to_english(text)
+    with tracing.span('urdu') as span:
+        if urdu_support.detect_urdu(text):
+            print(f"🇵🇰 Urdu detected: '{text}'")
+            span['translated'] = True
+            text = urdu_support.translate_to_english(text)
 
     text_lower = text.lower()
 
+    # Reminder commands ("yaad dilao" arrives here as "remind me")
+    if "remind me" in text_lower:
+        label = parse_reminder_label(text)
+        alarm_time, repeat = parse_schedule(text_lower)
+        if not label:
+            return "What should I remind you about?"
+        if not alarm_time and not repeat:
+            return "When should I remind you? Try 'remind me to stretch at 5 pm' or '... every 30 minutes'."
+        return alarm_module.add_reminder(label, alarm_time, repeat=repeat)
+
+    # "cancel my 7 am alarm", "cancel all alarms"
+    if re.search(r'\b(?:cancel|delete|remove)\b.*\b(?:alarm|reminder)s?\b', text_lower):
+        return alarm_module.cancel_described(text_lower)
+
+    # Play queue commands
+    if "skip" in text_lower or "next song" in text_lower:
+        success, message = youtube_player.skip()
+        return message
+
+    if "queue" in text_lower:
+        if "clear" in text_lower or "empty" in text_lower:
+            success, message = youtube_player.clear_queue()
+            return message
+        if "what" in text_lower or "show" in text_lower or "list" in text_lower:
+            return youtube_player.describe_queue()
+        # "add shape of you to the queue", "queue shape of you"
+        song_query = re.sub(r'\b(?:add|queue|to (?:the |my )?queue|play|the song|please)\b', '',
+                            text, flags=re.IGNORECASE)
+        song_query = ' '.join(song_query.split())
+        if len(song_query) <= 1:
+            return "Which song should I add to the queue?"
+        # Searched in the background like "play ..."
+        try:
+            return music_jobs.submit(song_query, ENQUEUE)
+        except TooManyJobs:
+            return "I'm already looking for a few songs. Please try again in a moment."
+
+    # Keep the current song on disk for offline listening
+    if "save this song" in text_lower or "keep this song" in text_lower:
+        success, message = youtube_player.pin()
+        return message
+
     # Music/YouTube commands - improved parsing
     if "play" in text_lower:
         song_query = text  # Use original text to preserve capitalization
@@ -163,19 +673,20 @@ def handle_special_commands(text):
         if song_query and len(song_query) > 1:
             print(f"🎵 Extracted song query: '{song_query}'")
 
-            # Run YouTube search
-            success, message = youtube_player.search_and_play(song_query)
-
-            if success:
-                return f"Playing {song_query} now! Say 'stop music' to stop."
-            else:
-                return f"Sorry, I couldn't find {song_query}. Please try a different song name."
+            # Search in the background; the caller reports the job's progress
+            try:
+                return music_jobs.submit(song_query)
+            except TooManyJobs:
+                return "I'm already looking for a few songs. Please try again in a moment."
         else:
             return "What song would you like me to play?"
 
     # Stop/pause music commands
     if youtube_player.is_playing_music():
-        if "stop" in text_lower or "pause" in text_lower:
+        if "pause" in text_lower:
+            success, message = youtube_player.pause()
+            return "Music paused. Say 'resume music' to continue." if success else message
+        if "stop" in text_lower:
             print("✅ Stop command detected! Stopping music...")
             success, message = youtube_player.stop()
             if success:
@@ -183,6 +694,10 @@ def handle_special_commands(text):
             else:
                 return "Stopping music."
 
+    if "resume" in text_lower or "continue music" in text_lower or "unpause" in text_lower:
+        success, message = youtube_player.resume()
+        return message
+
     # If no music playing, require full phrase
     if "stop music" in text_lower or "stop the music" in text_lower or "pause music" in text_lower:
         success, message = youtube_player.stop()
@@ -209,30 +724,24 @@ def handle_special_commands(text):
 
     # Alarm commands
     if "set alarm" in text_lower or "alarm lagao" in text_lower or ("set" in text_lower and "alarm" in text_lower):
-        # Extract time from command (simple parsing)
-        time_pattern = r'(\d{1,2}):(\d{2})|(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)'
-        time_match = re.search(time_pattern, text_lower)
-
-        if time_match:
-            if time_match.group(1):  # HH:MM format
-                alarm_time = f"{time_match.group(1)}:{time_match.group(2)}"
-            else:  # Hour with AM/PM
-                hour = time_match.group(3)
-                period = time_match.group(4)
-                alarm_time = f"{hour}:00"
-                if 'pm' in period or 'p.m' in period:
-                    alarm_time = f"{int(hour) + 12}:00"
-
-            message = alarm_module.add_alarm(alarm_time, "Alarm")
+        # Extract time and repetition ("every weekday at 7 am")
+        alarm_time, repeat = parse_schedule(text_lower)
+
+        if alarm_time or repeat:
+            message = alarm_module.add_alarm(alarm_time, "Alarm", repeat=repeat)
             return message
         else:
             return "What time should I set the alarm for? Please say something like 'set alarm for 7:00 AM'."
 
-    if "cancel alarm" in text_lower or "delete alarm" in text_lower:
-        message = alarm_module.cancel_all_alarms()
-        return message
+    if "snooze" in text_lower:
+        match = re.search(r'(\d+)\s*min', text_lower)
+        minutes = int(match.group(1)) if match else 9
+        if alarm_module.snooze_alarm(minutes=minutes):
+            return f"Okay, I'll ring again in {minutes} minutes"
+        return "There's no alarm to snooze"
 
-    if ("show" in text_lower or "list" in text_lower or "my" in text_lower) and "alarm" in text_lower:
+    if ("show" in text_lower or "list" in text_lower or "my" in text_lower) and \
+            ("alarm" in text_lower or "reminder" in text_lower):
         message = alarm_module.get_alarms()
         return message
 
@@ -259,6 +768,8 @@ def handle_special_commands(text):
                 "• Play music (e.g., 'play shape of you')\n"
                 "• Check the weather\n"
                 "• Tell you the time or date\n"
+                "• Queue songs (e.g., 'add shape of you to the queue', 'skip')\n"
+                "• Save songs for offline listening (e.g., 'save this song')\n"
                 "• Set alarms\n"
                 "• Tell jokes\n"
                 "• Answer questions\n"
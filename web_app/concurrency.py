@@ -0,0 +1,145 @@
+"""
+Concurrency Limits for the Web App
+Caps how many requests of each kind run at once, with a short bounded queue
+A request that finds every slot taken waits in the queue for a while; if the
+queue is full it gets 429 right away, and if no slot frees up in time it gets
+503. Either way the client is told when to retry, so a burst of chats waiting
+on the AI can't take every server thread.
+"""
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify
+
+import metrics
+
+LIMIT_ACTIVE = metrics.gauge('web_route_active_requests', 'Requests holding a slot, per route group', ('route',))
+LIMIT_QUEUED = metrics.gauge('web_route_queued_requests', 'Requests waiting for a slot, per route group', ('route',))
+LIMIT_WAIT = metrics.histogram('web_route_queue_wait_seconds', 'Time queued requests waited for a slot', ('route',))
+LIMIT_REJECTED = metrics.counter('web_route_rejected_total', 'Requests turned away, per route group and status',
+                                 ('route', 'status'))
+
+
+class RouteLimiter:
+    def __init__(self, name, max_concurrent, max_queued=0, queue_timeout=10.0, retry_after=2):
+        """
+        Create a limit for one group of routes
+
+        Args:
+            name: Name shown in errors and stats (e.g. 'chat')
+            max_concurrent: Requests that may run at once
+            max_queued: Requests that may wait for a slot (beyond that: 429)
+            queue_timeout: Longest a request waits for a slot (then: 503)
+            retry_after: Seconds suggested to rejected clients (Retry-After header)
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._stats = {'active': 0, 'completed': 0, 'rejected_busy': 0, 'rejected_timeout': 0}
+        LIMIT_ACTIVE.set_function(lambda: self._stats['active'], route=name)
+        LIMIT_QUEUED.set_function(lambda: self._queued, route=name)
+
+    def acquire(self):
+        """
+        Take a slot, waiting in the queue if needed
+
+        Returns:
+            int or None: None once a slot is held, else the HTTP status to answer with
+        """
+        if self._slots.acquire(blocking=False):
+            self._started()
+            return None
+
+        with self._lock:
+            if self._queued >= self.max_queued:
+                self._stats['rejected_busy'] += 1
+                LIMIT_REJECTED.inc(route=self.name, status='429')
+                return 429
+            self._queued += 1
+        started = time.perf_counter()
+        try:
+            got_slot = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._queued -= 1
+            LIMIT_WAIT.observe(time.perf_counter() - started, route=self.name)
+        if not got_slot:
+            with self._lock:
+                self._stats['rejected_timeout'] += 1
+            LIMIT_REJECTED.inc(route=self.name, status='503')
+            return 503
+        self._started()
+        return None
+
+    def release(self):
+        """Give a slot back"""
+        with self._lock:
+            self._stats['active'] -= 1
+            self._stats['completed'] += 1
+        self._slots.release()
+
+    def stats(self):
+        """Limits, current load and rejection counts, e.g. for /api/limits"""
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'queued': self._queued,
+                **self._stats,
+            }
+
+    def _started(self):
+        with self._lock:
+            self._stats['active'] += 1
+
+    def __call__(self, view):
+        """
+        Use as a route decorator: @chat_limit
+
+        The slot is held until the response is closed, so streamed (SSE)
+        responses count for as long as they're streaming.
+        """
+        @wraps(view)
+        def limited(*args, **kwargs):
+            status = self.acquire()
+            if status is not None:
+                message = "Too many requests, try again shortly" if status == 429 else \
+                    "Server is busy, try again shortly"
+                response = jsonify({'error': message, 'limit': self.name, 'status': 'error'})
+                response.status_code = status
+                response.headers['Retry-After'] = str(self.retry_after)
+                return response
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                self.release()
+                raise
+            response.call_on_close(self.release)
+            return response
+
+        return limited
+
+
+def limiter_from_env(name, max_concurrent, max_queued, queue_timeout=10.0):
+    """
+    A RouteLimiter whose sizes can be overridden by environment variables
+
+    <NAME>_MAX_CONCURRENT and <NAME>_MAX_QUEUED (e.g. CHAT_MAX_CONCURRENT),
+    and WEB_QUEUE_TIMEOUT_SECONDS for the queue wait.
+    """
+    prefix = name.upper()
+    return RouteLimiter(
+        name,
+        max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENT", str(max_concurrent))),
+        max_queued=int(os.getenv(f"{prefix}_MAX_QUEUED", str(max_queued))),
+        queue_timeout=float(os.getenv("WEB_QUEUE_TIMEOUT_SECONDS", str(queue_timeout))),
+    )
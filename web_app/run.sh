@@ -19,9 +19,13 @@ fi
 echo "📦 Checking dependencies..."
 pip install -q -r requirements.txt
 
-# Run the application
+# Run the application (--production: waitress instead of the Flask dev server)
 echo ""
 echo "🚀 Starting server..."
 echo "📡 Open http://localhost:5000 in your browser"
 echo ""
-python app.py
+if [ "$1" = "--production" ]; then
+    python serve.py
+else
+    python app.py
+fi
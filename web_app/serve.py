@@ -0,0 +1,48 @@
+"""
+Hello Kitty Web Chat - Production Server
+Serves the web app with waitress instead of Flask's development server
+
+One process, many threads: the alarm checker, the music player (one mpv)
+and the audio output live in the process, so several worker processes
+would ring every alarm and fight over the speakers. The work is almost all
+waiting on the AI, YouTube or wttr.in, which threads handle well; the
+per-route limits in concurrency.py keep a burst from tying up every thread.
+
+waitress has no WebSocket support, so browsers chat over SSE here; see the
+README for running the same app under a single threaded gunicorn worker.
+
+Usage:
+    python serve.py
+    WEB_THREADS=32 WEB_PORT=8080 python serve.py
+"""
+import os
+
+from waitress import serve
+
+from app import app, ai_provider, route_limits
+
+
+def main():
+    host = os.getenv("WEB_HOST", "0.0.0.0")
+    port = int(os.getenv("WEB_PORT", "5000"))
+
+    # Enough threads for every limited request plus the cheap routes (status, controls)
+    limited = sum(limit.max_concurrent + limit.max_queued for limit in route_limits)
+    threads = int(os.getenv("WEB_THREADS", str(limited + 8)))
+    connection_limit = int(os.getenv("WEB_CONNECTION_LIMIT", str(threads * 4)))
+
+    print("\n" + "=" * 60)
+    print("  Hello Kitty Web Chat (production server)")
+    print("=" * 60)
+    print(f"  AI Provider: {ai_provider}")
+    print(f"  Listening on http://{host}:{port} ({threads} threads)")
+    for limit in route_limits:
+        print(f"  {limit.name}: {limit.max_concurrent} at once, {limit.max_queued} waiting")
+    print("=" * 60 + "\n")
+
+    serve(app, host=host, port=port, threads=threads, connection_limit=connection_limit,
+          channel_timeout=120, ident="hello-kitty")
+
+
+if __name__ == '__main__':
+    main()
@@ -50,6 +50,9 @@ document.addEventListener('DOMContentLoaded', () => {
     loadAllSessions();
     loadChatHistory();
 
+    // Open the chat WebSocket (falls back to SSE if unavailable)
+    connectChatSocket();
+
     // Focus input
     messageInput.focus();
 });
@@ -268,6 +271,9 @@ async function sendMessage() {
     // Add user message
     addMessage('user', message);
 
+    // Alarms can then show up as system notifications
+    requestNotificationPermission();
+
     // Clear input
     messageInput.value = '';
     autoResize(messageInput);
@@ -278,57 +284,27 @@ async function sendMessage() {
     const typingId = showTypingIndicator();
 
     try {
-        // Use streaming endpoint
-        const response = await fetch('/api/chat/stream', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ message })
-        });
-
-        // Remove typing indicator
-        removeTypingIndicator(typingId);
-
-        if (!response.ok) {
-            throw new Error('Failed to get response');
-        }
-
-        // Create assistant message element
-        const messageElement = createMessageElement('assistant', '');
-        chatMessages.appendChild(messageElement);
-        const textElement = messageElement.querySelector('.message-text');
-
-        // Read streaming response
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
+        // Create assistant message element once the reply starts
+        let textElement = null;
         let fullResponse = '';
 
-        while (true) {
-            const { value, done } = await reader.read();
-            if (done) break;
-
-            const chunk = decoder.decode(value);
-            const lines = chunk.split('\n');
-
-            for (const line of lines) {
-                if (line.startsWith('data: ')) {
-                    try {
-                        const data = JSON.parse(line.slice(6));
-                        if (data.content) {
-                            fullResponse += data.content;
-                            textElement.innerHTML = formatMessage(fullResponse);
-                            scrollToBottom();
-                        }
-                        if (data.error) {
-                            textElement.innerHTML = `<span style="color: red;">Error: ${data.error}</span>`;
-                        }
-                    } catch (e) {
-                        // Ignore parse errors for incomplete chunks
-                    }
-                }
+        await streamChat(message, (data) => {
+            if (!textElement) {
+                removeTypingIndicator(typingId);
+                const messageElement = createMessageElement('assistant', '');
+                chatMessages.appendChild(messageElement);
+                textElement = messageElement.querySelector('.message-text');
             }
-        }
+            if (data.content) {
+                fullResponse += data.content;
+                textElement.innerHTML = formatMessage(fullResponse);
+                scrollToBottom();
+            }
+            if (data.error) {
+                textElement.innerHTML = `<span style="color: red;">Error: ${data.error}</span>`;
+            }
+        });
+        removeTypingIndicator(typingId);
 
         // Speak the response
         speakText(fullResponse);
@@ -351,6 +327,180 @@ async function sendMessage() {
     }
 }
 
+// Chat transport: one WebSocket for every turn plus server events (alarms,
+// track changes); the SSE endpoints are used whenever the socket isn't open
+const chatSocket = {
+    ws: null,
+    nextId: 1,
+    turns: {},          // turn id -> { onChunk, resolve, reject }
+    retryDelay: 1000,
+    supported: 'WebSocket' in window
+};
+
+function connectChatSocket() {
+    if (!chatSocket.supported) {
+        connectServerEvents();
+        return;
+    }
+
+    const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+    let ws;
+    try {
+        ws = new WebSocket(`${protocol}//${location.host}/ws`);
+    } catch (e) {
+        chatSocket.supported = false;
+        connectServerEvents();
+        return;
+    }
+    let opened = false;
+
+    ws.onopen = () => {
+        opened = true;
+        chatSocket.ws = ws;
+        chatSocket.retryDelay = 1000;
+        disconnectServerEvents();  // the socket carries them now
+    };
+
+    ws.onmessage = (msg) => {
+        let data;
+        try {
+            data = JSON.parse(msg.data);
+        } catch (e) {
+            return;
+        }
+        if (data.type === 'chat') {
+            const turn = chatSocket.turns[data.id];
+            if (!turn) return;
+            turn.onChunk(data);
+            if (data.done) {
+                delete chatSocket.turns[data.id];
+                turn.resolve();
+            }
+        } else if (data.type === 'event') {
+            handleServerEvent(data);
+        }
+    };
+
+    ws.onclose = () => {
+        if (chatSocket.ws === ws) chatSocket.ws = null;
+        // Turns in flight are lost with the connection
+        for (const [id, turn] of Object.entries(chatSocket.turns)) {
+            delete chatSocket.turns[id];
+            turn.reject(new Error('Connection lost'));
+        }
+        connectServerEvents();
+        if (!opened) {
+            // The server has no WebSocket endpoint - stay on SSE
+            chatSocket.supported = false;
+            return;
+        }
+        setTimeout(connectChatSocket, chatSocket.retryDelay);
+        chatSocket.retryDelay = Math.min(chatSocket.retryDelay * 2, 30000);
+    };
+}
+
+// Send one chat message; onChunk gets each piece of the reply ({content, done, error, event})
+function streamChat(message, onChunk) {
+    const ws = chatSocket.ws;
+    if (!ws || ws.readyState !== WebSocket.OPEN) {
+        return streamChatSSE(message, onChunk);
+    }
+    return new Promise((resolve, reject) => {
+        const id = chatSocket.nextId++;
+        chatSocket.turns[id] = { onChunk, resolve, reject };
+        ws.send(JSON.stringify({ type: 'chat', id, message }));
+    });
+}
+
+async function streamChatSSE(message, onChunk) {
+    // Use streaming endpoint
+    const response = await fetch('/api/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ message })
+    });
+
+    if (!response.ok) {
+        throw new Error('Failed to get response');
+    }
+
+    // Read streaming response
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        const chunk = decoder.decode(value);
+        const lines = chunk.split('\n');
+
+        for (const line of lines) {
+            if (line.startsWith('data: ')) {
+                try {
+                    onChunk(JSON.parse(line.slice(6)));
+                } catch (e) {
+                    // Ignore parse errors for incomplete chunks
+                }
+            }
+        }
+    }
+}
+
+// Server events (alarms, track changes) arrive over the WebSocket; without
+// it they come from the /api/events SSE stream instead
+let serverEvents = null;
+
+function connectServerEvents() {
+    if (serverEvents || !('EventSource' in window)) return;
+    serverEvents = new EventSource('/api/events');
+    for (const type of ['alarm_rang', 'alarm_snoozed', 'track']) {
+        serverEvents.addEventListener(type, (e) => {
+            try {
+                handleServerEvent(JSON.parse(e.data));
+            } catch (err) {
+                // Ignore malformed events
+            }
+        });
+    }
+}
+
+function disconnectServerEvents() {
+    if (serverEvents) {
+        serverEvents.close();
+        serverEvents = null;
+    }
+}
+
+function handleServerEvent(message) {
+    const data = message.data || {};
+    if (message.event === 'alarm_rang') {
+        showNotification(`⏰ ${data.label}`);
+        showBrowserNotification('Hello Kitty', data.label);
+        speakText(data.label);
+    } else if (message.event === 'alarm_snoozed' && data.alarm) {
+        showNotification(`😴 Snoozed: ${data.alarm.label}`);
+    } else if (message.event === 'track' && data.now_playing) {
+        showNotification(`🎵 Now playing: ${data.now_playing.title}`);
+    }
+}
+
+// System notification, so an alarm is seen even when the tab is in the background
+function showBrowserNotification(title, body) {
+    if (!('Notification' in window) || !document.hidden) return;
+    if (Notification.permission === 'granted') {
+        new Notification(title, { body });
+    }
+}
+
+function requestNotificationPermission() {
+    if ('Notification' in window && Notification.permission === 'default') {
+        Notification.requestPermission();
+    }
+}
+
 // Add Message to Chat
 function addMessage(role, content) {
     const messageElement = createMessageElement(role, content);
@@ -0,0 +1,209 @@
+"""
+YouTube Cache Module
+Remembers what searches resolved to, so replaying a song skips yt-dlp
+- Queries: normalized search text -> video id and title (saved to disk, LRU)
+- Streams: video id -> direct stream URL until it expires (LRU)
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+
+# Stream URLs without an expiry of their own are trusted this long
+DEFAULT_STREAM_TTL = 3600
+
+# Stop using a stream URL this long before it actually expires
+EXPIRY_MARGIN = 120
+
+
+def normalize_query(query):
+    """'Play  Shape of You!' and 'shape of you' map to the same key"""
+    query = re.sub(r'[^\w\s]', ' ', query.lower())
+    return ' '.join(query.split())
+
+
+def stream_expiry(url, now=None):
+    """When a stream URL stops working (googlevideo URLs carry an 'expire' timestamp)"""
+    now = now or time.time()
+    try:
+        expire = int(parse_qs(urlparse(url).query)['expire'][0])
+    except (KeyError, ValueError, IndexError):
+        return now + DEFAULT_STREAM_TTL
+    return expire - EXPIRY_MARGIN
+
+
+class YouTubeCache:
+    def __init__(self, cache_file="youtube_cache.json", max_queries=500, max_streams=200, save_interval=60.0):
+        """
+        Initialize the YouTube cache
+
+        Args:
+            cache_file: JSON file for both caches (None = memory only)
+            max_queries: Most query resolutions to keep
+            max_streams: Most stream URLs to keep
+            save_interval: Seconds between saves caused by cache hits alone (LRU order)
+        """
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.max_queries = max_queries
+        self.max_streams = max_streams
+        self.save_interval = save_interval
+        self._last_save = 0.0
+        self._dirty = False  # LRU order changed since the last save
+
+        self._lock = threading.Lock()
+        self._queries = OrderedDict()  # normalized query -> {'id', 'title'}; oldest use first
+        self._streams = OrderedDict()  # video id -> {'url', 'expires_at'}; oldest use first
+        self._stats = {
+            'query_hits': 0, 'query_misses': 0,
+            'stream_hits': 0, 'stream_misses': 0, 'stream_expired': 0,
+            'evictions': 0,
+        }
+
+        self.load()
+
+    def lookup_query(self, query):
+        """
+        Video a search resolved to before
+
+        Returns:
+            dict or None: {'id', 'title'}
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is None:
+                self._stats['query_misses'] += 1
+                return None
+            self._queries.move_to_end(key)
+            self._stats['query_hits'] += 1
+            entry = dict(entry)
+        self._touched()
+        return entry
+
+    def store_query(self, query, video_id, title):
+        """Remember what a search resolved to"""
+        key = normalize_query(query)
+        if not key or not video_id:
+            return
+        with self._lock:
+            self._queries[key] = {'id': video_id, 'title': title}
+            self._queries.move_to_end(key)
+            self._evict(self._queries, self.max_queries)
+        self.save()
+
+    def lookup_stream(self, video_id):
+        """
+        Stream URL for a video, if one is cached and still valid
+
+        Returns:
+            str or None: Direct stream URL
+        """
+        with self._lock:
+            entry = self._streams.get(video_id)
+            if entry is None:
+                self._stats['stream_misses'] += 1
+                return None
+            if entry['expires_at'] <= time.time():
+                del self._streams[video_id]
+                self._stats['stream_expired'] += 1
+                return None
+            self._streams.move_to_end(video_id)
+            self._stats['stream_hits'] += 1
+            url = entry['url']
+        self._touched()
+        return url
+
+    def has_stream(self, video_id):
+        """Whether a valid stream URL is cached (doesn't count as a lookup)"""
+        with self._lock:
+            entry = self._streams.get(video_id)
+            return entry is not None and entry['expires_at'] > time.time()
+
+    def store_stream(self, video_id, url):
+        """Remember a video's stream URL until it expires"""
+        if not video_id or not url:
+            return
+        with self._lock:
+            self._streams[video_id] = {'url': url, 'expires_at': stream_expiry(url)}
+            self._streams.move_to_end(video_id)
+            self._evict(self._streams, self.max_streams)
+        self.save()
+
+    def stats(self):
+        """Hit/miss counters and sizes, e.g. for /api/music/cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queries'] = len(self._queries)
+            stats['streams'] = len(self._streams)
+        for kind in ('query', 'stream'):
+            lookups = stats[f'{kind}_hits'] + stats[f'{kind}_misses'] + stats.get(f'{kind}_expired', 0)
+            stats[f'{kind}_hit_rate'] = round(stats[f'{kind}_hits'] / lookups, 3) if lookups else None
+        return stats
+
+    def clear(self):
+        """Forget everything"""
+        with self._lock:
+            self._queries.clear()
+            self._streams.clear()
+        self.save()
+
+    def load(self):
+        """Load both caches from disk, dropping expired stream URLs"""
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Error loading YouTube cache: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._queries = OrderedDict(data.get('queries', []))
+            self._streams = OrderedDict(
+                (video_id, entry) for video_id, entry in data.get('streams', [])
+                if entry.get('expires_at', 0) > now
+            )
+        print(f"📂 YouTube cache: {len(self._queries)} songs, {len(self._streams)} stream URLs")
+
+    def flush(self):
+        """Save if cache hits have reordered entries since the last save (e.g. at shutdown)"""
+        if self._dirty:
+            self.save()
+
+    def _touched(self):
+        """A hit moved an entry up the LRU order: save it, at most every save_interval"""
+        with self._lock:
+            self._dirty = True
+            due = time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def save(self):
+        """Write both caches to disk (atomic)"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            # Lists keep the LRU order through the round trip
+            data = {'queries': list(self._queries.items()), 'streams': list(self._streams.items())}
+            self._dirty = False
+            self._last_save = time.time()
+            try:
+                temp_file = self.cache_file.with_suffix('.tmp')
+                with open(temp_file, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_file, self.cache_file)
+            except Exception as e:
+                print(f"⚠️  Error saving YouTube cache: {e}")
+
+    def _evict(self, entries, limit):
+        """Drop least recently used entries over the limit (caller holds _lock)"""
+        while len(entries) > limit:
+            entries.popitem(last=False)
+            self._stats['evictions'] += 1
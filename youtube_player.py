@@ -1,203 +1,809 @@
 """
 YouTube Music Player Module
 Searches and plays music from YouTube
+Music plays in one long-lived mpv controlled over JSON IPC (instant stop,
+pause, volume, seek); ffplay/cvlc processes are the fallback without mpv
 """
+import atexit
 import subprocess
+import tempfile
 import threading
+import time
+import shutil
+import signal
+from concurrent.futures import ThreadPoolExecutor
 import yt_dlp
 import os
 
+from audio_output import get_audio_output, MUSIC
+from youtube_cache import YouTubeCache
+from mpv_ipc import MpvIPC, MpvError, MpvTimeout
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, call_timeout, run_with_deadline
+import metrics
+import tracing
+
+
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+
+YOUTUBE_SEARCH_SECONDS = metrics.histogram('youtube_search_seconds', 'Time to find the video for a query',
+                                           ('source',))
+YOUTUBE_SOURCES = metrics.counter('youtube_playback_sources_total',
+                                  'Where played songs came from (audio_cache, stream_cache, mpv, resolved)',
+                                  ('source',))
+YOUTUBE_START_SECONDS = metrics.histogram('youtube_playback_start_seconds',
+                                          'Time from a play request until the music starts', ('trigger',))
+YOUTUBE_PLAYS = metrics.counter('youtube_play_requests_total', '"play ..." requests by outcome', ('outcome',))
+
 
 class YouTubePlayer:
-    def __init__(self):
-        """Initialize YouTube player"""
-        self.current_process = None
+    def __init__(self, output=None, search_timeout=20.0, cache=None, prefetch_ahead=2, audio_cache=None):
+        """
+        Initialize YouTube player
+
+        Args:
+            output: AudioOutput whose music channel controls this player (default: shared)
+            search_timeout: Longest a search may take (shortened by the interaction budget)
+            cache: YouTubeCache of resolved searches (default: youtube_cache.json)
+            prefetch_ahead: Queued songs to resolve ahead of time
+            audio_cache: Optional AudioCache; played songs are kept on disk and replayed from there
+        """
+        self.current_process = None  # fallback player (ffplay/cvlc), one process per song
         self.is_playing = False
+        self.paused = False    # paused by the user
+        self._ducked = False   # held by the audio output while speech/alarm/mic is active
+        self._gain = 1.0
+
+        # mpv stays running between songs (idle) and is driven over its IPC socket
+        self.mpv = None
+        self._mpv_process = None
+        self._mpv_socket = os.path.join(tempfile.gettempdir(), f"hello-kitty-mpv-{os.getpid()}.sock")
+        self._track = 0  # bumped whenever a song starts or is stopped; end-of-song notices for older ones are ignored
+        atexit.register(self.shutdown)
+        self.search_timeout = search_timeout
+        self.search_breaker = CircuitBreaker("YouTube search")
+        self.cache = cache or YouTubeCache()
+        self.audio_cache = audio_cache
+
+        # Long-lived extractors, reused for every request (YoutubeDL isn't thread-safe, hence the locks)
+        common_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'socket_timeout': 10,
+            'retries': 1,
+            'extractor_retries': 1,
+        }
+        self._search_ydl = yt_dlp.YoutubeDL({**common_opts, 'extract_flat': 'in_playlist'})
+        self._resolve_ydl = yt_dlp.YoutubeDL({**common_opts, 'format': 'bestaudio/best'})
+        self._search_lock = threading.Lock()
+        self._resolve_lock = threading.Lock()
+
+        # mpv can resolve watch URLs itself, so playback needn't wait for phase two
+        self.mpv_path = shutil.which('mpv')
+        self._resolver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yt-resolve")
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+        # Play queue; _play_lock guards it together with the player process
+        self.queue = []           # [{'id', 'title'}], next song first
+        self.now_playing = None
+        self.on_track_change = None  # optional function(entry or None) - song started / music ended
+        self.prefetch_ahead = prefetch_ahead
+        self._play_lock = threading.RLock()
+
+        self.output = output or get_audio_output()
+        self.output.attach_music(self)
         print("✓ YouTube Player initialized")
 
-    def search_and_play(self, query):
+    def set_gain(self, gain):
+        """
+        Music channel gain, pushed by the audio output
+
+        mpv's volume is set directly. The fallback players have no volume
+        control once started, so a ducked gain holds them (SIGSTOP) until the
+        channel is clear.
+        """
+        self._gain = gain
+        if self._mpv_ready():
+            try:
+                self.mpv.set_property('volume', round(gain * 100))
+                return
+            except MpvError as e:
+                print(f"⚠️  mpv volume change failed: {e}")
+        ducked = gain < self.output.get_gain(MUSIC)
+        if ducked == self._ducked:
+            return
+        self._ducked = ducked
+        if not self.paused:
+            self._signal(signal.SIGSTOP if ducked else signal.SIGCONT)
+
+    def _signal(self, signum):
+        """Send a signal to the running fallback player, if any"""
+        if self.current_process and self.current_process.poll() is None:
+            try:
+                os.kill(self.current_process.pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def search_and_play(self, query, progress=None):
         """
         Search for a song on YouTube and play it
 
+        Songs played before start from the cache: the query maps to a video
+        id, and its stream URL is reused until it expires. Lookups are
+        bounded by the current interaction budget and skipped outright
+        while YouTube keeps failing.
+
         Args:
             query: Song name or search query
+            progress: Optional function(state, message, title=None), called
+                with 'searching', 'found' and 'playing' as the lookup goes on
 
         Returns:
             tuple: (success, message)
         """
+        report = progress or (lambda *args, **kwargs: None)
+        started = time.perf_counter()
         try:
             print(f"\n🔍 Searching YouTube for: '{query}'")
+            report('searching', f"Searching YouTube for {query}...")
 
-            # Search YouTube for the song with better options
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'quiet': False,  # Show progress
-                'no_warnings': False,  # Show warnings for debugging
-                'default_search': 'ytsearch1',
-                'extract_flat': False,
-                'socket_timeout': 30,
-                'retries': 3,
-            }
+            found = self._find(query)
+            if not found:
+                print("❌ No search results found")
+                YOUTUBE_PLAYS.inc(outcome='not_found')
+                return False, "Could not find the song on YouTube"
 
-            print("🌐 Connecting to YouTube...")
+            video_id, video_title = found
+            video_url = self._playable_url(video_id)
+            if not video_url:
+                print("❌ No playable URL found")
+                YOUTUBE_PLAYS.inc(outcome='failed')
+                return False, "Can't get video URL"
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                search_query = f"ytsearch1:{query}"
-                print(f"📝 Search query: {search_query}")
+            print(f"✅ Found: {video_title}")
+            print(f"🔗 URL obtained, starting playback...")
+            report('found', f"Found {video_title}", video_title)
 
-                info = ydl.extract_info(search_query, download=False)
+            # Play the audio
+            with self._play_lock, tracing.span('youtube_start'):
+                success = self.play_audio(video_url, video_title)
+                if success:
+                    self._started({'id': video_id, 'title': video_title})
+            if success:
+                self._prefetch()
 
-                if info and 'entries' in info and len(info['entries']) > 0:
-                    video = info['entries'][0]
-                    if not video:
-                        print("❌ No video found in search results")
-                        return False, "No results found"
+            if success:
+                YOUTUBE_START_SECONDS.observe(time.perf_counter() - started, trigger='search')
+                YOUTUBE_PLAYS.inc(outcome='playing')
+                report('playing', f"Playing {video_title}", video_title)
+                return True, f"Playing {video_title}"
+            else:
+                YOUTUBE_PLAYS.inc(outcome='failed')
+                return False, "Failed to start playback"
 
-                    video_url = video.get('url')
-                    video_title = video.get('title', 'Unknown')
+        except DeadlineExceeded as e:
+            print(f"⏱️  YouTube search gave up: {e}")
+            YOUTUBE_PLAYS.inc(outcome='timeout')
+            return False, "YouTube is taking too long"
+        except CircuitOpenError as e:
+            print(f"⚠️  {e}")
+            YOUTUBE_PLAYS.inc(outcome='skipped')
+            return False, "YouTube is unavailable right now"
+        except Exception as e:
+            print(f"❌ Error playing YouTube: {type(e).__name__}: {e}")
+            YOUTUBE_PLAYS.inc(outcome='error')
+            import traceback
+            traceback.print_exc()
+            return False, f"Error: {str(e)}"
 
-                    if not video_url:
-                        print("❌ No playable URL found")
-                        return False, "Can't get video URL"
+    def cache_stats(self):
+        """Hit rates and sizes of the search and stream caches (and the audio cache, if on)"""
+        stats = self.cache.stats()
+        if self.audio_cache:
+            stats['audio'] = self.audio_cache.stats()
+        return stats
 
-                    print(f"✅ Found: {video_title}")
-                    print(f"🔗 URL obtained, starting playback...")
+    def pin(self, query=None):
+        """
+        Keep a song in the audio cache for good
 
-                    # Play the audio
-                    success = self.play_audio(video_url, video_title)
+        Args:
+            query: Song to keep (default: the one playing now)
 
-                    if success:
-                        return True, f"Playing {video_title}"
-                    else:
-                        return False, "Failed to start playback"
-                else:
-                    print("❌ No search results found")
-                    return False, "Could not find the song on YouTube"
+        Returns:
+            tuple: (success, message)
+        """
+        if not self.audio_cache:
+            return False, "The audio cache is turned off"
+        if query:
+            try:
+                found = self._find(query)
+            except (DeadlineExceeded, CircuitOpenError):
+                return False, "YouTube is unavailable right now"
+            if not found:
+                return False, f"Could not find {query} on YouTube"
+            video_id, title = found
+        else:
+            with self._play_lock:
+                entry = self.now_playing if self.is_playing_music() else None
+            if not entry:
+                return False, "No music is playing"
+            video_id, title = entry['id'], entry['title']
 
+        downloading = self.audio_cache.pin(video_id, title)
+        if downloading:
+            return True, f"Saving {title} for offline listening"
+        return True, f"{title} is saved for offline listening"
+
+    def unpin(self, video_id):
+        """Let a kept song be evicted from the audio cache again"""
+        if not self.audio_cache or not self.audio_cache.unpin(video_id):
+            return False, "That song isn't pinned"
+        return True, "Song unpinned"
+
+    def enqueue(self, query, progress=None):
+        """
+        Add a song to the play queue (starts playing if nothing is)
+
+        Args:
+            query: Song name or search query
+            progress: Optional function(state, message, title=None), called
+                with 'searching', 'found', then 'added' or 'playing'
+
+        Returns:
+            tuple: (success, message)
+        """
+        report = progress or (lambda *args, **kwargs: None)
+        try:
+            report('searching', f"Searching YouTube for {query}...")
+            found = self._find(query)
+        except DeadlineExceeded:
+            return False, "YouTube is taking too long"
+        except CircuitOpenError:
+            return False, "YouTube is unavailable right now"
         except Exception as e:
-            print(f"❌ Error playing YouTube: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"❌ Error queueing song: {type(e).__name__}: {e}")
             return False, f"Error: {str(e)}"
+        if not found:
+            return False, f"Could not find {query} on YouTube"
+
+        video_id, title = found
+        report('found', f"Found {title}", title)
+        with self._play_lock:
+            self.queue.append({'id': video_id, 'title': title})
+            position = len(self.queue)
+            idle = not self.is_playing_music()
+
+        if idle:
+            success, message = self.play_next()
+            if success:
+                report('playing', message, title)
+            return success, message
+
+        self._prefetch()
+        print(f"➕ Queued #{position}: {title}")
+        message = f"Added {title} to the queue, it's number {position}"
+        report('added', message, title)
+        return True, message
+
+    def play_next(self):
+        """
+        Skip to the next song in the queue
+
+        Returns:
+            tuple: (success, message)
+        """
+        with self._play_lock:
+            if not self.queue:
+                return False, "The queue is empty"
+            entry = self.queue.pop(0)
+        return self._play_entry(entry)
+
+    def _play_entry(self, entry):
+        """Play a song taken off the queue, moving on to the next one if it can't be played"""
+        started = time.perf_counter()
+
+        try:
+            url = self._playable_url(entry['id'])
+        except Exception as e:
+            print(f"⚠️  Couldn't resolve {entry['title']}: {e}")
+            url = None
+        if not url:
+            played = self.play_next()
+            return played if played[0] else (False, f"Couldn't play {entry['title']}")
+
+        with self._play_lock:
+            if not self.play_audio(url, entry['title']):
+                return False, "Failed to start playback"
+            self._started(entry)
+        YOUTUBE_START_SECONDS.observe(time.perf_counter() - started, trigger='queue')
+        self._prefetch()
+        return True, f"Playing {entry['title']}"
+
+    def skip(self):
+        """Skip the current song (stops if the queue is empty)"""
+        with self._play_lock:
+            if not self.queue:
+                if not self.is_playing_music():
+                    return False, "No music is playing"
+                self.stop()
+                return True, "That was the last song"
+            entry = self.queue.pop(0)
+        return self._play_entry(entry)
+
+    def clear_queue(self):
+        """Empty the play queue (the current song keeps playing)"""
+        with self._play_lock:
+            self.queue.clear()
+        return True, "Queue cleared"
+
+    def get_queue(self):
+        """
+        Current song and upcoming songs
+
+        Returns:
+            dict: {'now_playing': entry or None, 'queue': [entries]}
+        """
+        with self._play_lock:
+            now = self.now_playing if self.is_playing_music() else None
+            return {'now_playing': dict(now) if now else None, 'queue': [dict(e) for e in self.queue]}
+
+    def describe_queue(self):
+        """Spoken summary of the queue"""
+        state = self.get_queue()
+        if not state['queue']:
+            return "The queue is empty"
+        titles = [e['title'] for e in state['queue']]
+        shown = ", ".join(titles[:5]) + (f", and {len(titles) - 5} more" if len(titles) > 5 else "")
+        return f"Up next: {shown}"
+
+    def _find(self, query):
+        """
+        Phase one: the video a query refers to, from the cache or a flat search
+
+        Returns:
+            tuple or None: (video id, title)
+        """
+        started = time.perf_counter()
+        cached = self.cache.lookup_query(query)
+        if cached:
+            YOUTUBE_SEARCH_SECONDS.observe(time.perf_counter() - started, source='cache')
+            return cached['id'], cached['title']
+
+        with YOUTUBE_SEARCH_SECONDS.time(source='youtube'), tracing.span('youtube_search'):
+            entry = self._extract(self._flat_search, query)
+        if not entry:
+            return None
+        video_id, title = entry['id'], entry.get('title') or 'Unknown'
+        self.cache.store_query(query, video_id, title)
+        return video_id, title
+
+    def _playable_url(self, video_id):
+        """
+        Phase two: something the player can open for a video
+
+        The song's audio file if it's in the audio cache, then a cached
+        stream URL if there is one. Otherwise mpv gets the watch URL
+        and resolves it with its own ytdl hook, while we fetch the stream URL
+        for the cache in the background. Without mpv the stream URL is
+        resolved here.
+        """
+        if self.audio_cache:
+            local_file = self.audio_cache.lookup(video_id)
+            if local_file:
+                print("💾 Playing from the audio cache")
+                YOUTUBE_SOURCES.inc(source='audio_cache')
+                return local_file
+
+        stream_url = self.cache.lookup_stream(video_id)
+        if stream_url:
+            print("⚡ Playing from cache")
+            YOUTUBE_SOURCES.inc(source='stream_cache')
+            return stream_url
+
+        if self.mpv_path:
+            self._resolve_in_background(video_id)
+            YOUTUBE_SOURCES.inc(source='mpv')
+            return WATCH_URL.format(video_id)
+
+        YOUTUBE_SOURCES.inc(source='resolved')
+        with tracing.span('youtube_resolve'):
+            return self._extract(self._resolve_stream, video_id)
+
+    def _prefetch(self):
+        """Resolve stream URLs for the next few queued songs so they start without a gap"""
+        with self._play_lock:
+            upcoming = [e['id'] for e in self.queue[:self.prefetch_ahead]]
+        for video_id in upcoming:
+            if self.audio_cache and self.audio_cache.contains(video_id):
+                continue
+            if not self.cache.has_stream(video_id):
+                self._resolve_in_background(video_id)
+
+    def _started(self, entry):
+        """Record the song that just started, and keep its audio if the cache is on (caller holds _play_lock)"""
+        self.now_playing = entry
+        if self.audio_cache:
+            self.audio_cache.request(entry['id'], entry['title'])
+        self._track_changed(entry)
+
+    def _track_changed(self, entry):
+        """Tell on_track_change about a new song (or None when the music ends)"""
+        if self.on_track_change:
+            try:
+                self.on_track_change(dict(entry) if entry else None)
+            except Exception as e:
+                print(f"⚠️  Track change handler error: {e}")
+
+    def _song_finished(self, track):
+        """
+        A song ended by itself: play the next one in the queue
+
+        Called from mpv's end-file event and from the thread waiting on a
+        fallback player process.
+
+        Args:
+            track: self._track when the song was playing (a stale notice is ignored)
+        """
+        try:
+            with self._play_lock:
+                if track != self._track or not self.is_playing:
+                    return
+                if self.current_process is not None and self.current_process.poll() is not None:
+                    self.current_process = None
+                self.is_playing = False
+                advance = bool(self.queue)
+            if advance:
+                print("⏭️  Song finished, playing next in queue")
+                self.play_next()
+            else:
+                self._track_changed(None)
+        except Exception as e:
+            print(f"⚠️  Queue playback error: {e}")
+
+    def _watch_process(self, process):
+        """Wait on a fallback player process in the background, moving the queue on when it exits (caller holds _play_lock)"""
+        track = self._track
+
+        def wait():
+            process.wait()
+            self._song_finished(track)
+
+        threading.Thread(target=wait, daemon=True, name="player-wait").start()
+
+    def _extract(self, func, *args):
+        """Run one yt-dlp step through the circuit breaker and the interaction deadline"""
+        timeout = call_timeout(self.search_timeout)
+        return self.search_breaker.call(run_with_deadline, func, *args, cap=timeout)
+
+    def _flat_search(self, query):
+        """
+        Phase one: find the top result's id and title without resolving formats
+
+        Returns:
+            dict or None: Flat search entry ('id', 'title')
+        """
+        print(f"📝 Search query: ytsearch1:{query}")
+        with self._search_lock:
+            info = self._search_ydl.extract_info(f"ytsearch1:{query}", download=False)
+        entries = [e for e in (info or {}).get('entries') or [] if e and e.get('id')]
+        return entries[0] if entries else None
+
+    def _resolve_stream(self, video_id):
+        """
+        Phase two: resolve a video's best audio stream URL (and cache it)
+
+        Returns:
+            str or None: Direct stream URL
+        """
+        with self._resolve_lock:
+            info = self._resolve_ydl.extract_info(WATCH_URL.format(video_id), download=False)
+        stream_url = (info or {}).get('url')
+        self.cache.store_stream(video_id, stream_url)
+        return stream_url
+
+    def _resolve_in_background(self, video_id):
+        """Resolve a stream URL for the cache without holding up playback"""
+        with self._pending_lock:
+            if video_id in self._pending:
+                return
+            self._pending.add(video_id)
+
+        def resolve():
+            try:
+                self._resolve_stream(video_id)
+            except Exception as e:
+                print(f"⚠️  Background stream resolution failed: {e}")
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(video_id)
+
+        self._resolver.submit(resolve)
+
+    def _warm_up(self):
+        """Load the YouTube extractors ahead of the first request"""
+        try:
+            self._search_ydl.get_info_extractor('YoutubeSearch')
+            self._resolve_ydl.get_info_extractor('Youtube')
+        except Exception as e:
+            print(f"⚠️  YouTube extractor warm-up failed: {e}")
 
     def play_audio(self, url, title):
         """
         Play audio from URL using available player
 
         Args:
-            url: Audio URL
+            url: Audio URL (or a YouTube watch URL, which mpv resolves itself)
             title: Song title
 
         Returns:
             bool: True if playback started successfully
         """
-        # Stop any currently playing music first
-        if self.current_process:
-            print("🔄 Stopping previous song...")
-            self.stop()
+        with self._play_lock:
+            self._track += 1
+            # Stop any fallback player first (mpv just replaces its current file)
+            if self.current_process:
+                print("🔄 Stopping previous song...")
+                self._stop_process()
+
+            if self.mpv_path:
+                try:
+                    self._ensure_mpv()
+                    self.mpv.command('loadfile', url, 'replace')
+                    self.mpv.set_property('pause', False)
+                    self.is_playing = True
+                    self.paused = False
+                    print(f"✅ Playing with mpv: {title}")
+                    return True
+                except (MpvError, OSError) as e:
+                    print(f"⚠️  mpv control failed ({e}), falling back to a one-off player")
+                    self._close_mpv()
+
+            return self._play_with_process(url, title)
+
+    def _play_with_process(self, url, title):
+        """Fallback: play with ffplay or cvlc in a process of its own (caller holds _play_lock)"""
+        # Start at the music channel's volume
+        volume = int(round(self.output.get_gain(MUSIC) * 100))
 
         try:
-            # Try mpv first (best option)
-            print("🎮 Trying mpv player...")
+            # Fallback to ffplay
             self.current_process = subprocess.Popen(
-                ['mpv', '--no-video', '--really-quiet', url],
+                ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', '-volume', str(volume), url],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
             self.is_playing = True
-            print(f"✅ Playing with mpv (PID: {self.current_process.pid}): {title}")
+            self._watch_process(self.current_process)
+            if self._ducked:
+                self._signal(signal.SIGSTOP)  # an alarm or speech is on - start held
+            print(f"✅ Playing with ffplay (PID: {self.current_process.pid}): {title}")
             return True
 
         except FileNotFoundError:
-            print("⚠️  mpv not found, trying ffplay...")
+            print("⚠️  ffplay not found, trying vlc...")
             try:
-                # Fallback to ffplay
+                # Fallback to vlc
                 self.current_process = subprocess.Popen(
-                    ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', url],
+                    ['cvlc', '--play-and-exit', '--quiet', url],
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.DEVNULL
                 )
                 self.is_playing = True
-                print(f"✅ Playing with ffplay (PID: {self.current_process.pid}): {title}")
+                self._watch_process(self.current_process)
+                if self._ducked:
+                    self._signal(signal.SIGSTOP)  # an alarm or speech is on - start held
+                print(f"✅ Playing with vlc (PID: {self.current_process.pid}): {title}")
                 return True
 
             except FileNotFoundError:
-                print("⚠️  ffplay not found, trying vlc...")
-                try:
-                    # Fallback to vlc
-                    self.current_process = subprocess.Popen(
-                        ['cvlc', '--play-and-exit', '--quiet', url],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-                    self.is_playing = True
-                    print(f"✅ Playing with vlc (PID: {self.current_process.pid}): {title}")
-                    return True
-
-                except FileNotFoundError:
-                    print("❌ No media player found!")
-                    print("📝 Install one with: sudo apt-get install mpv")
-                    return False
+                print("❌ No media player found!")
+                print("📝 Install one with: sudo apt-get install mpv")
+                return False
         except Exception as e:
             print(f"❌ Error starting playback: {e}")
             return False
 
     def stop(self):
-        """Stop currently playing music"""
-        stopped = False
+        """Stop currently playing music (the queue is kept)"""
+        with self._play_lock:
+            was_playing = self.is_playing_music()
 
-        # First, try to stop the process we know about
-        if self.current_process:
-            try:
-                print("🛑 Terminating music player...")
-                self.current_process.terminate()
+            if self._mpv_ready():
                 try:
-                    self.current_process.wait(timeout=2)
-                    stopped = True
-                    print("✓ Music player terminated")
-                except:
-                    # If terminate doesn't work, force kill
-                    print("🔨 Force killing music player...")
-                    self.current_process.kill()
-                    self.current_process.wait(timeout=1)
-                    stopped = True
-                    print("✓ Music player killed")
-            except Exception as e:
-                print(f"⚠️  Error stopping process: {e}")
+                    self.mpv.command('stop')  # mpv stays running, idle
+                except MpvError as e:
+                    print(f"⚠️  mpv stop failed ({e}), shutting it down")
+                    self._close_mpv()
+            if self.current_process:
+                self._stop_process()
 
-        # Also try pkill as backup (without sudo, only kills user processes)
-        try:
-            subprocess.run(['pkill', 'mpv'], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-            subprocess.run(['pkill', 'ffplay'], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-            subprocess.run(['pkill', 'vlc'], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-            subprocess.run(['pkill', 'cvlc'], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-            stopped = True
-        except:
-            pass
-
-        self.current_process = None
-        self.is_playing = False
+            self.is_playing = False
+            self.paused = False
+            self._track += 1
 
-        if stopped or not self.is_playing_music():
-            print("⏹️  Music stopped")
-            return True, "Music stopped"
-        else:
-            print("⚠️  Music may still be playing")
-            return False, "Could not stop music"
+        print("⏹️  Music stopped")
+        if was_playing:
+            self._track_changed(None)
+        return (True, "Music stopped") if was_playing else (False, "No music was playing")
+
+    def _stop_process(self):
+        """Stop the fallback player process (caller holds _play_lock)"""
+        process, self.current_process = self.current_process, None
+        try:
+            if process.poll() is None:
+                process.send_signal(signal.SIGCONT)  # a held (ducked) process can't act on SIGTERM
+                process.terminate()
+                try:
+                    process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    print("🔨 Force killing music player...")
+                    process.kill()
+                    process.wait(timeout=1)
+        except Exception as e:
+            print(f"⚠️  Error stopping process: {e}")
 
     def pause(self):
-        """Pause/resume playback (not supported by all players)"""
-        if self.current_process:
+        """Pause playback"""
+        with self._play_lock:
+            if not self.is_playing_music():
+                return False, "No music is playing"
+            if self._mpv_ready():
+                try:
+                    self.mpv.set_property('pause', True)
+                except MpvError as e:
+                    return self._mpv_failed(e, "Couldn't pause the music")
+            else:
+                self._signal(signal.SIGSTOP)
+            self.paused = True
+        return True, "Music paused"
+
+    def resume(self):
+        """Resume paused playback"""
+        with self._play_lock:
+            if not self.is_playing_music() or not self.paused:
+                return False, "Nothing is paused"
+            if self._mpv_ready():
+                try:
+                    self.mpv.set_property('pause', False)
+                except MpvError as e:
+                    return self._mpv_failed(e, "Couldn't resume the music")
+            elif not self._ducked:
+                self._signal(signal.SIGCONT)
+            self.paused = False
+        return True, "Resuming music"
+
+    def set_volume(self, volume):
+        """Set the music volume (0.0 to 1.0) - the music channel's gain"""
+        self.output.set_gain(MUSIC, volume)
+        return True, f"Music volume {round(volume * 100)} percent"
+
+    def seek(self, seconds, relative=True):
+        """
+        Jump within the current song (mpv only)
+
+        Args:
+            seconds: Offset (relative) or position (absolute) in seconds
+            relative: Seek from the current position instead of the start
+        """
+        with self._play_lock:
+            if not self._mpv_ready() or not self.is_playing:
+                return False, "Seeking needs mpv and a song playing"
+            try:
+                self.mpv.command('seek', seconds, 'relative' if relative else 'absolute')
+            except MpvError as e:
+                return self._mpv_failed(e, "Couldn't seek")
+        return True, "Done"
+
+    def next(self):
+        """Next song: the queue's next entry (same as skip)"""
+        return self.skip()
+
+    def position(self):
+        """
+        Where playback is in the current song (mpv only)
+
+        Returns:
+            dict or None: {'position': seconds, 'duration': seconds, 'paused': bool}
+        """
+        with self._play_lock:
+            if not self._mpv_ready() or not self.is_playing:
+                return None
             try:
-                # Send SIGSTOP to pause (Linux only)
-                os.kill(self.current_process.pid, 19)  # SIGSTOP
-                return True, "Music paused"
-            except:
-                return False, "Pause not supported"
-        return False, "No music is playing"
+                return {
+                    'position': self.mpv.get_property('time-pos'),
+                    'duration': self.mpv.get_property('duration'),
+                    'paused': bool(self.mpv.get_property('pause', False)),
+                }
+            except MpvError as e:
+                self._mpv_failed(e, "Couldn't read the position")
+                return None
 
     def is_playing_music(self):
         """Check if music is currently playing"""
-        if self.current_process:
-            return self.current_process.poll() is None
-        return False
+        process = self.current_process
+        if process:
+            return process.poll() is None
+        return self.is_playing and self._mpv_ready()
+
+    def shutdown(self):
+        """Stop music, quit the mpv instance and save the cache's LRU order"""
+        with self._play_lock:
+            if self.current_process:
+                self._stop_process()
+            self._close_mpv()
+            self.is_playing = False
+            self._track += 1
+        self.cache.flush()
+
+    def _mpv_failed(self, error, message):
+        """
+        Handle an mpv command that failed (caller holds _play_lock)
+
+        A refused command leaves mpv alone. If mpv has died or stopped
+        answering it is shut down like stop() does, which ends the song.
+
+        Returns:
+            tuple: (False, message) for the caller to return
+        """
+        print(f"⚠️  {message}: {error}")
+        if isinstance(error, MpvTimeout) or not self._mpv_ready():
+            self._close_mpv()
+            if self.is_playing:
+                self.is_playing = False
+                self.paused = False
+                self._track += 1
+                self._track_changed(None)
+            return False, f"{message}, the music player stopped responding"
+        return False, message
+
+    def _mpv_ready(self):
+        """Whether the mpv instance is running and connected"""
+        return (self.mpv is not None and self.mpv.connected and
+                self._mpv_process is not None and self._mpv_process.poll() is None)
+
+    def _ensure_mpv(self):
+        """Start the idle mpv instance and connect to it, if not already (caller holds _play_lock)"""
+        if self._mpv_ready():
+            return
+        self._close_mpv()
+
+        if os.path.exists(self._mpv_socket):
+            os.unlink(self._mpv_socket)
+        self._mpv_process = subprocess.Popen(
+            [self.mpv_path, '--idle=yes', '--no-video', '--no-terminal', '--really-quiet',
+             f'--input-ipc-server={self._mpv_socket}', f'--volume={round(self._gain * 100)}',
+             '--ytdl-format=bestaudio/best'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        self.mpv = MpvIPC(self._mpv_socket, on_event=self._on_mpv_event)
+        self.mpv.connect()
+        print(f"🎛️  mpv started (PID: {self._mpv_process.pid}), controlled over IPC")
+
+    def _close_mpv(self):
+        """Quit mpv and drop the connection (caller holds _play_lock)"""
+        if self.mpv is not None:
+            try:
+                if self.mpv.connected:
+                    self.mpv.command('quit', timeout=0.5)
+            except MpvError:
+                pass
+            self.mpv.close()
+            self.mpv = None
+
+        process, self._mpv_process = self._mpv_process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _on_mpv_event(self, event):
+        """mpv event: a song that ends by itself (or fails) lets the queue move on"""
+        if event.get('event') == 'end-file' and event.get('reason') in ('eof', 'error'):
+            # Not on the IPC reader thread: starting the next song waits for replies it delivers
+            threading.Thread(target=self._song_finished, args=(self._track,), daemon=True,
+                             name="mpv-end-file").start()